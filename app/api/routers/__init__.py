@@ -6,3 +6,4 @@ from .trip_router import router as trip_router
 from .user_router import router as user_router
 from .visit_router import router as visit_router
 from .api_review_router import router as review_router
+from .metrics_router import router as metrics_router
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, Query
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.schemas.review import ReviewCreate
-from core.dependencies import get_db, get_current_user
+from api.schemas.review import ReviewCreate, ReviewResponse, ReviewPageResponse
+from core.dependencies import get_db, get_current_user, get_redis
 from domain.repositories.review_repository import ReviewRepository
-from infrastructure.database.models import User
+from infrastructure.cache.redis_service import RedisService
+from domain.dto.principal_dto import Principal
 
 templates = Jinja2Templates(directory="templates")
 
@@ -37,7 +40,8 @@ async def post_create_review(
         rating: int = Form(..., ge=1, le=5),
         place_id: int = Form(...),
         db: AsyncSession = Depends(get_db),
-        user: User = Depends(get_current_user)
+        user: Principal = Depends(get_current_user),
+        redis: RedisService = Depends(get_redis)
 ):
     """
     Создаёт новый отзыв через форму.
@@ -46,6 +50,7 @@ async def post_create_review(
     :param place_id: ID места, на которое оставляется отзыв.
     :param db: Сессия базы данных для работы с отзывами.
     :param user: Авторизованный пользователь.
+    :param redis: Кэш профилей предпочтений пользователей.
     :raises HTTPException:
         - 401 UNAUTHORIZED — если пользователь не авторизован.
     :return: Перенаправляет на список всех отзывов.
@@ -54,41 +59,31 @@ async def post_create_review(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
     review_data = ReviewCreate(content=content, rating=rating, user_id=user.id, place_id=place_id)
-    repo = ReviewRepository(db)
+    repo = ReviewRepository(db, redis)
     await repo.create_review(review_data)
-    return RedirectResponse(url="/api/reviews", status_code=status.HTTP_303_SEE_OTHER)
-
-
-from fastapi import Request, Query
+    return RedirectResponse(url="/api/reviews/reviews", status_code=status.HTTP_303_SEE_OTHER)
 
 
 @router.get("/reviews", response_class=HTMLResponse, summary="Отображает отзывы с пагинацией")
 async def get_reviews(
         request: Request,
         db: AsyncSession = Depends(get_db),
-        page: int = Query(1, description="Номер страницы", gt=0),
-        per_page: int = Query(20, description="Количество отзывов на странице", le=100)
+        redis: RedisService = Depends(get_redis),
+        cursor: Optional[str] = Query(None, description="Курсор страницы из ссылки «Далее»"),
+        per_page: int = Query(20, description="Количество отзывов на странице", gt=0, le=100)
 ):
     """
-    Отображает отзывы с постраничной навигацией.
+    Отображает отзывы с постраничной навигацией по курсору.
 
     :param request: Объект запроса для использования в шаблонах
     :param db: Сессия базы данных для работы с отзывами
-    :param page: Номер страницы (начиная с 1)
+    :param redis: Кэш общего количества отзывов
+    :param cursor: Курсор страницы; без него — первая страница
     :param per_page: Количество отзывов на странице (максимум 100)
     :return: HTML-страница с отображением отзывов
     """
-    repo = ReviewRepository(db)
-
-    # Получаем отзывы с пагинацией
-    reviews = await repo.get_all_reviews(
-        limit=per_page,
-        offset=(page - 1) * per_page
-    )
-
-    # Получаем общее количество отзывов для пагинации
-    total_reviews = await repo.get_reviews_count()
-    total_pages = (total_reviews + per_page - 1) // per_page
+    repo = ReviewRepository(db, redis)
+    reviews, next_cursor = await repo.get_reviews_page(limit=per_page, cursor=cursor)
 
     return templates.TemplateResponse(
         "reviews.html",
@@ -96,14 +91,41 @@ async def get_reviews(
             "request": request,
             "reviews": reviews,
             "pagination": {
-                "page": page,
+                "cursor": cursor,
+                "next_cursor": next_cursor,
                 "per_page": per_page,
-                "total_pages": total_pages,
-                "total_reviews": total_reviews
+                "total_reviews": await repo.get_reviews_count()
             }
         }
     )
 
+
+@router.get("/list", response_model=ReviewPageResponse, summary="Отзывы с пагинацией по курсору")
+async def list_reviews(
+        db: AsyncSession = Depends(get_db),
+        redis: RedisService = Depends(get_redis),
+        cursor: Optional[str] = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+        limit: int = Query(20, description="Количество отзывов на странице", gt=0, le=100)
+):
+    """
+    Страница отзывов, от новых к старым.
+
+    :param db: Сессия базы данных для работы с отзывами
+    :param redis: Кэш общего количества отзывов
+    :param cursor: Курсор страницы; без него — первая страница
+    :param limit: Количество отзывов на странице (максимум 100)
+    :raises HTTPException:
+        - 400 BAD REQUEST — если курсор повреждён.
+    :return: Отзывы, курсор следующей страницы и общее количество отзывов
+    """
+    repo = ReviewRepository(db, redis)
+    reviews, next_cursor = await repo.get_reviews_page(limit=limit, cursor=cursor)
+    return ReviewPageResponse(
+        items=[ReviewResponse.model_validate(review) for review in reviews],
+        next_cursor=next_cursor,
+        total=await repo.get_reviews_count()
+    )
+
 @router.get(
     "/{review_id}/edit",
     response_class=HTMLResponse,
@@ -113,7 +135,7 @@ async def get_edit_review_form(
         request: Request,
         review_id: int,
         db: AsyncSession = Depends(get_db),
-        user: User = Depends(get_current_user)
+        user: Principal = Depends(get_current_user)
 ):
     """
     Отображает форму для редактирования существующего отзыва.
@@ -137,7 +159,8 @@ async def post_edit_review(
         content: str = Form(...),
         rating: int = Form(..., ge=1, le=5),
         db: AsyncSession = Depends(get_db),
-        user: User = Depends(get_current_user)
+        user: Principal = Depends(get_current_user),
+        redis: RedisService = Depends(get_redis)
 ):
     """
     Редактирует существующий отзыв.
@@ -146,6 +169,7 @@ async def post_edit_review(
     :param rating: Новый рейтинг отзыва (от 1 до 5).
     :param db: Сессия базы данных для работы с отзывами.
     :param user: Авторизованный пользователь.
+    :param redis: Кэш профилей предпочтений пользователей.
     :raises HTTPException:
         - 401 UNAUTHORIZED — если пользователь не авторизован.
     :return: Перенаправляет на страницу с отзывами.
@@ -153,7 +177,7 @@ async def post_edit_review(
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
-    repo = ReviewRepository(db)
+    repo = ReviewRepository(db, redis)
 
     await repo.update_review(review_id, content, rating, user)
     return RedirectResponse(url="/api/reviews/reviews", status_code=status.HTTP_303_SEE_OTHER)
@@ -167,7 +191,7 @@ async def get_delete_review_form(
         request: Request,
         review_id: int,
         db: AsyncSession = Depends(get_db),
-        user: User = Depends(get_current_user)
+        user: Principal = Depends(get_current_user)
 ):
     """
     Отображает форму для подтверждения удаления отзыва.
@@ -189,13 +213,15 @@ async def get_delete_review_form(
 async def post_delete_review(
         review_id: int,
         db: AsyncSession = Depends(get_db),
-        user: User = Depends(get_current_user)
+        user: Principal = Depends(get_current_user),
+        redis: RedisService = Depends(get_redis)
 ):
     """
     Удаляет отзыв по идентификатору.
     :param review_id: Идентификатор отзыва, который нужно удалить.
     :param db: Сессия базы данных для работы с отзывами.
     :param user: Авторизованный пользователь.
+    :param redis: Кэш профилей предпочтений пользователей.
     :raises HTTPException:
         - 401 UNAUTHORIZED — если пользователь не авторизован.
     :return: Перенаправляет на страницу с отзывами.
@@ -203,6 +229,6 @@ async def post_delete_review(
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
-    repo = ReviewRepository(db)
+    repo = ReviewRepository(db, redis)
     await repo.delete_review(review_id)
     return RedirectResponse(url="/api/reviews/reviews", status_code=status.HTTP_303_SEE_OTHER)
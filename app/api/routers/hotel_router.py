@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-import time
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
 
 from loguru import logger
 
 from core.dependencies import get_hotel_repository, get_current_user
 from domain.repositories import HotelRepository
 from api.schemas import HotelSearchRequest
-from infrastructure.database.models import User
+from api.streaming import ndjson_response, wants_ndjson
+from domain.dto.principal_dto import Principal
 
 router = APIRouter(
     prefix="/hotels",
@@ -16,13 +17,18 @@ router = APIRouter(
 
 @router.get("/", summary="Получить отели")
 async def get_hotels(
+        request: Request,
         query: HotelSearchRequest = Depends(),
         repo: HotelRepository = Depends(get_hotel_repository),
-        user: User = Depends(get_current_user),
+        user: Principal = Depends(get_current_user),
 ):
     """
     Получить список отелей, соответствующих поисковому запросу.
 
+    С заголовком Accept: application/x-ndjson отели отдаются потоком, по одному
+    JSON-объекту на строку, без сборки общего документа.
+
+    :param request: HTTP-запрос (заголовок Accept выбирает потоковый ответ).
     :param query: Параметры поиска отелей (категория, местоположение, рейтинг и т.д.).
     :param repo: Репозиторий отелей, отвечающий за взаимодействие с базой данных или внешними сервисами.
     :param user: Обёртка-заглушка для мока OAUTH2.
@@ -33,13 +39,13 @@ async def get_hotels(
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
-    start = time.perf_counter()
+    # Время запроса попадает в http_request_duration_seconds{route="/hotels/"}
     try:
         hotels = await repo.search_hotels(query)
-        return {"results": hotels}
+        if wants_ndjson(request):
+            return ndjson_response(hotels)
+        # orjson сериализует DTO-датаклассы напрямую, минуя jsonable_encoder
+        return ORJSONResponse({"results": hotels})
     except Exception as e:
         logger.error(f"Ошибка при получении отелей: {e}")
         raise HTTPException(status_code=503, detail="Сервис временно недоступен")
-    finally:
-        duration = time.perf_counter() - start
-        logger.info(f"Время выполнения запроса /hotels: {duration:.3f} сек")
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+router = APIRouter(
+    tags=["Мониторинг"],
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Метрики приложения в формате Prometheus: гистограммы времени маршрутов,
+    внешних API, методов репозиториев и SQL-выражений, попадания в кэши и
+    состояние пулов соединений.
+    """
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -1,46 +1,138 @@
-from fastapi import APIRouter, Query, Depends, HTTPException
-from datetime import datetime, timezone
-from typing import Optional
+from fastapi import APIRouter, Query, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from typing import AsyncIterator, List, Optional
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy.dialects.postgresql import insert
 from api.schemas import PlaceSchema, PlaceResponse
-from infrastructure.database.models import CategoryEnum, Place, Rating, User
-from utils.utils import get_local_places
-from core.dependencies import get_db, get_current_user, get_nominatim_client
-from domain.repositories import TripRepository
-from infrastructure.external.foursquare_client import (search_places,
-                                                       parse_place_item,
-                                                       foursquare_category_id,
-                                                       prepare_new_ratings)
+from api.streaming import ndjson_response, wants_ndjson
+from infrastructure.database.base import async_session_maker
+from infrastructure.database.models import CategoryEnum, Place
+from domain.dto.principal_dto import Principal
+from utils.utils import get_local_places, stream_local_places
+from utils.distance import nearest_within_radius
+from core.dependencies import get_db, get_current_user, get_trip_recorder, get_foursquare_cache
+from domain.repositories import PlaceRepository
+from domain.services.trip_recorder import TripRecorder
+from infrastructure.cache.foursquare_cache import FoursquareSearchCache
+from infrastructure.external.foursquare_client import parse_place_item, foursquare_category_id
 
 router = APIRouter(
     prefix="/search",
     tags=["Поиск и рекомендация мест"],
 )
 
-@router.get("/", summary="Получить места")
+
+def to_place_schema(place: Place, distance_m: float) -> PlaceSchema:
+    """Преобразовать место в схему ответа с расстоянием до точки поиска"""
+    schema = PlaceSchema.model_validate(place)
+    schema.distance_m = float(distance_m)
+    return schema
+
+
+async def fetch_external_places(
+        db: AsyncSession,
+        foursquare_cache: FoursquareSearchCache,
+        category: CategoryEnum,
+        category_id: str,
+        latitude: float,
+        longitude: float,
+        radius: int,
+        min_rating: Optional[float],
+        limit: int
+) -> List[PlaceSchema]:
+    """
+    Места из Foursquare (через кэш по гео-плиткам): сохраняет их в базу
+    и возвращает ближайшие в радиусе, отсортированные по расстоянию.
+    """
+    data = await foursquare_cache.search(category_id, latitude, longitude, radius)
+    results = data.get("results", [])
+    if not results:
+        return []
+
+    parsed_places = [p for p in (parse_place_item(item, min_rating) for item in results) if p]
+    places = await PlaceRepository(db).save_external_places(parsed_places, category.value)
+    await db.commit()
+
+    # Точная фильтрация по радиусу и сортировка по расстоянию
+    nearest, distances = nearest_within_radius(
+        latitude, longitude,
+        [p.latitude for p in places],
+        [p.longitude for p in places],
+        radius, limit
+    )
+    return [to_place_schema(places[i], d) for i, d in zip(nearest, distances)]
+
+
+async def stream_places(
+        user_id: int,
+        category: CategoryEnum,
+        category_id: str,
+        latitude: float,
+        longitude: float,
+        radius: int,
+        min_rating: Optional[float],
+        limit: int,
+        foursquare_cache: FoursquareSearchCache,
+        trip_recorder: TripRecorder
+) -> AsyncIterator[PlaceSchema]:
+    """
+    Потоковый вариант поиска: места из базы читаются серверным курсором,
+    при их отсутствии отдаётся разобранная страница Foursquare.
+
+    Тело ответа отправляется после выхода из зависимостей, поэтому сессия
+    открывается здесь, а не берётся из get_db.
+    """
+    async with async_session_maker() as db:
+        found = False
+        async for row in stream_local_places(db, latitude, longitude, radius, category.value, min_rating, limit):
+            if not found:
+                found = True
+                await trip_recorder.record(user_id, latitude, longitude, category.value)
+            yield PlaceSchema.from_row(row)
+        if found:
+            return
+
+        places = await fetch_external_places(
+            db, foursquare_cache, category, category_id, latitude, longitude, radius, min_rating, limit
+        )
+        if places:
+            await trip_recorder.record(user_id, latitude, longitude, category.value)
+        for place in places:
+            yield place
+
+
+@router.get("/", response_model=PlaceResponse, summary="Получить места")
 async def search_places_handler(
+        request: Request,
         category: CategoryEnum = Query(..., description="Категория мест"),
         latitude: float = Query(..., description="Широта"),
         longitude: float = Query(..., description="Долгота"),
         radius: int = Query(1000, description="Радиус поиска в метрах"),
         min_rating: Optional[float] = Query(None, description="Минимальный рейтинг (0-10)"),
+        limit: int = Query(20, ge=1, le=200, description="Максимальное количество ближайших мест"),
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)  # Получаем текущего пользователя
+        current_user: Principal = Depends(get_current_user),  # Получаем текущего пользователя
+        foursquare_cache: FoursquareSearchCache = Depends(get_foursquare_cache),
+        trip_recorder: TripRecorder = Depends(get_trip_recorder)
 ):
     """
     Поиск мест по заданной категории, координатам, радиусу и минимальному рейтингу.
 
+    С заголовком Accept: application/x-ndjson места отдаются потоком, по одному
+    JSON-объекту на строку, по мере чтения из базы.
+
+    :param request: HTTP-запрос (заголовок Accept выбирает потоковый ответ).
     :param category: Категория мест (например, рестораны, магазины).
     :param latitude: Широта для поиска мест.
     :param longitude: Долгота для поиска мест.
     :param radius: Радиус поиска в метрах.
     :param min_rating: Минимальный рейтинг для мест (по умолчанию нет фильтрации по рейтингу).
+    :param limit: Максимальное количество возвращаемых мест, ближайшие идут первыми.
     :param db: Сессия для работы с базой данных.
     :param current_user: Текущий авторизованный пользователь, чьи предпочтения могут быть использованы для поиска.
-    :return: Список мест, соответствующих запросу.
+    :param foursquare_cache: Кэш ответов Foursquare по гео-плиткам.
+    :param trip_recorder: Фоновая запись поездки пользователя.
+    :return: Список мест в радиусе, отсортированный по расстоянию (distance_m).
     :raises HTTPException 400: В случае некорректной категории для поиска.
     :raises HTTPException 401: Если пользователь не авторизован.
     :raises HTTPException 500: В случае ошибок при работе с базой данных или внешними сервисами.
@@ -49,86 +141,31 @@ async def search_places_handler(
     if not category_id:
         raise HTTPException(status_code=400, detail="Неверная категория для поиска")
 
+    if wants_ndjson(request):
+        return ndjson_response(stream_places(
+            current_user.id, category, category_id, latitude, longitude, radius, min_rating, limit,
+            foursquare_cache, trip_recorder
+        ))
+
     try:
         # Получаем данные мест из базы данных
-        local_places = await get_local_places(db, latitude, longitude, radius, category.value, min_rating)
+        local_places = await get_local_places(db, latitude, longitude, radius, category.value, min_rating, limit)
         if local_places:
-            # Сохраняем информацию о поездке в таблице trips
-            async with get_nominatim_client() as client:
-                destination = await client.reverse_geocode(latitude, longitude)
-
-            repo = TripRepository(db)
-            await repo.save_trip(current_user.id, destination,
-                                 category.value)
-
-            return PlaceResponse(places=[PlaceSchema.model_validate(p) for p in local_places])
-
-        # Если не нашли — обращаемся к внешнему API
-        params = {
-            "ll": f"{latitude},{longitude}",
-            "radius": radius,
-            "categories": category_id,
-            "limit": 10
-        }
-        data = await search_places(params=params)
-        results = data.get("results", [])
-        if not results:
-            return PlaceResponse(places=[])
-
-        external_ids = [item.get("fsq_id") for item in results if item.get("fsq_id")]
-        existing_places_query = await db.execute(select(Place).where(Place.external_id.in_(external_ids)))
-        existing_places = {place.external_id: place for place in existing_places_query.scalars()}
-
-        places = []
-        new_places = []
-        ratings_buffer = []
-
-        for item in results:
-            place_data = parse_place_item(item, min_rating)
-            if not place_data:
-                continue
-
-            ext_id = place_data["external_id"]
-            if ext_id in existing_places:
-                places.append(existing_places[ext_id])
-            else:
-                now = datetime.now(timezone.utc).replace(tzinfo=None)
-                place_data["created_at"] = now
-                place_data["updated_at"] = now
-                place_data["category"] = category.value  # <-- добавляем категорию
-                new_places.append(place_data)
-
-                if place_data.get("rating") is not None:
-                    ratings_buffer.append({
-                        "source": "Foursquare",
-                        "rating": place_data["rating"],
-                        "external_id": ext_id,
-                    })
-
-        if new_places:
-            stmt = insert(Place).values(new_places).returning(Place.id, Place.external_id)
-            result = await db.execute(stmt)
-            inserted_places = {row.external_id: row.id for row in result.mappings()}
-
-            for place in new_places:
-                place["id"] = inserted_places.get(place["external_id"])
-                places.append(Place(**place))
-
-            rating_values = prepare_new_ratings(ratings_buffer, inserted_places)
-            if rating_values:
-                await db.execute(insert(Rating).values(rating_values))
-
-        await db.commit()
-
-        # После сохранения мест в базе данных, сохраняем поездку
-        async with get_nominatim_client() as client:
-            destination = await client.reverse_geocode(latitude, longitude)
-
-        repo = TripRepository(db)
-        await repo.save_trip(current_user.id, destination,
-                             category.value)
-
-        return PlaceResponse(places=[PlaceSchema.model_validate(p) for p in places])
+            # Сохраняем информацию о поездке в таблице trips (в фоне)
+            await trip_recorder.record(current_user.id, latitude, longitude, category.value)
+
+            # Строки из БД уже типизированы: схемы собираются без валидации и сериализуются orjson
+            places = [PlaceSchema.from_row(row) for row in local_places]
+            return ORJSONResponse(PlaceResponse.model_construct(places=places).model_dump())
+
+        # Если не нашли — обращаемся к внешнему API (через кэш по гео-плиткам)
+        places = await fetch_external_places(
+            db, foursquare_cache, category, category_id, latitude, longitude, radius, min_rating, limit
+        )
+        if places:
+            # После сохранения мест в базе данных, сохраняем поездку (в фоне)
+            await trip_recorder.record(current_user.id, latitude, longitude, category.value)
+        return PlaceResponse(places=places)
 
     except SQLAlchemyError as e:
         await db.rollback()
@@ -1,6 +1,8 @@
 from fastapi import Depends, APIRouter
 from sqlalchemy.ext.asyncio import AsyncSession
-from core.dependencies import get_db, get_current_user
+from core.dependencies import get_db, get_current_user, get_foursquare_cache, get_redis
+from infrastructure.cache.redis_service import RedisService
+from infrastructure.cache.foursquare_cache import FoursquareSearchCache
 from domain.services.recommendation_service import RecommendationEngine
 from api.schemas import RecommendationResponse
 
@@ -20,6 +22,8 @@ async def get_recommendations(
         longitude: float,
         session: AsyncSession = Depends(get_db),
         user=Depends(get_current_user),
+        foursquare_cache: FoursquareSearchCache = Depends(get_foursquare_cache),
+        redis: RedisService = Depends(get_redis),
 ):
     """
     Получить рекомендованные места на основе предпочтений пользователя и его местоположения.
@@ -28,11 +32,13 @@ async def get_recommendations(
     :param longitude: Долгота для поиска рекомендаций.
     :param session: Сессия для работы с базой данных.
     :param user: Текущий авторизованный пользователь, чьи предпочтения будут использованы для генерации рекомендаций.
+    :param foursquare_cache: Кэш ответов Foursquare по гео-плиткам.
+    :param redis: Кэш профилей предпочтений пользователей.
 
     :return: Список рекомендованных мест, основанных на истории и предпочтениях пользователя.
     :raises HTTPException 401: Если пользователь не авторизован.
     :raises HTTPException 500: В случае возникновения ошибок при генерации рекомендаций.
     """
-    engine = RecommendationEngine(session)
+    engine = RecommendationEngine(session, foursquare_cache, redis)
     results = await engine.recommend(user_id=user.id, latitude=latitude, longitude=longitude)
     return {"results": results}
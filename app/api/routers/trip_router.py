@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from api.schemas import TripResponse
 from domain.repositories import TripRepository
 from core.dependencies import get_db, get_current_user
-from infrastructure.database.models import User
+from domain.dto.principal_dto import Principal
 from typing import List
 
 router = APIRouter(
@@ -15,7 +16,7 @@ router = APIRouter(
 @router.get("/", response_model=List[TripResponse], summary="Получить список поездок пользователя")
 async def list_user_trips(
         db: AsyncSession = Depends(get_db),
-        user: User = Depends(get_current_user)
+        user: Principal = Depends(get_current_user)
 ):
     """
     Получить список поездок пользователя.
@@ -28,4 +29,6 @@ async def list_user_trips(
     :raises HTTPException 500: В случае ошибок при запросе поездок пользователя из базы данных.
     """
     repo = TripRepository(db)
-    return await repo.get_user_trips(user.id)
+    rows = await repo.get_user_trips(user.id)
+    # Строки из БД уже типизированы: схемы собираются без валидации и сериализуются orjson
+    return ORJSONResponse([TripResponse.from_row(row).model_dump() for row in rows])
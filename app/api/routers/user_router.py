@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from core.dependencies import get_current_user
 from api.schemas import UserResponse
-from infrastructure.database.models import User
+from domain.dto.principal_dto import Principal
 
 router = APIRouter(
     prefix="/users",
@@ -10,7 +10,7 @@ router = APIRouter(
 
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: Principal = Depends(get_current_user)):
     """
     Получить информацию о текущем пользователе.
 
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from core.dependencies import get_db, get_current_user
+from core.dependencies import get_db, get_current_user, get_redis
 from api.schemas import RecommendationResponse, VisitResponse, VisitCreate
 from typing import Any
 
 from domain.services.recommendation_service import RecommendationEngine
 from domain.services.visit_service import VisitService
 
-from infrastructure.database.models import User
+from infrastructure.cache.redis_service import RedisService
+from domain.dto.principal_dto import Principal
 
 router = APIRouter(prefix="/visits", tags=["История посещений"])
 
@@ -20,7 +21,8 @@ router = APIRouter(prefix="/visits", tags=["История посещений"])
 async def create_visit(
         visit: VisitCreate,
         session: AsyncSession = Depends(get_db),
-        user: User = Depends(get_current_user),
+        user: Principal = Depends(get_current_user),
+        redis: RedisService = Depends(get_redis),
 ):
     """
     Создать запись о посещении места.
@@ -30,10 +32,11 @@ async def create_visit(
     :param visit: Объект VisitCreate, содержащий информацию о посещенном месте.
     :param session: Объект базы данных (Session).
     :param user: Текущий авторизованный пользователь.
+    :param redis: Кэш профилей предпочтений пользователей.
 
     :return: Созданная запись о посещении в формате VisitResponse.
     """
-    service = VisitService(session)
+    service = VisitService(session, redis)
     visit.user_id = user.id
     return await service.create_visit(visit)
 
@@ -46,6 +49,7 @@ async def save_visited_place(
         place: RecommendationResponse,
         session: AsyncSession = Depends(get_db),
         user: Any = Depends(get_current_user),
+        redis: RedisService = Depends(get_redis),
 ):
     """
     Сохранить информацию о посещенном месте.
@@ -55,12 +59,13 @@ async def save_visited_place(
     :param place: Объект RecommendationResponse с данными о месте, которое было посещено.
     :param session: Объект базы данных (Session).
     :param user: Текущий авторизованный пользователь.
+    :param redis: Кэш профилей предпочтений пользователей.
 
     :return: Сообщение о успешной записи.
     :raises HTTPException 401: Если пользователь не авторизован.
     :raises HTTPException 400: Если произошла ошибка при сохранении информации о посещенном месте.
     """
-    engine = RecommendationEngine(session)
+    engine = RecommendationEngine(session, redis=redis)
     try:
         await engine.mark_as_visited(user_id=user.id, recommendation=place.model_dump())
         return {"message": "Place marked as visited"}
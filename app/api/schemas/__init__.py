@@ -1,7 +1,7 @@
 from .hotel import HotelSearchRequest, HotelResponse, HotelListResponse
-from .place import PlaceSchema, PlaceResponse, RatingSchema, RecommendationResponse
+from .place import PlaceSchema, PlaceResponse, PlaceReviewStatsSchema, RatingSchema, RecommendationResponse
 from .user import UserResponse, UserCreate
 from .trip import TripResponse, TripCreate
 from .visit import VisitCreate, VisitResponse
 from .auth import TokenResponse, RefreshTokenRequest
-from .review import ReviewCreate, ReviewResponse
\ No newline at end of file
+from .review import ReviewCreate, ReviewResponse, ReviewPageResponse
\ No newline at end of file
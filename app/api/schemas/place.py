@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Any, Optional, List
 from pydantic import BaseModel, ConfigDict, model_validator
 from infrastructure.database.models.place import CategoryEnum
 
@@ -8,6 +8,14 @@ RATING_RANGES = {
 }
 
 
+class PlaceReviewStatsSchema(BaseModel):
+    review_count: int  # количество отзывов пользователей
+    rating_mean: Optional[float] = None  # средняя оценка (1-5)
+    histogram: List[int]  # количество отзывов с оценками 1, 2, 3, 4, 5
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class PlaceSchema(BaseModel):
     id: Optional[int] = None
     name: str
@@ -16,9 +24,36 @@ class PlaceSchema(BaseModel):
     address: str
     external_id: Optional[str]
     category: CategoryEnum
+    distance_m: Optional[float] = None  # расстояние до точки поиска в метрах
+    review_stats: Optional[PlaceReviewStatsSchema] = None  # отзывы пользователей о месте
 
     model_config = ConfigDict(from_attributes=True)  # для конвертации SQLAlchemy → Pydantic
 
+    @classmethod
+    def from_row(cls, row: Any) -> "PlaceSchema":
+        """
+        Схема из строки local_places_query без повторной валидации:
+        типы значений уже гарантирует база данных.
+        """
+        review_stats = None
+        if row.review_count is not None:
+            review_stats = PlaceReviewStatsSchema.model_construct(
+                review_count=row.review_count,
+                rating_mean=row.rating_mean,
+                histogram=[row.rating_1, row.rating_2, row.rating_3, row.rating_4, row.rating_5],
+            )
+        return cls.model_construct(
+            id=row.id,
+            name=row.name,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            address=row.address,
+            external_id=row.external_id,
+            category=CategoryEnum(row.category),
+            distance_m=row.distance_m,
+            review_stats=review_stats,
+        )
+
 
 class PlaceResponse(BaseModel):
     places: List[PlaceSchema]
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
+from typing import List, Optional
 
 
 class ReviewCreate(BaseModel):
@@ -42,4 +43,9 @@ class ReviewResponse(BaseModel):
                 "updated_at": "2025-01-01T00:00:00"
             }
         }
-    )
\ No newline at end of file
+    )
+
+class ReviewPageResponse(BaseModel):
+    items: List[ReviewResponse] = Field(..., description="Отзывы страницы, от новых к старым")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы; null — страница последняя")
+    total: int = Field(..., description="Общее количество отзывов")
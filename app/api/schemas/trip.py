@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
 
 class TripCreate(BaseModel):
@@ -17,3 +17,15 @@ class TripResponse(BaseModel):
     model_config = {
         "from_attributes": True
     }
+
+    @classmethod
+    def from_row(cls, row: Any) -> "TripResponse":
+        """
+        Схема из строки TripRepository.get_user_trips без повторной валидации.
+        """
+        return cls.model_construct(
+            id=row.id,
+            destination=row.destination,
+            category=row.category,
+            created_at=row.created_at,
+        )
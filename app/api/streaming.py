@@ -0,0 +1,50 @@
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Union
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from pydantic import BaseModel
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    """
+    Запросил ли клиент потоковый ответ (Accept: application/x-ndjson).
+    """
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _encode(item: Any) -> bytes:
+    if isinstance(item, BaseModel):
+        line = item.model_dump_json()
+    else:
+        line = json.dumps(jsonable_encoder(item), ensure_ascii=False, separators=(",", ":"))
+    return line.encode() + b"\n"
+
+
+async def _lines(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[bytes]:
+    try:
+        if isinstance(items, AsyncIterable):
+            async for item in items:
+                yield _encode(item)
+        else:
+            for item in items:
+                yield _encode(item)
+    except Exception as e:
+        # Статус 200 уже отправлен: сообщаем об ошибке последней строкой потока
+        logger.error(f"Ошибка потокового ответа: {e!r}")
+        yield _encode({"error": "Ответ прерван из-за внутренней ошибки"})
+
+
+def ndjson_response(items: Union[Iterable[Any], AsyncIterable[Any]]) -> StreamingResponse:
+    """
+    Потоковый ответ NDJSON: по одному JSON-объекту на строку.
+
+    Каждый элемент сериализуется и отправляется сразу, как только его отдаст
+    итератор, поэтому первый результат уходит клиенту до того, как прочитан
+    последний, а в памяти не собирается ни полный список, ни документ JSON.
+    """
+    return StreamingResponse(_lines(items), media_type=NDJSON_MEDIA_TYPE)
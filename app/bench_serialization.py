@@ -0,0 +1,148 @@
+"""
+Сравнение затрат CPU на элемент ответа /search, /trips и /hotels:
+прежний путь (ORM-объекты → model_validate → jsonable_encoder → json) и
+текущий (строки колонок → model_construct → orjson).
+
+База — SQLite в памяти, поэтому время запроса к Postgres не учитывается:
+сравнивается только работа процесса после получения строк драйвером.
+
+Запуск из каталога app: python bench_serialization.py [--items 200] [--repeat 50]
+"""
+import argparse
+import json
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session, joinedload
+
+from api.schemas import PlaceResponse, PlaceSchema, TripResponse
+from domain.dto.hotel_dto import Hotel
+from infrastructure.database.base import Base
+from infrastructure.database.models import Place, PlaceReviewStat, UserTrip
+from utils.geohash import encode as geohash_encode
+from utils.utils import local_places_query, nearby_places_filter
+
+LATITUDE, LONGITUDE, RADIUS, CATEGORY = 55.7558, 37.6173, 5000, "Restaurants"
+
+
+def json_render(content) -> bytes:
+    """Рендер starlette JSONResponse, которым FastAPI отдавал ответы по умолчанию."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def create_database(items: int):
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def _register_functions(dbapi_connection, connection_record):
+        # Функции и сортировка Postgres, которые используют запросы мест
+        for name, func in (("radians", math.radians), ("sin", math.sin), ("cos", math.cos),
+                           ("asin", math.asin), ("sqrt", math.sqrt)):
+            dbapi_connection.create_function(name, 1, func)
+        dbapi_connection.create_function("power", 2, math.pow)
+        dbapi_connection.create_function("least", 2, min)
+        dbapi_connection.create_collation("C", lambda a, b: (a > b) - (a < b))
+
+    Base.metadata.create_all(engine, tables=[Place.__table__, PlaceReviewStat.__table__, UserTrip.__table__])
+    now = datetime.now()
+    with Session(engine) as session:
+        for i in range(items):
+            latitude, longitude = LATITUDE + i * 1e-4, LONGITUDE
+            session.add(Place(
+                name=f"Место {i}", latitude=latitude, longitude=longitude, address=f"Улица {i}",
+                category=CATEGORY, external_id=f"fsq-{i}", geohash=geohash_encode(latitude, longitude)
+            ))
+            session.add(UserTrip(user_id=1, destination=f"Город {i}", category=CATEGORY,
+                                 created_at=now - timedelta(minutes=i)))
+        session.flush()
+        # Отзывы есть у половины мест
+        for place_id in range(1, items + 1, 2):
+            session.add(PlaceReviewStat(place_id=place_id, review_count=4, rating_sum=16, rating_mean=4.0,
+                                        rating_1=0, rating_2=0, rating_3=1, rating_4=2, rating_5=1))
+        session.commit()
+    return engine
+
+
+def search_orm(session: Session) -> bytes:
+    distance, conditions = nearby_places_filter(LATITUDE, LONGITUDE, RADIUS)
+    stmt = (
+        select(Place, distance)
+        .options(joinedload(Place.review_stats))
+        .where(Place.category == CATEGORY, *conditions)
+        .order_by(distance)
+    )
+    schemas = []
+    for place, distance_m in session.execute(stmt).unique().all():
+        schema = PlaceSchema.model_validate(place)
+        schema.distance_m = distance_m
+        schemas.append(schema)
+    response = PlaceResponse(places=schemas)
+    session.expunge_all()
+    return json_render(jsonable_encoder(response))
+
+
+def search_rows(session: Session) -> bytes:
+    rows = session.execute(local_places_query(LATITUDE, LONGITUDE, RADIUS, CATEGORY)).all()
+    places = [PlaceSchema.from_row(row) for row in rows]
+    return orjson.dumps(PlaceResponse.model_construct(places=places).model_dump())
+
+
+_trips_adapter = TypeAdapter(List[TripResponse])
+
+
+def trips_orm(session: Session) -> bytes:
+    trips = session.execute(select(UserTrip).where(UserTrip.user_id == 1)).scalars().all()
+    # response_model=List[TripResponse]: проверка объектов и сериализация FastAPI
+    content = _trips_adapter.dump_python(_trips_adapter.validate_python(trips), mode="json")
+    session.expunge_all()
+    return json_render(content)
+
+
+def trips_rows(session: Session) -> bytes:
+    rows = session.execute(
+        select(UserTrip.id, UserTrip.destination, UserTrip.category, UserTrip.created_at)
+        .where(UserTrip.user_id == 1)
+    ).all()
+    return orjson.dumps([TripResponse.from_row(row).model_dump() for row in rows])
+
+
+def measure(name: str, items: int, repeat: int, old: Callable[[], bytes], new: Callable[[], bytes]) -> None:
+    results = []
+    for run in (old, new):
+        run()  # прогрев кэшей компиляции SQL и сериализаторов
+        started = time.process_time()
+        for _ in range(repeat):
+            run()
+        results.append((time.process_time() - started) / (repeat * items) * 1e6)
+    old_us, new_us = results
+    print(f"{name:<8} было {old_us:8.2f} мкс/элемент  стало {new_us:8.2f} мкс/элемент  "
+          f"экономия {old_us - new_us:8.2f} мкс ({old_us / new_us:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200, help="Элементов в ответе")
+    parser.add_argument("--repeat", type=int, default=50, help="Повторов каждого варианта")
+    args = parser.parse_args()
+
+    engine = create_database(args.items)
+    hotels = [Hotel(f"Отель {i}", float(i), i % 3 + 1, LATITUDE, LONGITUDE) for i in range(args.items)]
+    with Session(engine) as session:
+        found = len(session.execute(local_places_query(LATITUDE, LONGITUDE, RADIUS, CATEGORY)).all())
+        assert found == args.items, f"в радиус попало {found} мест из {args.items}"
+
+        measure("/search", args.items, args.repeat, lambda: search_orm(session), lambda: search_rows(session))
+        measure("/trips", args.items, args.repeat, lambda: trips_orm(session), lambda: trips_rows(session))
+    measure("/hotels", args.items, args.repeat,
+            lambda: json_render(jsonable_encoder({"results": hotels})),
+            lambda: orjson.dumps({"results": hotels}))
+
+
+if __name__ == "__main__":
+    main()
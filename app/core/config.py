@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Dict, Optional
 from pydantic import field_validator, ValidationError
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from fastapi.security import OAuth2PasswordBearer
@@ -18,6 +19,17 @@ class Settings(BaseSettings):
     PLACE_DB_NAME: str
     PLACE_DB_USER: str
     PLACE_DB_PASSWORD: str
+    # реплика для чтения (та же БД и пользователь); без неё чтения идут в основную БД
+    PLACE_DB_REPLICA_HOST: Optional[str] = None
+    PLACE_DB_REPLICA_PORT: Optional[int] = None
+
+    # пул соединений Postgres (на каждый воркер и на каждый движок: основной и реплику)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # ожидание свободного соединения, сек
+    DB_POOL_RECYCLE: int = 1800  # соединения старше пересоздаются, сек
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # кэш подготовленных выражений asyncpg; 0 — при pgbouncer в режиме transaction
 
     # hotel_service
     REDIS_URL: str
@@ -36,6 +48,86 @@ class Settings(BaseSettings):
 
     NOMINATIM_URL: str
 
+    FOURSQUARE_API_KEY: Optional[str] = None
+    FOURSQUARE_URL: Optional[str] = None
+
+    # пулы соединений к внешним API
+    HTTP2_ENABLED: bool = True
+    FOURSQUARE_MAX_CONNECTIONS: int = 100
+    FOURSQUARE_MAX_KEEPALIVE: int = 20
+    OPENTRIPMAP_MAX_CONNECTIONS: int = 50
+    OPENTRIPMAP_MAX_KEEPALIVE: int = 10
+    NOMINATIM_MAX_CONNECTIONS: int = 2  # политика Nominatim: не более 1 запроса в секунду
+    NOMINATIM_MAX_KEEPALIVE: int = 2
+    NOMINATIM_REQUESTS_PER_SECOND: float = 1.0
+
+    # объединение одинаковых одновременных запросов к внешним API
+    SINGLE_FLIGHT_LOCK_TTL: float = 10.0  # сколько ведомые воркеры ждут результат ведущего, сек
+    SINGLE_FLIGHT_RESULT_TTL: int = 5  # сколько результат ведущего доступен другим воркерам, сек
+
+    # кэш первого уровня в памяти процесса перед Redis
+    REDIS_LOCAL_CACHE_MAXSIZE: int = 10000
+    REDIS_LOCAL_CACHE_TTL: float = 60.0  # верхняя граница устаревания, если сообщение об инвалидации потеряно
+    REDIS_INVALIDATION_CHANNEL: str = "cache:invalidate"
+    # предохранитель: после стольких ошибок подряд Redis не опрашивается REDIS_BREAKER_RESET_TIMEOUT секунд
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = 3
+    REDIS_BREAKER_RESET_TIMEOUT: float = 10.0
+    # формат кэшируемых объектов
+    REDIS_CODEC_SERIALIZER: str = "msgpack"  # msgpack / orjson / json
+    REDIS_CODEC_COMPRESSION: str = "zstd"  # zstd / lz4 / zlib / none
+    REDIS_CODEC_COMPRESS_THRESHOLD: int = 1024  # сжимаются значения длиннее, байт
+
+    # кэш ответов Foursquare по гео-плиткам
+    FOURSQUARE_CACHE_PRECISION: int = 6  # длина geohash плитки, 6 — около 1.2 x 0.6 км
+    FOURSQUARE_CACHE_TTL: int = 3600  # ответ свежий, сек
+    FOURSQUARE_CACHE_STALE_TTL: int = 24 * 3600  # после свежести отдаётся и обновляется в фоне, сек
+    FOURSQUARE_CACHE_NEGATIVE_TTL: int = 600  # пустой ответ, сек
+
+    # кэш обратного геокодирования
+    GEOCODE_CACHE_PRECISION: int = 5  # длина geohash ключа, 5 — ячейка около 5 x 5 км
+    GEOCODE_CACHE_TTL: int = 30 * 24 * 3600
+
+    # фоновая запись поездок
+    TRIP_QUEUE_BACKEND: str = "memory"  # memory / redis (Redis Streams)
+    TRIP_QUEUE_MAXSIZE: int = 10000
+    TRIP_QUEUE_BATCH_SIZE: int = 200
+    TRIP_QUEUE_FLUSH_INTERVAL: float = 1.0
+    TRIP_QUEUE_MAX_ATTEMPTS: int = 5  # попыток записи события, после которых оно отбрасывается
+    TRIP_QUEUE_CLAIM_IDLE: float = 60.0  # через сколько секунд неподтверждённое событие доставляется снова (redis)
+    TRIP_QUEUE_STOP_TIMEOUT: float = 10.0  # сколько секунд при остановке дописываются накопленные события
+
+    # кэш авторизованных пользователей (секунды)
+    AUTH_USER_CACHE_TTL: int = 60
+
+    # прогрев кэшей популярных направлений
+    CACHE_WARMER_ENABLED: bool = True
+    CACHE_WARMER_INTERVAL: int = 240  # меньше TTL кэша отелей (300 сек), чтобы популярные запросы не остывали
+    CACHE_WARMER_TOP_TILES: int = 20
+    CACHE_WARMER_TOP_HOTEL_QUERIES: int = 50
+    CACHE_WARMER_HISTORY_DAYS: int = 7
+    CACHE_WARMER_OPENTRIPMAP_RPS: float = 2.0
+    CACHE_WARMER_FOURSQUARE_RPS: float = 2.0
+    # счётчик популярности запросов отелей: копится в процессе и отправляется в Redis пачкой
+    HOTEL_POPULARITY_FLUSH_INTERVAL: float = 10.0
+    HOTEL_POPULARITY_KEEP: int = 1000  # сколько самых частых запросов хранится в Redis
+    HOTEL_POPULARITY_TTL: int = 7 * 24 * 3600
+
+    # рекомендации: сколько подходящих мест в радиусе должно быть в базе, чтобы не обращаться к Foursquare
+    RECOMMENDATION_MIN_LOCAL_COVERAGE: int = 20
+
+    # логирование
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True  # JSON-строка на запись; False — текст для локальной разработки
+    LOG_FILE: Optional[str] = "app.log"  # пусто — только stdout
+    LOG_FILE_ROTATION: str = "10 MB"
+    LOG_FILE_RETENTION: int = 5  # сколько файлов после ротации хранить
+    LOG_DIAGNOSE: bool = False  # значения переменных в трассировках — могут содержать секреты
+    # доля логируемых успешных запросов: по умолчанию и по шаблону маршрута, например {"/search/": 0.01};
+    # ошибки (статус >= 400) и медленные запросы логируются всегда
+    LOG_REQUEST_SAMPLE_RATE: float = 1.0
+    LOG_REQUEST_SAMPLE_RATES: Dict[str, float] = {}
+    LOG_SLOW_REQUEST_MS: float = 1000.0
+
     model_config = SettingsConfigDict(
         env_file=Path(__file__).resolve().parent.parent.parent / ".env",
         extra="ignore",
@@ -79,3 +171,12 @@ def get_place_db_url() -> str:
     return (
         f"postgresql+asyncpg://{settings.PLACE_DB_USER}:{settings.PLACE_DB_PASSWORD}@"
         f"{settings.PLACE_DB_HOST}:{settings.PLACE_DB_PORT}/{settings.PLACE_DB_NAME}")
+
+
+def get_place_db_replica_url() -> Optional[str]:
+    if not settings.PLACE_DB_REPLICA_HOST:
+        return None
+    return (
+        f"postgresql+asyncpg://{settings.PLACE_DB_USER}:{settings.PLACE_DB_PASSWORD}@"
+        f"{settings.PLACE_DB_REPLICA_HOST}:{settings.PLACE_DB_REPLICA_PORT or settings.PLACE_DB_PORT}/"
+        f"{settings.PLACE_DB_NAME}")
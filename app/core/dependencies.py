@@ -1,16 +1,19 @@
 from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
 from fastapi import Depends, Request, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from jose import JWTError, jwt
 
 from infrastructure.cache.redis_service import RedisService
-from domain.repositories import HotelRepository
-from infrastructure.external import OpenTripMapClient, NominatimClient
+from infrastructure.cache.geocode_cache import ReverseGeocodeCache
+from infrastructure.cache.foursquare_cache import FoursquareSearchCache
+from infrastructure.cache.principal_cache import PrincipalCache
+from infrastructure.cache.popularity_counter import PopularityCounter
+from domain.dto.principal_dto import Principal
+from domain.repositories import HotelRepository, UserRepository
+from domain.services.trip_recorder import TripRecorder
+from infrastructure.external import OpenTripMapClient, NominatimClient, FoursquareClient
 from infrastructure.database.base import async_session_maker
-from infrastructure.database.models import User
 
 from .config import settings, oauth2_scheme
 
@@ -19,54 +22,74 @@ async def get_redis(request: Request):
     return request.app.state.redis
 
 
-@asynccontextmanager
-async def get_opentripmap_client():
-    client = OpenTripMapClient(
-        api_key=settings.OPENTRIPMAP_API_KEY,
-        base_url=settings.OPENTRIPMAP_URL
-    )
-    try:
-        yield client
-    finally:
-        pass
+async def get_opentripmap_client(request: Request) -> OpenTripMapClient:
+    return request.app.state.opentripmap_client
 
 
-@asynccontextmanager
-async def get_nominatim_client() -> NominatimClient:
-    client = NominatimClient(
-        base_url=settings.NOMINATIM_URL
-    )
-    yield client
+async def get_nominatim_client(request: Request) -> NominatimClient:
+    return request.app.state.nominatim_client
+
+
+async def get_reverse_geocoder(request: Request) -> ReverseGeocodeCache:
+    return request.app.state.reverse_geocoder
+
+
+async def get_trip_recorder(request: Request) -> TripRecorder:
+    return request.app.state.trip_recorder
+
+
+async def get_foursquare_client(request: Request) -> FoursquareClient:
+    return request.app.state.foursquare_client
+
 
+async def get_foursquare_cache(request: Request) -> FoursquareSearchCache:
+    return request.app.state.foursquare_cache
+
+
+async def get_principal_cache(request: Request) -> PrincipalCache:
+    return request.app.state.principal_cache
+
+
+async def get_hotel_popularity(request: Request) -> PopularityCounter:
+    return request.app.state.hotel_popularity
 
 
 async def get_hotel_repository(
         redis: RedisService = Depends(get_redis),
-        opentripmap_client: OpenTripMapClient = Depends(get_opentripmap_client)
+        opentripmap_client: OpenTripMapClient = Depends(get_opentripmap_client),
+        popularity: PopularityCounter = Depends(get_hotel_popularity)
 ) -> HotelRepository:
     return HotelRepository(
         redis=redis,
-        opentripmap_client=opentripmap_client
+        opentripmap_client=opentripmap_client,
+        popularity=popularity
     )
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session_maker() as session:
-        try:
-            yield session
-        except SQLAlchemyError as e:
-            await session.rollback()
-            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-        finally:
-            await session.close()
+    """
+    Сессия БД на запрос. AsyncSession берёт соединение из пула только при
+    первом запросе к БД, поэтому ответы из кэша не занимают соединение Postgres.
+    """
+    session = async_session_maker()
+    try:
+        yield session
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        await session.close()
 
 
 async def get_current_user(
         token: str = Depends(oauth2_scheme),
-        db: AsyncSession = Depends(get_db)
-) -> User:
+        principal_cache: PrincipalCache = Depends(get_principal_cache)
+) -> Principal:
     """
     Получение текущего авторизованного пользователя по токену.
+
+    Пользователь берётся из кэша; сессия БД открывается только при промахе,
+    поэтому маршрутам, которым нужен лишь id пользователя, БД не требуется.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -86,11 +109,19 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    stmt = select(User).where(User.username == username)
-    result = await db.execute(stmt)
-    user = result.scalars().first()
+    principal = await principal_cache.get(username)
+    if principal is not None:
+        return principal
+
+    try:
+        async with async_session_maker() as session:
+            user = await UserRepository(session).get_by_username(username)
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
     if not user:
         raise credentials_exception
 
-    return user
+    principal = Principal(id=user.id, username=user.username, email=user.email)
+    await principal_cache.set(principal)
+    return principal
@@ -1,17 +1,93 @@
+import random
+import re
 import sys
+
 from loguru import logger
 
+from core.config import settings
+
+TEXT_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"
+
+# Значения секретных параметров в тексте: ?apikey=..., "password": "...", Authorization: Bearer ...
+_SECRET_PATTERN = re.compile(
+    r"""(?P<key>(?:api_?key|apikey|password|passwd|secret|token|access_token|refresh_token|authorization)"""
+    r"""["']?\s*[=:]\s*["']?(?:bearer\s+)?)(?P<value>[^\s"'&,;}]+)""",
+    re.IGNORECASE,
+)
+_SECRET_EXTRA_KEYS = ("api_key", "apikey", "password", "secret", "token", "authorization")
+REDACTED = "***"
+
+
+def _secret_values() -> tuple:
+    values = (
+        settings.OPENTRIPMAP_API_KEY, settings.FOURSQUARE_API_KEY, settings.SECRET_KEY,
+        settings.PLACE_DB_PASSWORD, settings.REDIS_PASSWORD, settings.REDIS_USER_PASSWORD,
+    )
+    # Короткие значения не ищем: замена совпадений с обычным текстом испортит сообщения
+    return tuple(value for value in values if value and len(value) >= 6)
+
+
+_SECRETS = _secret_values()
+
 
-# Настройка логирования через loguru для удобства
+def redact(text: str) -> str:
+    """Скрыть секреты в строке: значения из настроек и параметры с секретными именами."""
+    for secret in _SECRETS:
+        if secret in text:
+            text = text.replace(secret, REDACTED)
+    return _SECRET_PATTERN.sub(lambda m: m.group("key") + REDACTED, text)
+
+
+def _redact_record(record: dict) -> None:
+    record["message"] = redact(record["message"])
+    extra = record["extra"]
+    for name, value in extra.items():
+        if any(part in name.lower() for part in _SECRET_EXTRA_KEYS):
+            extra[name] = REDACTED
+        elif isinstance(value, str):
+            extra[name] = redact(value)
+
+
+def should_log_request(route: str, status_code: int, duration_ms: float) -> bool:
+    """
+    Логировать ли завершённый запрос: ошибки и медленные запросы — всегда,
+    успешные — с долей LOG_REQUEST_SAMPLE_RATES[route] (или LOG_REQUEST_SAMPLE_RATE).
+    """
+    if status_code >= 400 or duration_ms >= settings.LOG_SLOW_REQUEST_MS:
+        return True
+    rate = settings.LOG_REQUEST_SAMPLE_RATES.get(route, settings.LOG_REQUEST_SAMPLE_RATE)
+    return rate >= 1.0 or random.random() < rate
+
+
+# Настройка логирования через loguru
 def setup_logger():
     # Убираем стандартный обработчик loguru
     logger.remove()
+    # Секреты скрываются до того, как запись попадёт в обработчики
+    logger.configure(patcher=_redact_record)
+
+    # enqueue: запись форматируется и пишется в отдельном потоке, вызов логгера
+    # не ждёт stdout и диска; serialize: одна JSON-строка на запись с полями extra
+    options = dict(
+        level=settings.LOG_LEVEL,
+        format=TEXT_FORMAT,
+        serialize=settings.LOG_JSON,
+        enqueue=True,
+        backtrace=False,
+        diagnose=settings.LOG_DIAGNOSE,
+    )
 
     # Добавляем вывод в терминал
-    logger.add(sys.stdout, level="DEBUG", format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}")
+    logger.add(sys.stdout, **options)
 
     # Логируем в файл
-    logger.add("app.log", level="DEBUG", format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}", rotation="1 MB")
+    if settings.LOG_FILE:
+        logger.add(
+            settings.LOG_FILE,
+            rotation=settings.LOG_FILE_ROTATION,
+            retention=settings.LOG_FILE_RETENTION,
+            **options
+        )
 
 
 # Вызов настройки логирования
@@ -0,0 +1,228 @@
+import functools
+import inspect
+import re
+import time
+import weakref
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from prometheus_client import REGISTRY, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from infrastructure.cache.circuit_breaker import CircuitBreaker
+
+# Границы гистограмм внутренних операций (SQL, репозитории): от 0.5 мс до 5 с
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса по шаблону маршрута",
+    ["method", "route", "status"],
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Время запроса к внешнему API",
+    ["upstream", "outcome"],
+)
+REPOSITORY_LATENCY = Histogram(
+    "repository_call_duration_seconds",
+    "Время вызова метода репозитория",
+    ["repository", "method"],
+    buckets=FAST_BUCKETS,
+)
+SQL_LATENCY = Histogram(
+    "db_statement_duration_seconds",
+    "Время выполнения SQL-выражения по типу и первой таблице",
+    ["statement"],
+    buckets=FAST_BUCKETS,
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+# Дочерние метрики по меткам: на горячем пути только поиск в словаре, без форматирования строк
+_request_children: Dict[Tuple[str, str, int], Any] = {}
+# Метка SQL-выражения вычисляется один раз на скомпилированное выражение из кэша
+# компиляции SQLAlchemy и уходит из словаря вместе с ним
+_compiled_children: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+# Выражения без Compiled (exec_driver_sql, служебные запросы диалекта) — по тексту, с ограничением
+_statement_children: Dict[str, Any] = {}
+_STATEMENT_CHILDREN_MAX = 2000
+_other_statement_child = SQL_LATENCY.labels("other")
+_STATEMENT_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+"?(\w+)', re.IGNORECASE)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    key = (method, route, status)
+    child = _request_children.get(key)
+    if child is None:
+        child = _request_children[key] = REQUEST_LATENCY.labels(method, route, str(status))
+    child.observe(seconds)
+
+
+def upstream_latency(upstream: str) -> Tuple[Any, Any]:
+    """
+    Гистограммы успешных и неудачных запросов к внешнему API (создаются один раз на клиента).
+    """
+    return UPSTREAM_LATENCY.labels(upstream, "ok"), UPSTREAM_LATENCY.labels(upstream, "error")
+
+
+def _statement_label(statement: str) -> str:
+    verb = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "empty"
+    table = _STATEMENT_TABLE.search(statement)
+    return f"{verb} {table.group(1).lower()}" if table else verb
+
+
+def _statement_child(statement: str, context) -> Any:
+    compiled = context.compiled if context is not None else None
+    if compiled is not None:
+        child = _compiled_children.get(compiled)
+        if child is None:
+            child = _compiled_children[compiled] = SQL_LATENCY.labels(_statement_label(statement))
+        return child
+
+    child = _statement_children.get(statement)
+    if child is None:
+        if len(_statement_children) >= _STATEMENT_CHILDREN_MAX:
+            # Переполнение: без разбора текста, одной общей меткой
+            return _other_statement_child
+        child = _statement_children[statement] = SQL_LATENCY.labels(_statement_label(statement))
+    return child
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["statement_started"].pop()
+    _statement_child(statement, context).observe(time.perf_counter() - started)
+
+
+def _handle_error(context) -> None:
+    # Выражение с ошибкой не доходит до after_cursor_execute — убираем его отметку
+    started = context.connection.info.get("statement_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Замерять время SQL-выражений синхронного движка (engine.sync_engine для async).
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _timed(method: Callable, child) -> Callable:
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            child.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def instrumented(cls: type) -> type:
+    """
+    Декоратор класса репозитория: замеряет время его публичных async-методов.
+    """
+    for name, method in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.iscoroutinefunction(method):
+            setattr(cls, name, _timed(method, REPOSITORY_LATENCY.labels(cls.__name__, name)))
+    return cls
+
+
+class StatsCollector:
+    """
+    Метрики из счётчиков stats() компонентов, читаемые только при опросе /metrics.
+
+    Кэши, пулы соединений и фоновые задачи уже ведут свои счётчики, поэтому на
+    горячем пути ничего дополнительно не делается.
+    """
+
+    def __init__(self, state: Any, engines: Iterable[Tuple[str, Engine]], db_usage: Any):
+        self.state = state
+        self.engines = list(engines)
+        self.db_usage = db_usage
+
+    def collect(self) -> Iterator[Any]:
+        yield from self._cache_metrics()
+        yield from self._db_metrics()
+        yield from self._http_metrics()
+
+    def _stats(self, name: str) -> Optional[Dict[str, Any]]:
+        component = getattr(self.state, name, None)
+        return component.stats() if component is not None else None
+
+    def _cache_metrics(self) -> Iterator[Any]:
+        hit_ratio = GaugeMetricFamily("cache_hit_ratio", "Доля попаданий в кэш", labels=["cache"])
+        lookups = CounterMetricFamily("cache_lookups", "Обращения к кэшу", labels=["cache", "result"])
+
+        redis = self._stats("redis")
+        if redis:
+            hit_ratio.add_metric(["local"], redis["local_hit_ratio"])
+            lookups.add_metric(["local", "hit"], redis["local_hits"])
+            lookups.add_metric(["local", "miss"], redis["local_misses"])
+            hit_ratio.add_metric(["redis"], redis["redis_hit_ratio"])
+            lookups.add_metric(["redis", "hit"], redis["redis_hits"])
+            lookups.add_metric(["redis", "miss"], redis["redis_misses"])
+            yield GaugeMetricFamily("redis_breaker_open", "Предохранитель Redis разомкнут",
+                                    value=0 if redis["breaker_state"] == CircuitBreaker.CLOSED else 1)
+        foursquare = self._stats("foursquare_cache")
+        if foursquare:
+            hit_ratio.add_metric(["foursquare"], foursquare["hit_ratio"])
+            lookups.add_metric(["foursquare", "hit"], foursquare["hits"])
+            lookups.add_metric(["foursquare", "stale"], foursquare["stale_hits"])
+            lookups.add_metric(["foursquare", "negative"], foursquare["negative_hits"])
+            lookups.add_metric(["foursquare", "miss"], foursquare["misses"])
+        principal = self._stats("principal_cache")
+        if principal:
+            hit_ratio.add_metric(["principal"], principal["hit_ratio"])
+            lookups.add_metric(["principal", "hit"], principal["hits"])
+            lookups.add_metric(["principal", "miss"], principal["misses"])
+        yield hit_ratio
+        yield lookups
+
+    def _db_metrics(self) -> Iterator[Any]:
+        pool = GaugeMetricFamily("db_pool_connections", "Соединения пула БД", labels=["database", "state"])
+        for database, engine in self.engines:
+            pool.add_metric([database, "size"], engine.pool.size())
+            pool.add_metric([database, "checked_out"], engine.pool.checkedout())
+            pool.add_metric([database, "checked_in"], engine.pool.checkedin())
+            # overflow() отрицателен, пока пул не заполнен до pool_size
+            pool.add_metric([database, "overflow"], max(engine.pool.overflow(), 0))
+        yield pool
+
+        checkouts = CounterMetricFamily("db_route_checkouts", "Соединения БД, взятые запросами маршрута",
+                                        labels=["route"])
+        held = CounterMetricFamily("db_route_held_seconds", "Время занятости соединений БД маршрутом",
+                                   labels=["route"])
+        for route, usage in self.db_usage.stats()["routes"].items():
+            checkouts.add_metric([route], usage["checkouts"])
+            held.add_metric([route], usage["held_ms"] / 1000)
+        yield checkouts
+        yield held
+
+    def _http_metrics(self) -> Iterator[Any]:
+        in_flight = GaugeMetricFamily("upstream_in_flight", "Выполняющиеся запросы к внешнему API",
+                                      labels=["upstream"])
+        over_limit = CounterMetricFamily("upstream_over_limit",
+                                         "Запросы, начатые при параллелизме выше лимита соединений",
+                                         labels=["upstream"])
+        for client in (getattr(self.state, "http_clients", None) or {}).values():
+            stats = client.stats()
+            in_flight.add_metric([client.name], stats["in_flight"])
+            over_limit.add_metric([client.name], stats["over_limit_total"])
+        yield in_flight
+        yield over_limit
+
+    def register(self) -> None:
+        REGISTRY.register(self)
+
+    def unregister(self) -> None:
+        REGISTRY.unregister(self)
@@ -0,0 +1,177 @@
+from typing import Any, Dict
+
+from httpx import Timeout
+
+from core.config import settings
+from domain.repositories import HotelRepository
+from domain.repositories.hotel_repository import POPULAR_HOTEL_QUERIES_KEY
+from domain.services.cache_warmer import CacheWarmer
+from infrastructure.cache.codec import Codec
+from infrastructure.cache.foursquare_cache import FoursquareSearchCache
+from infrastructure.cache.geocode_cache import ReverseGeocodeCache
+from infrastructure.cache.popularity_counter import PopularityCounter
+from infrastructure.cache.redis_service import RedisService
+from infrastructure.cache.single_flight import SingleFlight
+from infrastructure.database.base import async_session_maker
+from infrastructure.external import UpstreamHttpClient, OpenTripMapClient, NominatimClient, FoursquareClient
+from infrastructure.external.foursquare_client import PRODUCTION_TIMEOUTS
+from infrastructure.queue import MemoryTripQueue, RedisStreamTripQueue
+
+
+def create_redis() -> RedisService:
+    """
+    Клиент Redis с локальным кэшем, предохранителем и кодеком из настроек.
+    """
+    return RedisService(
+        settings.REDIS_URL,
+        local_maxsize=settings.REDIS_LOCAL_CACHE_MAXSIZE,
+        local_ttl=settings.REDIS_LOCAL_CACHE_TTL,
+        invalidation_channel=settings.REDIS_INVALIDATION_CHANNEL,
+        breaker_failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+        breaker_reset_timeout=settings.REDIS_BREAKER_RESET_TIMEOUT,
+        codec=Codec(
+            serializer=settings.REDIS_CODEC_SERIALIZER,
+            compression=settings.REDIS_CODEC_COMPRESSION,
+            compress_threshold=settings.REDIS_CODEC_COMPRESS_THRESHOLD
+        )
+    )
+
+
+def create_http_clients() -> Dict[str, UpstreamHttpClient]:
+    """
+    Создать по одному долгоживущему пулу соединений на каждый внешний API.
+    """
+    timeout = Timeout(**PRODUCTION_TIMEOUTS)
+    return {
+        "foursquare": UpstreamHttpClient(
+            "foursquare",
+            max_connections=settings.FOURSQUARE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.FOURSQUARE_MAX_KEEPALIVE,
+            timeout=timeout,
+            http2=settings.HTTP2_ENABLED,
+        ),
+        "opentripmap": UpstreamHttpClient(
+            "opentripmap",
+            max_connections=settings.OPENTRIPMAP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENTRIPMAP_MAX_KEEPALIVE,
+            timeout=timeout,
+            http2=settings.HTTP2_ENABLED,
+        ),
+        "nominatim": UpstreamHttpClient(
+            "nominatim",
+            max_connections=settings.NOMINATIM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.NOMINATIM_MAX_KEEPALIVE,
+            timeout=timeout,
+            http2=settings.HTTP2_ENABLED,
+        ),
+    }
+
+
+def create_single_flights(redis: RedisService) -> Dict[str, SingleFlight]:
+    """
+    Объединители одинаковых запросов для каждого внешнего API.
+    """
+    return {
+        name: SingleFlight(
+            name,
+            redis=redis,
+            lock_ttl=settings.SINGLE_FLIGHT_LOCK_TTL,
+            result_ttl=settings.SINGLE_FLIGHT_RESULT_TTL
+        )
+        for name in ("foursquare", "opentripmap", "geocode")
+    }
+
+
+def create_upstream_services(
+        redis: RedisService,
+        http_clients: Dict[str, UpstreamHttpClient],
+        single_flights: Dict[str, SingleFlight]
+) -> Dict[str, Any]:
+    """
+    Клиенты внешних API и кэши поверх них.
+
+    :return: Словарь, ключи которого совпадают с атрибутами app.state.
+    """
+    foursquare_client = FoursquareClient(
+        http=http_clients["foursquare"],
+        api_key=settings.FOURSQUARE_API_KEY,
+        base_url=settings.FOURSQUARE_URL,
+        single_flight=single_flights["foursquare"]
+    )
+    nominatim_client = NominatimClient(
+        base_url=settings.NOMINATIM_URL,
+        http=http_clients["nominatim"],
+        requests_per_second=settings.NOMINATIM_REQUESTS_PER_SECOND
+    )
+    return {
+        "foursquare_client": foursquare_client,
+        "foursquare_cache": FoursquareSearchCache(
+            client=foursquare_client,
+            redis=redis,
+            precision=settings.FOURSQUARE_CACHE_PRECISION,
+            ttl=settings.FOURSQUARE_CACHE_TTL,
+            stale_ttl=settings.FOURSQUARE_CACHE_STALE_TTL,
+            negative_ttl=settings.FOURSQUARE_CACHE_NEGATIVE_TTL
+        ),
+        "opentripmap_client": OpenTripMapClient(
+            api_key=settings.OPENTRIPMAP_API_KEY,
+            base_url=settings.OPENTRIPMAP_URL,
+            http=http_clients["opentripmap"],
+            single_flight=single_flights["opentripmap"]
+        ),
+        "nominatim_client": nominatim_client,
+        "reverse_geocoder": ReverseGeocodeCache(
+            client=nominatim_client,
+            redis=redis,
+            precision=settings.GEOCODE_CACHE_PRECISION,
+            ttl=settings.GEOCODE_CACHE_TTL,
+            single_flight=single_flights["geocode"]
+        ),
+    }
+
+
+def create_hotel_popularity(redis: RedisService) -> PopularityCounter:
+    """
+    Счётчик популярности запросов отелей, по которому прогреваются кэши.
+    """
+    return PopularityCounter(
+        redis,
+        POPULAR_HOTEL_QUERIES_KEY,
+        keep=settings.HOTEL_POPULARITY_KEEP,
+        ttl=settings.HOTEL_POPULARITY_TTL,
+        flush_interval=settings.HOTEL_POPULARITY_FLUSH_INTERVAL
+    )
+
+
+def create_trip_queue(redis: RedisService):
+    """
+    Очередь событий поездок: в памяти процесса или в Redis Streams.
+    """
+    if settings.TRIP_QUEUE_BACKEND == "redis":
+        return RedisStreamTripQueue(
+            redis,
+            maxlen=settings.TRIP_QUEUE_MAXSIZE,
+            max_attempts=settings.TRIP_QUEUE_MAX_ATTEMPTS,
+            claim_idle=settings.TRIP_QUEUE_CLAIM_IDLE
+        )
+    return MemoryTripQueue(maxsize=settings.TRIP_QUEUE_MAXSIZE, max_attempts=settings.TRIP_QUEUE_MAX_ATTEMPTS)
+
+
+def create_cache_warmer(redis: RedisService, services: Dict[str, Any]) -> CacheWarmer:
+    """
+    Прогрев кэшей популярных направлений с параметрами из настроек.
+    """
+    return CacheWarmer(
+        session_maker=async_session_maker,
+        redis=redis,
+        hotel_repository=HotelRepository(redis=redis, opentripmap_client=services["opentripmap_client"]),
+        foursquare_cache=services["foursquare_cache"],
+        geocoder=services["reverse_geocoder"],
+        interval=settings.CACHE_WARMER_INTERVAL,
+        top_tiles=settings.CACHE_WARMER_TOP_TILES,
+        top_hotel_queries=settings.CACHE_WARMER_TOP_HOTEL_QUERIES,
+        history_days=settings.CACHE_WARMER_HISTORY_DAYS,
+        tile_precision=settings.FOURSQUARE_CACHE_PRECISION,
+        opentripmap_rps=settings.CACHE_WARMER_OPENTRIPMAP_RPS,
+        foursquare_rps=settings.CACHE_WARMER_FOURSQUARE_RPS
+    )
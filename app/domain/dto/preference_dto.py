@@ -0,0 +1,66 @@
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from utils.bloom import BloomFilter
+
+
+@dataclass
+class UserPreferences:
+    """
+    DTO профиля предпочтений пользователя.
+
+    Attributes:
+        user_id: ID пользователя.
+        category_weights: Вес категорий, понравившихся пользователю.
+        rating_count: Количество оценок в истории.
+        rating_sum: Сумма оценок в истории.
+        rating_min: Минимальная оценка в истории.
+        visited: Фильтр Блума мест из истории (исключаются из рекомендаций).
+        seen: Фильтр Блума мест из посещений (уже показанные пользователю).
+    """
+    user_id: int
+    category_weights: Dict[str, float] = field(default_factory=dict)
+    rating_count: int = 0
+    rating_sum: float = 0.0
+    rating_min: Optional[float] = None
+    visited: BloomFilter = field(default_factory=BloomFilter)
+    seen: BloomFilter = field(default_factory=BloomFilter)
+
+    @property
+    def liked_categories(self) -> List[str]:
+        """Понравившиеся категории в порядке убывания веса."""
+        return [
+            category
+            for category, weight in sorted(self.category_weights.items(), key=lambda kv: kv[1], reverse=True)
+            if weight > 0
+        ]
+
+    @property
+    def rating_mean(self) -> Optional[float]:
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+    def to_cache(self) -> str:
+        return json.dumps({
+            "user_id": self.user_id,
+            "category_weights": self.category_weights,
+            "rating_count": self.rating_count,
+            "rating_sum": self.rating_sum,
+            "rating_min": self.rating_min,
+            "visited": base64.b64encode(self.visited.to_bytes()).decode(),
+            "seen": base64.b64encode(self.seen.to_bytes()).decode(),
+        })
+
+    @classmethod
+    def from_cache(cls, raw: str) -> "UserPreferences":
+        data = json.loads(raw)
+        return cls(
+            user_id=data["user_id"],
+            category_weights=data["category_weights"],
+            rating_count=data["rating_count"],
+            rating_sum=data["rating_sum"],
+            rating_min=data["rating_min"],
+            visited=BloomFilter(base64.b64decode(data["visited"])),
+            seen=BloomFilter(base64.b64decode(data["seen"])),
+        )
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Авторизованный пользователь — то, что нужно маршрутам, без ORM-объекта и сессии БД.
+
+    Attributes:
+        id: Идентификатор пользователя.
+        username: Имя пользователя (subject JWT).
+        email: Адрес электронной почты.
+    """
+    id: int
+    username: str
+    email: str
@@ -3,3 +3,6 @@ from .hotel_repository import HotelRepository
 from .trip_repository import TripRepository
 from .user_history_repository import UserHistoryRepository
 from .review_repository import ReviewRepository
+from .user_preference_repository import UserPreferenceRepository
+from .place_repository import PlaceRepository
+from .place_review_stats_repository import PlaceReviewStatsRepository
@@ -1,33 +1,55 @@
 import hashlib
 import json
-from typing import List
+from typing import List, Optional
 
 from loguru import logger
 from aioredis.exceptions import ConnectionError
 
 from domain.dto.hotel_dto import Hotel
 from api.schemas.hotel import HotelSearchRequest
+from infrastructure.cache.popularity_counter import PopularityCounter
 from infrastructure.cache.redis_service import RedisService
 from infrastructure.external.opentripmap_client import OpenTripMapClient
+from infrastructure.external.rate_limiter import AsyncRateLimiter
+from core.metrics import instrumented
 
+HOTEL_CACHE_TTL = 300
+# Счётчик запросов отелей для прогрева кэша (отсортированное множество)
+POPULAR_HOTEL_QUERIES_KEY = "popular:hotels"
 
+
+@instrumented
 class HotelRepository:
     def __init__(
             self,
             redis: RedisService,
-            opentripmap_client: OpenTripMapClient
+            opentripmap_client: OpenTripMapClient,
+            popularity: Optional[PopularityCounter] = None
     ):
         self.redis = redis
         self.opentripmap_client = opentripmap_client
+        self.popularity = popularity
 
     def _build_cache_key(self, params: dict) -> str:
         """
         Генерация кэш-ключа на основе параметров запроса
         """
         raw = json.dumps(params, sort_keys=True)
-        return f"hotel:{hashlib.md5(raw.encode()).hexdigest()}"
+        # v2: вместо сырого ответа OpenTripMap хранятся только поля Hotel
+        return f"hotel:v2:{hashlib.md5(raw.encode()).hexdigest()}"
 
-    async def search_hotels(self, query: HotelSearchRequest) -> List[Hotel]:
+    @staticmethod
+    def _dump_hotels(hotels: List[Hotel]) -> List[list]:
+        """
+        Проекция отелей для кэша: только поля Hotel, строкой значений без имён полей.
+        """
+        return [[h.name, h.dist, h.rate, h.lat, h.lon] for h in hotels]
+
+    @staticmethod
+    def _build_hotels(rows: List[list]) -> List[Hotel]:
+        return [Hotel(*row) for row in rows]
+
+    def _build_params(self, query: HotelSearchRequest) -> dict:
         params = {
             "name": query.name,
             "radius": query.radius,
@@ -41,27 +63,64 @@ class HotelRepository:
 
         if query.sort_by:
             params["sort_by"] = query.sort_by
+        return params
+
+    async def _fetch_and_cache(self, params: dict, cache_key: str) -> List[Hotel]:
+        data = await self.opentripmap_client.search_hotels(params)
+        hotels = self.opentripmap_client.parse_hotels(data)
+
+        try:
+            await self.redis.set_object(cache_key, hotels, dump=self._dump_hotels, ttl=HOTEL_CACHE_TTL)
+        except ConnectionError as e:
+            logger.warning(f"Redis недоступен при сохранении: {e}")
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении ключа {cache_key} в Redis: {e}")
+        return hotels
 
+    async def refresh_hotels(
+            self,
+            query: HotelSearchRequest,
+            ahead: int,
+            rate_limiter: Optional[AsyncRateLimiter] = None
+    ) -> bool:
+        """
+        Обновить кэш запроса заранее, если он истекает быстрее чем через ahead секунд.
+
+        :param rate_limiter: Ограничение частоты запросов к OpenTripMap.
+        :return: True, если был запрос к OpenTripMap.
+        """
+        params = self._build_params(query)
         cache_key = self._build_cache_key(params)
-        data = None
 
-        # Попытка получить данные из кэша Redis
+        ttl = await self.redis.ttl(cache_key)
+        if ttl is None or ttl > ahead:
+            # Redis недоступен или кэш ещё свежий
+            return False
+
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        await self._fetch_and_cache(params, cache_key)
+        return True
+
+    async def search_hotels(self, query: HotelSearchRequest) -> List[Hotel]:
+        params = self._build_params(query)
+        cache_key = self._build_cache_key(params)
+        hotels = None
+
+        # Учитываем популярность запроса для прогрева кэша: счёт копится в процессе
+        if self.popularity is not None:
+            self.popularity.record(query.model_dump_json())
+
+        # Попытка получить уже разобранные отели из кэша процесса или Redis
         try:
-            cached = await self.redis.get(cache_key)
-            if cached:
-                logger.info(f"Кэш найден по ключу: {cache_key}")
-                data = json.loads(cached)
+            hotels = await self.redis.get_object(cache_key, build=self._build_hotels)
+            if hotels is not None:
+                logger.debug("Кэш найден по ключу: {}", cache_key)
             else:
                 logger.info("Запрос к OpenTripMap API...")
-                logger.debug(f"Параметры запроса: {params}")
-                data = await self.opentripmap_client.search_hotels(params)
-
-                try:
-                    await self.redis.set(cache_key, json.dumps(data), ttl=300)
-                except ConnectionError as e:
-                    logger.warning(f"Redis недоступен при сохранении: {e}")
-                except Exception as e:
-                    logger.error(f"Ошибка при сохранении ключа {cache_key} в Redis: {e}")
+                # apikey в лог не попадает
+                logger.debug("Параметры запроса: {}", {k: v for k, v in params.items() if k != "apikey"})
+                hotels = await self._fetch_and_cache(params, cache_key)
         except ConnectionError as e:
             logger.warning(f"Redis недоступен при получении: {e}")
         except Exception as e:
@@ -69,8 +128,11 @@ class HotelRepository:
             # Возвращаем пустой список в случае ошибки
             return []
 
-        # Преобразуем данные в список объектов Hotel
-        hotels = self.opentripmap_client.parse_hotels(data)
+        if hotels is None:
+            return []
+
+        # Копия списка: закэшированный в процессе список общий для всех запросов
+        hotels = list(hotels)
 
         # Сортируем по выбранному параметру
         if query.sort_by == "distance":
@@ -0,0 +1,133 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import String, Numeric, and_, column, func, literal, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import aliased, joinedload
+
+from infrastructure.database.models import Place, Rating
+from utils.geohash import encode as geohash_encode
+from utils.utils import nearby_places_filter
+from core.metrics import instrumented
+
+
+@instrumented
+class PlaceRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_candidates(
+            self,
+            latitude: float,
+            longitude: float,
+            radius: int,
+            categories: Sequence[str],
+            limit: Optional[int] = None
+    ) -> List[Tuple[Place, Optional[float], float]]:
+        """
+        Места нескольких категорий в радиусе от точки вместе с рейтингом Foursquare.
+
+        :return: Список (место, рейтинг или None, расстояние в метрах) от ближних к дальним;
+            агрегаты отзывов пользователей загружены в Place.review_stats.
+        """
+        if not categories:
+            return []
+
+        distance, conditions = nearby_places_filter(latitude, longitude, radius)
+        conditions.append(Place.category.in_(categories))
+
+        rating = (
+            select(func.max(Rating.rating))
+            .where(Rating.place_id == Place.id, Rating.source == "Foursquare")
+            .scalar_subquery()
+        )
+        stmt = (
+            select(Place, rating.label("rating"), distance.label("distance"))
+            .options(joinedload(Place.review_stats))
+            .where(and_(*conditions))
+            .order_by(distance)
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        result = await self.db.execute(stmt)
+        return [
+            (place, float(place_rating) if place_rating is not None else None, place_distance)
+            for place, place_rating, place_distance in result.all()
+        ]
+
+    async def save_external_places(self, places: List[Dict[str, Any]], category: str) -> List[Place]:
+        """
+        Сохранить места из внешнего API одним запросом без дублей.
+
+        INSERT … ON CONFLICT (external_id) DO UPDATE обновляет уже известные
+        места, а рейтинги Foursquare (ключ "rating" в данных места) вставляются
+        или обновляются в том же запросе через CTE. Уникальные индексы на
+        places.external_id и ratings (place_id, source) делают это безопасным
+        при одновременных поисках по одному району. Категория уже известного
+        места не меняется. Фиксация транзакции — на вызывающей стороне.
+
+        :param places: Разобранные места (parse_place_item).
+        :param category: Категория, в которой искались места.
+        :return: Сохранённые места, без повторов.
+        """
+        rows: Dict[str, Dict[str, Any]] = {}
+        ratings: Dict[str, float] = {}
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        for place_data in places:
+            ext_id = place_data["external_id"]
+            # Одна строка на место: ON CONFLICT не может обновить строку дважды за запрос
+            if ext_id in rows:
+                continue
+            rows[ext_id] = {
+                "external_id": ext_id,
+                "name": place_data["name"],
+                "latitude": place_data["latitude"],
+                "longitude": place_data["longitude"],
+                "address": place_data["address"],
+                "category": category,
+                "geohash": geohash_encode(place_data["latitude"], place_data["longitude"]),
+                "created_at": now,
+                "updated_at": now,
+            }
+            if place_data.get("rating") is not None:
+                ratings[ext_id] = place_data["rating"]
+
+        if not rows:
+            return []
+
+        upsert = insert(Place).values(list(rows.values()))
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[Place.external_id],
+            set_={
+                "name": upsert.excluded.name,
+                "latitude": upsert.excluded.latitude,
+                "longitude": upsert.excluded.longitude,
+                "address": upsert.excluded.address,
+                "geohash": upsert.excluded.geohash,
+                "updated_at": now,
+            }
+        )
+        saved = upsert.returning(*Place.__table__.c).cte("saved_places")
+        stmt = select(aliased(Place, saved))
+
+        if ratings:
+            incoming = values(
+                column("external_id", String), column("rating", Numeric(3, 1)), name="incoming_ratings"
+            ).data(list(ratings.items()))
+            rating_upsert = insert(Rating).from_select(
+                ["place_id", "source", "rating"],
+                select(saved.c.id, literal("Foursquare"), incoming.c.rating)
+                .join(incoming, incoming.c.external_id == saved.c.external_id)
+            )
+            rating_upsert = rating_upsert.on_conflict_do_update(
+                index_elements=[Rating.place_id, Rating.source],
+                set_={"rating": rating_upsert.excluded.rating, "updated_at": now}
+            )
+            stmt = stmt.add_cte(rating_upsert.cte("saved_ratings"))
+
+        result = await self.db.execute(stmt.execution_options(populate_existing=True))
+        return list(result.scalars())
@@ -0,0 +1,65 @@
+from typing import Dict, Optional
+
+from sqlalchemy import Float, case, cast, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure.database.models import PlaceReviewStat
+from infrastructure.database.models.place_review_stat import REVIEW_RATINGS
+from core.metrics import instrumented
+
+
+@instrumented
+class PlaceReviewStatsRepository:
+    """
+    Инкрементальное обновление агрегатов отзывов о месте.
+
+    record_review выполняет один UPDATE (или INSERT … ON CONFLICT DO UPDATE для
+    нового отзыва) с приращениями, поэтому одновременные отзывы об одном месте
+    не теряют обновлений и не требуют предварительной блокировки строки.
+    Фиксация транзакции — на вызывающей стороне, вместе с изменением самого
+    отзыва.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def record_review(self, place_id: int, old_rating: Optional[int], new_rating: Optional[int]) -> None:
+        """
+        Учесть создание (old_rating=None), изменение или удаление (new_rating=None) отзыва.
+        """
+        if old_rating == new_rating:
+            return
+
+        deltas: Dict[str, int] = {
+            "review_count": (new_rating is not None) - (old_rating is not None),
+            "rating_sum": (new_rating or 0) - (old_rating or 0),
+        }
+        if old_rating is not None:
+            deltas[f"rating_{old_rating}"] = -1
+        if new_rating is not None:
+            deltas[f"rating_{new_rating}"] = 1
+
+        table = PlaceReviewStat.__table__
+        count = table.c.review_count + deltas["review_count"]
+        total = table.c.rating_sum + deltas["rating_sum"]
+        changes = {
+            **{column: table.c[column] + delta for column, delta in deltas.items()},
+            "rating_mean": case((count > 0, cast(total, Float) / cast(count, Float)), else_=None),
+            "updated_at": func.now(),
+        }
+
+        if old_rating is not None:
+            # Строка есть у каждого места с отзывами: её создаёт первый отзыв или миграция
+            stmt = update(PlaceReviewStat).where(table.c.place_id == place_id).values(changes)
+        else:
+            stmt = insert(PlaceReviewStat).values(
+                place_id=place_id,
+                rating_mean=float(new_rating),
+                **{column: deltas.get(column, 0) for column in self._counter_columns()}
+            ).on_conflict_do_update(index_elements=[table.c.place_id], set_=changes)
+        await self.session.execute(stmt)
+
+    @staticmethod
+    def _counter_columns():
+        return ["review_count", "rating_sum"] + [f"rating_{rating}" for rating in REVIEW_RATINGS]
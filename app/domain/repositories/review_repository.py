@@ -1,21 +1,81 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, func
+from sqlalchemy import select, delete, func, tuple_
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
 
 from app.api.schemas.review import ReviewCreate
 from app.infrastructure.database.models.user_place_review import UserPlaceReview
-from infrastructure.database.models import User
+from infrastructure.cache.redis_service import RedisService
+from infrastructure.database.models import Place
+from infrastructure.database.session import read_replica
+from domain.dto.principal_dto import Principal
+from .user_preference_repository import UserPreferenceRepository
+from .place_review_stats_repository import PlaceReviewStatsRepository
+from core.metrics import instrumented
+
+# Общее число отзывов: поддерживается при создании и удалении, раз в TTL пересчитывается
+REVIEWS_COUNT_KEY = "reviews:count"
+REVIEWS_COUNT_TTL = 3600
+
+
+def encode_review_cursor(review: UserPlaceReview) -> str:
+    """Курсор страницы — позиция последнего отзыва в порядке (created_at, id)."""
+    raw = json.dumps([review.created_at.isoformat(), review.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
 
 
+def decode_review_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Разобрать курсор страницы.
+
+    Raises:
+        HTTPException: Если курсор повреждён
+    """
+    try:
+        created_at, review_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(review_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор страницы")
+
+
+@instrumented
 class ReviewRepository:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, redis: Optional[RedisService] = None):
         """Инициализация репозитория для работы с отзывами.
 
         Args:
             db: Асинхронная сессия SQLAlchemy для работы с базой данных
+            redis: Кэш профилей предпочтений, сбрасываемый при изменении отзывов
         """
         self.db = db
+        self.redis = redis
+        self.preferences = UserPreferenceRepository(db, redis)
+        self.place_stats = PlaceReviewStatsRepository(db)
+
+    async def _place_category(self, place_id: int) -> Optional[str]:
+        """Категория места, к которому относится отзыв."""
+        place = await self.db.get(Place, place_id)
+        return place.category if place else None
+
+    async def _lock_review(self, *criteria) -> Optional[UserPlaceReview]:
+        """Заблокировать строку отзыва до конца транзакции и прочитать её актуальную версию.
+
+        Одновременное изменение или удаление того же отзыва ждёт фиксации и
+        затем видит новую оценку (или отсутствие строки), поэтому агрегаты
+        места и профиль не получают приращение от устаревшей оценки дважды.
+        populate_existing перечитывает отзыв, уже загруженный в сессию.
+        """
+        result = await self.db.execute(
+            select(UserPlaceReview)
+            .where(*criteria)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
 
     async def create_review(self, review_create: ReviewCreate) -> UserPlaceReview:
         """Создает новый отзыв в базе данных.
@@ -30,42 +90,86 @@ class ReviewRepository:
             HTTPException: При ошибках работы с базой данных
         """
         try:
+            await self.preferences.record_review(
+                review_create.user_id,
+                await self._place_category(review_create.place_id),
+                old_rating=None,
+                new_rating=review_create.rating
+            )
+            await self.place_stats.record_review(review_create.place_id, None, review_create.rating)
             new_review = UserPlaceReview(**review_create.model_dump())
             self.db.add(new_review)
             await self.db.commit()
             await self.db.refresh(new_review)
+            await self.preferences.invalidate(review_create.user_id)
+            await self._change_count(1)
             return new_review
         except SQLAlchemyError as e:
             await self.db.rollback()
             raise HTTPException(status_code=500, detail=f"Ошибка при создании отзыва: {str(e)}")
 
-    async def get_all_reviews(self, limit: int = 100, offset: int = 0) -> list[UserPlaceReview]:
-        """Получает список отзывов с пагинацией.
+    async def get_reviews_page(
+            self,
+            limit: int = 20,
+            cursor: Optional[str] = None
+    ) -> Tuple[List[UserPlaceReview], Optional[str]]:
+        """Получает страницу отзывов, от новых к старым, по курсору.
+
+        Страница выбирается по индексу (created_at, id) условием «после
+        курсора», поэтому стоимость не растёт с номером страницы.
 
         Args:
             limit: Максимальное количество возвращаемых отзывов
-            offset: Количество отзывов для пропуска
+            cursor: Курсор, полученный с предыдущей страницей; None — первая страница
 
         Returns:
-            Список объектов отзывов
+            Список отзывов и курсор следующей страницы (None, если страница последняя)
         """
-        result = await self.db.execute(
-            select(UserPlaceReview)
-            .limit(limit)
-            .offset(offset)
-        )
-        return result.scalars().all()
+        stmt = select(UserPlaceReview)
+        if cursor is not None:
+            stmt = stmt.where(
+                tuple_(UserPlaceReview.created_at, UserPlaceReview.id) < tuple_(*decode_review_cursor(cursor))
+            )
+        stmt = stmt.order_by(UserPlaceReview.created_at.desc(), UserPlaceReview.id.desc()).limit(limit + 1)
+
+        with read_replica(self.db):
+            result = await self.db.execute(stmt)
+        reviews = list(result.scalars().all())
+
+        next_cursor = None
+        if len(reviews) > limit:
+            reviews = reviews[:limit]
+            next_cursor = encode_review_cursor(reviews[-1])
+        return reviews, next_cursor
 
     async def get_reviews_count(self) -> int:
         """Получает общее количество отзывов в базе.
 
+        Значение берётся из Redis; COUNT(*) выполняется только при его
+        отсутствии (первый запрос, истёк TTL, Redis был недоступен).
+
         Returns:
             Общее количество отзывов
         """
-        result = await self.db.execute(select(func.count()).select_from(UserPlaceReview))
-        return result.scalar()
+        if self.redis is not None:
+            cached = await self.redis.get(REVIEWS_COUNT_KEY)
+            if cached is not None:
+                return int(cached)
 
-    async def update_review(self, review_id: int, content: str, rating: int, user: User) -> UserPlaceReview:
+        with read_replica(self.db):
+            result = await self.db.execute(select(func.count()).select_from(UserPlaceReview))
+        count = result.scalar()
+
+        if self.redis is not None:
+            await self.redis.set(REVIEWS_COUNT_KEY, str(count), ttl=REVIEWS_COUNT_TTL)
+        return count
+
+    async def _change_count(self, amount: int) -> None:
+        """Обновляет кэшированное количество отзывов после коммита."""
+        if self.redis is not None:
+            await self.redis.increment_if_exists(REVIEWS_COUNT_KEY, amount)
+
+    async def update_review(self, review_id: int, content: str, rating: int, user: Principal) -> UserPlaceReview:
         """Обновляет существующий отзыв.
 
         Args:
@@ -82,22 +186,27 @@ class ReviewRepository:
             HTTPException: При ошибках работы с базой данных
         """
         try:
-            result = await self.db.execute(
-                select(UserPlaceReview).where(
-                    UserPlaceReview.id == review_id,
-                    UserPlaceReview.user_id == user.id
-                )
+            review = await self._lock_review(
+                UserPlaceReview.id == review_id,
+                UserPlaceReview.user_id == user.id
             )
-            review = result.scalar_one_or_none()
             if not review:
                 raise HTTPException(
                     status_code=404,
                     detail="Отзыв с указанным ID не найден или не принадлежит текущему пользователю."
                 )
 
+            await self.preferences.record_review(
+                user.id,
+                await self._place_category(review.place_id),
+                old_rating=review.rating,
+                new_rating=rating
+            )
+            await self.place_stats.record_review(review.place_id, review.rating, rating)
             review.content = content
             review.rating = rating
             await self.db.commit()
+            await self.preferences.invalidate(user.id)
             return review
 
         except SQLAlchemyError as e:
@@ -114,13 +223,26 @@ class ReviewRepository:
             HTTPException: При ошибках работы с базой данных
         """
         try:
+            review = await self._lock_review(UserPlaceReview.id == review_id)
+            if review is None:
+                return
+
+            await self.preferences.record_review(
+                review.user_id,
+                await self._place_category(review.place_id),
+                old_rating=review.rating,
+                new_rating=None
+            )
+            await self.place_stats.record_review(review.place_id, review.rating, None)
             await self.db.execute(delete(UserPlaceReview).where(UserPlaceReview.id == review_id))
             await self.db.commit()
+            await self.preferences.invalidate(review.user_id)
+            await self._change_count(-1)
         except SQLAlchemyError as e:
             await self.db.rollback()
             raise HTTPException(status_code=500, detail=f"Ошибка при удалении отзыва: {str(e)}")
 
-    async def get_review_by_id(self, review_id: int, user: User) -> UserPlaceReview:
+    async def get_review_by_id(self, review_id: int, user: Principal) -> UserPlaceReview:
         """Получает отзыв по ID с проверкой владельца.
 
         Args:
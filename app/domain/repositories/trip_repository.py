@@ -1,10 +1,17 @@
+from datetime import datetime
+from typing import List
+
 from fastapi import HTTPException
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import insert, func
 from infrastructure.database.models import UserTrip
+from infrastructure.database.session import read_replica
+from core.metrics import instrumented
 
 
+@instrumented
 class TripRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -20,7 +27,53 @@ class TripRepository:
             await self.db.rollback()
             raise HTTPException(status_code=500, detail=f"Ошибка базы данных при сохранении поездки: {str(e)}")
 
-    async def get_user_trips(self, user_id: int):
-        stmt = select(UserTrip).where(UserTrip.user_id == user_id).order_by(UserTrip.created_at.desc())
+    async def save_trips_bulk(self, trips: List[dict]) -> None:
+        """
+        Сохранить пачку поездок одним многострочным INSERT.
+        """
+        if not trips:
+            return
+        try:
+            await self.db.execute(insert(UserTrip).values(trips))
+            await self.db.commit()
+        except SQLAlchemyError:
+            await self.db.rollback()
+            raise
+
+    async def get_popular_tiles(self, precision: int, since: datetime, limit: int) -> List[dict]:
+        """
+        Самые частые районы поиска (ячейки geohash) с категорией с момента since.
+
+        :return: Список словарей tile, category, latitude, longitude (средняя точка поиска), trips.
+        """
+        tile = func.substr(UserTrip.geohash, 1, precision)
+        trips = func.count(UserTrip.id)
+        stmt = (
+            select(
+                tile.label("tile"),
+                UserTrip.category,
+                func.avg(UserTrip.latitude).label("latitude"),
+                func.avg(UserTrip.longitude).label("longitude"),
+                trips.label("trips"),
+            )
+            .where(UserTrip.geohash.isnot(None), UserTrip.created_at >= since)
+            .group_by(tile, UserTrip.category)
+            .order_by(trips.desc())
+            .limit(limit)
+        )
         result = await self.db.execute(stmt)
-        return result.scalars().all()
+        return [dict(row) for row in result.mappings()]
+
+    async def get_user_trips(self, user_id: int):
+        """
+        Поездки пользователя, от новых к старым, строками (id, destination,
+        category, created_at) — без создания ORM-объектов.
+        """
+        stmt = (
+            select(UserTrip.id, UserTrip.destination, UserTrip.category, UserTrip.created_at)
+            .where(UserTrip.user_id == user_id)
+            .order_by(UserTrip.created_at.desc())
+        )
+        with read_replica(self.db):
+            result = await self.db.execute(stmt)
+        return result.all()
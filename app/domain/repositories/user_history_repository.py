@@ -1,14 +1,18 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from infrastructure.database.models import UserPlaceHistory
+from infrastructure.database.session import read_replica
+from core.metrics import instrumented
 
 
+@instrumented
 class UserHistoryRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def get_user_history(self, user_id: int):
-        result = await self.session.execute(
-            select(UserPlaceHistory).where(UserPlaceHistory.user_id == user_id)
-        )
+        with read_replica(self.session):
+            result = await self.session.execute(
+                select(UserPlaceHistory).where(UserPlaceHistory.user_id == user_id)
+            )
         return result.scalars().all()
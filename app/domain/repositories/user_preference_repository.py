@@ -0,0 +1,169 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.dto.preference_dto import UserPreferences
+from infrastructure.cache.redis_service import RedisService
+from infrastructure.database.models import (UserPreferenceProfile, UserPlaceHistory, UserVisit,
+                                            UserPlaceReview, Place)
+from utils.bloom import BloomFilter
+from core.metrics import instrumented
+
+LIKED_HISTORY_RATING = 7  # оценка в истории (0-10), с которой категория считается понравившейся
+LIKED_REVIEW_RATING = 4  # оценка отзыва (1-5), с которой категория считается понравившейся
+PROFILE_CACHE_TTL = 3600
+
+
+@instrumented
+class UserPreferenceRepository:
+    """
+    Профиль предпочтений пользователя: чтение за O(1) и инкрементальное обновление.
+
+    Методы record_* нужно вызывать до добавления самой записи (посещения,
+    отзыва) в сессию: при первом обращении профиль строится из уже сохранённых
+    данных, и новая запись иначе была бы учтена дважды. После commit вызывающий
+    код сбрасывает кэш через invalidate.
+
+    История мест (UserPlaceHistory) через API не пишется, поэтому её доля в
+    профиле берётся только при построении: чтобы учесть новую историю,
+    строку профиля удаляют, и она строится заново при следующем обращении.
+    """
+
+    def __init__(self, session: AsyncSession, redis: Optional[RedisService] = None):
+        self.session = session
+        self.redis = redis
+
+    @staticmethod
+    def _cache_key(user_id: int) -> str:
+        return f"profile:{user_id}"
+
+    async def get_preferences(self, user_id: int) -> UserPreferences:
+        """
+        Получить профиль из Redis, а при промахе — из базы данных.
+        """
+        if self.redis:
+            cached = await self.redis.get(self._cache_key(user_id))
+            if cached:
+                return UserPreferences.from_cache(cached)
+
+        profile = await self.session.get(UserPreferenceProfile, user_id)
+        if profile is None:
+            profile = await self._lock_profile(user_id)
+            await self.session.commit()
+
+        preferences = UserPreferences(
+            user_id=user_id,
+            category_weights=dict(profile.category_weights),
+            rating_count=profile.rating_count,
+            rating_sum=profile.rating_sum,
+            rating_min=profile.rating_min,
+            visited=BloomFilter(profile.visited_filter),
+            seen=BloomFilter(profile.seen_filter),
+        )
+        if self.redis:
+            await self.redis.set(self._cache_key(user_id), preferences.to_cache(), ttl=PROFILE_CACHE_TTL)
+        return preferences
+
+    async def record_visits(self, user_id: int, external_ids: Iterable[str]) -> None:
+        profile = await self._lock_profile(user_id)
+
+        seen = BloomFilter(profile.seen_filter)
+        for external_id in external_ids:
+            seen.add(external_id)
+        profile.seen_filter = seen.to_bytes()
+
+    async def record_review(self, user_id: int, category: Optional[str],
+                            old_rating: Optional[int], new_rating: Optional[int]) -> None:
+        """
+        Учесть создание (old_rating=None), изменение или удаление (new_rating=None) отзыва.
+        """
+        liked_before = old_rating is not None and old_rating >= LIKED_REVIEW_RATING
+        liked_after = new_rating is not None and new_rating >= LIKED_REVIEW_RATING
+        if not category or liked_before == liked_after:
+            return
+
+        profile = await self._lock_profile(user_id)
+        self._add_weight(profile, category, 1 if liked_after else -1)
+
+    async def invalidate(self, user_id: int) -> None:
+        if self.redis:
+            await self.redis.delete(self._cache_key(user_id))
+
+    @staticmethod
+    def _add_weight(profile: UserPreferenceProfile, category: str, delta: float) -> None:
+        weights = dict(profile.category_weights)
+        weights[category] = max(0.0, weights.get(category, 0.0) + delta)
+        # Присваиваем новый dict, чтобы SQLAlchemy увидел изменение JSONB
+        profile.category_weights = weights
+
+    async def _lock_profile(self, user_id: int) -> UserPreferenceProfile:
+        """
+        Заблокировать строку профиля на время транзакции, построив профиль при первом обращении.
+        """
+        # populate_existing: профиль мог быть загружен в сессию до блокировки (get_preferences),
+        # и без перечитывания изменения другой транзакции были бы затёрты старыми значениями
+        stmt = (
+            select(UserPreferenceProfile)
+            .where(UserPreferenceProfile.user_id == user_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        profile = (await self.session.execute(stmt)).scalar_one_or_none()
+        if profile is not None:
+            return profile
+
+        await self.session.execute(
+            insert(UserPreferenceProfile)
+            .values(**await self._build_profile_values(user_id))
+            .on_conflict_do_nothing(index_elements=[UserPreferenceProfile.user_id])
+        )
+        return (await self.session.execute(stmt)).scalar_one()
+
+    async def _build_profile_values(self, user_id: int) -> dict:
+        """
+        Построить профиль из накопленных истории, посещений и отзывов (однократно для пользователя).
+        """
+        weights = {}
+        rating_count, rating_sum, rating_min = 0, 0.0, None
+        visited, seen = BloomFilter(), BloomFilter()
+
+        history = await self.session.stream(
+            select(UserPlaceHistory.place_id, UserPlaceHistory.category, UserPlaceHistory.rating)
+            .where(UserPlaceHistory.user_id == user_id)
+        )
+        async for place_id, category, rating in history:
+            if place_id:
+                visited.add(place_id)
+            if rating:
+                rating_count += 1
+                rating_sum += rating
+                rating_min = rating if rating_min is None else min(rating_min, rating)
+                if category and rating >= LIKED_HISTORY_RATING:
+                    weights[category] = weights.get(category, 0.0) + 1
+
+        visits = await self.session.stream(
+            select(UserVisit.external_id).where(UserVisit.user_id == user_id)
+        )
+        async for (external_id,) in visits:
+            seen.add(external_id)
+
+        reviews = await self.session.stream(
+            select(Place.category)
+            .select_from(UserPlaceReview)
+            .join(Place, Place.id == UserPlaceReview.place_id)
+            .where(UserPlaceReview.user_id == user_id, UserPlaceReview.rating >= LIKED_REVIEW_RATING)
+        )
+        async for (category,) in reviews:
+            weights[category] = weights.get(category, 0.0) + 1
+
+        return {
+            "user_id": user_id,
+            "category_weights": weights,
+            "rating_count": rating_count,
+            "rating_sum": rating_sum,
+            "rating_min": rating_min,
+            "visited_filter": visited.to_bytes(),
+            "seen_filter": seen.to_bytes(),
+        }
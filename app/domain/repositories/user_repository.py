@@ -4,8 +4,10 @@ from sqlalchemy import select
 from passlib.context import CryptContext
 
 from infrastructure.database.models import User
+from core.metrics import instrumented
 
 
+@instrumented
 class UserRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
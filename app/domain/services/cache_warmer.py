@@ -0,0 +1,133 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from loguru import logger
+from pydantic import ValidationError
+
+from api.schemas.hotel import HotelSearchRequest
+from domain.repositories import TripRepository
+from domain.repositories.hotel_repository import HotelRepository, POPULAR_HOTEL_QUERIES_KEY
+from infrastructure.cache.foursquare_cache import FoursquareSearchCache
+from infrastructure.cache.geocode_cache import ReverseGeocodeCache
+from infrastructure.cache.redis_service import RedisService
+from infrastructure.external.foursquare_client import foursquare_category_id
+from infrastructure.external.rate_limiter import AsyncRateLimiter
+
+# Блокировка прогона: при нескольких воркерах кэш прогревает только один
+WARMER_LOCK_KEY = "warmer:lock"
+# Радиус /search по умолчанию — под него прогреваются плитки мест
+PLACE_SEARCH_RADIUS = 1000
+
+
+class CacheWarmer:
+    """
+    Прогрев кэшей для популярных направлений.
+
+    Популярные запросы отелей берутся из счётчика в Redis (PopularityCounter),
+    популярные районы поиска мест — из поездок пользователей (ячейки geohash
+    с категорией).
+    Записи, которые истекут до следующего прогона, обновляются заранее, а
+    запросы к OpenTripMap и Foursquare идут не чаще заданной частоты, чтобы
+    прогрев не выбирал квоту и не мешал пользовательским запросам.
+    """
+
+    def __init__(
+            self,
+            session_maker,
+            redis: RedisService,
+            hotel_repository: HotelRepository,
+            foursquare_cache: FoursquareSearchCache,
+            geocoder: ReverseGeocodeCache,
+            interval: int = 240,
+            top_tiles: int = 20,
+            top_hotel_queries: int = 50,
+            history_days: int = 7,
+            tile_precision: int = 6,
+            opentripmap_rps: float = 2.0,
+            foursquare_rps: float = 2.0,
+    ):
+        self.session_maker = session_maker
+        self.redis = redis
+        self.hotel_repository = hotel_repository
+        self.foursquare_cache = foursquare_cache
+        self.geocoder = geocoder
+        self.interval = interval
+        self.top_tiles = top_tiles
+        self.top_hotel_queries = top_hotel_queries
+        self.history_days = history_days
+        self.tile_precision = tile_precision
+        self.opentripmap_limiter = AsyncRateLimiter(opentripmap_rps)
+        self.foursquare_limiter = AsyncRateLimiter(foursquare_rps)
+        self._worker: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> Dict[str, int]:
+        """
+        Один прогон прогрева.
+
+        :return: Сколько записей каждого кэша было обновлено.
+        """
+        stats = {"hotels": 0, "places": 0, "geocode": 0, "errors": 0}
+        # Обновляем всё, что истечёт до следующего прогона
+        ahead = self.interval
+
+        for member, _ in await self.redis.top_scores(POPULAR_HOTEL_QUERIES_KEY, self.top_hotel_queries):
+            try:
+                query = HotelSearchRequest.model_validate_json(member)
+                if await self.hotel_repository.refresh_hotels(query, ahead, self.opentripmap_limiter):
+                    stats["hotels"] += 1
+            except ValidationError:
+                continue
+            except Exception as e:
+                stats["errors"] += 1
+                logger.warning(f"Прогрев отелей не удался: {e!r}")
+
+        since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=self.history_days)
+        async with self.session_maker() as session:
+            tiles = await TripRepository(session).get_popular_tiles(self.tile_precision, since, self.top_tiles)
+
+        geocoded = set()
+        for tile in tiles:
+            try:
+                category_id = foursquare_category_id(tile["category"]) if tile["category"] else None
+                if category_id and await self.foursquare_cache.warm(
+                        category_id, tile["latitude"], tile["longitude"], PLACE_SEARCH_RADIUS,
+                        ahead, rate_limiter=self.foursquare_limiter
+                ):
+                    stats["places"] += 1
+
+                if tile["tile"] not in geocoded:
+                    # Nominatim ограничен в самом клиенте; из кэша ответ приходит без запроса
+                    geocoded.add(tile["tile"])
+                    await self.geocoder.reverse_geocode(tile["latitude"], tile["longitude"])
+                    stats["geocode"] += 1
+            except Exception as e:
+                stats["errors"] += 1
+                logger.warning(f"Прогрев района {tile['tile']} не удался: {e!r}")
+
+        return stats
+
+    def start(self) -> None:
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Блокировка живёт весь интервал, поэтому за интервал прогон только один
+                if await self.redis.set_if_absent(WARMER_LOCK_KEY, "1", self.interval):
+                    stats = await self.run_once()
+                    logger.info(f"Прогрев кэша завершён: {stats}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка прогрева кэша: {e!r}")
+            await asyncio.sleep(self.interval)
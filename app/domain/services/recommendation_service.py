@@ -1,68 +1,254 @@
-from domain.repositories import UserHistoryRepository
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from core.config import settings
+from domain.dto.preference_dto import UserPreferences
+from domain.repositories import PlaceRepository, UserPreferenceRepository
 from domain.services.visit_service import VisitService
-from api.schemas import VisitCreate
-from infrastructure.external.foursquare_client import search_places, parse_place_item, foursquare_category_id
+from api.schemas import VisitCreate, PlaceReviewStatsSchema
+from infrastructure.cache.redis_service import RedisService
+from infrastructure.database.models import Place
+from infrastructure.cache.foursquare_cache import FoursquareSearchCache
+from infrastructure.external.foursquare_client import parse_place_item, foursquare_category_id
+from utils.distance import haversine_distances
+
+# Ограничение параллельных запросов к Foursquare на одну рекомендацию
+MAX_CONCURRENT_CATEGORY_REQUESTS = 4
+# Таймаут на поиск по одной категории, после него категория пропускается
+CATEGORY_TIMEOUT_SECONDS = 5.0
+# Сколько ближайших мест из базы рассматривается при ранжировании
+LOCAL_CANDIDATES_LIMIT = 200
+RECOMMENDATIONS_LIMIT = 10
+
+# Веса составляющих оценки места (в сумме 1)
+RATING_WEIGHT = 0.4
+DISTANCE_WEIGHT = 0.25
+AFFINITY_WEIGHT = 0.2
+NOVELTY_WEIGHT = 0.15
+FOURSQUARE_MAX_RATING = 10.0
+# Место без рейтинга считается средним
+UNKNOWN_RATING_SCORE = 0.5
+# Оценки отзывов пользователей (1-5) и сколько отзывов весят столько же, сколько рейтинг Foursquare
+USER_RATING_MIN = 1.0
+USER_RATING_MAX = 5.0
+USER_REVIEWS_PRIOR = 5
+
+
+def score_place(
+        rating: Optional[float],
+        distance: float,
+        radius: int,
+        affinity: float,
+        seen: bool,
+        user_rating: Optional[float] = None,
+        review_count: int = 0
+) -> float:
+    """
+    Оценка места для ранжирования рекомендаций, от 0 до 1.
+
+    :param rating: Рейтинг Foursquare (0-10) или None.
+    :param distance: Расстояние до точки поиска в метрах.
+    :param radius: Радиус поиска в метрах.
+    :param affinity: Близость категории к предпочтениям пользователя (0-1).
+    :param seen: Место уже показывалось пользователю.
+    :param user_rating: Средняя оценка в отзывах пользователей (1-5) или None.
+    :param review_count: Количество отзывов пользователей; чем их больше, тем сильнее
+        средняя оценка вытесняет рейтинг Foursquare.
+    """
+    rating_score = min(rating / FOURSQUARE_MAX_RATING, 1.0) if rating is not None else UNKNOWN_RATING_SCORE
+    if user_rating is not None and review_count > 0:
+        user_score = (user_rating - USER_RATING_MIN) / (USER_RATING_MAX - USER_RATING_MIN)
+        user_weight = review_count / (review_count + USER_REVIEWS_PRIOR)
+        rating_score = (1 - user_weight) * rating_score + user_weight * user_score
+    distance_score = max(0.0, 1.0 - distance / radius) if radius > 0 else 0.0
+    novelty_score = 0.0 if seen else 1.0
+    return (
+            RATING_WEIGHT * rating_score
+            + DISTANCE_WEIGHT * distance_score
+            + AFFINITY_WEIGHT * affinity
+            + NOVELTY_WEIGHT * novelty_score
+    )
 
 
 class RecommendationEngine:
-    def __init__(self, session):
+    def __init__(
+            self,
+            session,
+            foursquare_cache: FoursquareSearchCache = None,
+            redis: Optional[RedisService] = None
+    ):
         self.session = session
+        self.foursquare_cache = foursquare_cache
+        self.redis = redis
 
     async def recommend(self, user_id: int, latitude: float, longitude: float, radius: int = 2000):
-        repo = UserHistoryRepository(self.session)
-        history = await repo.get_user_history(user_id)
+        """
+        Рекомендации мест рядом с точкой.
+
+        Кандидаты берутся из таблицы places по гео-индексу и ранжируются по рейтингу,
+        расстоянию, близости категории к предпочтениям и новизне. Foursquare
+        запрашивается, только если подходящих мест в базе меньше
+        RECOMMENDATION_MIN_LOCAL_COVERAGE; найденные места сохраняются в базу.
+        """
+        # Предрассчитанный профиль вместо загрузки всей истории пользователя
+        preferences = await UserPreferenceRepository(self.session, self.redis).get_preferences(user_id)
+
+        # Категории в профиле уже без повторов, по убыванию веса
+        categories = preferences.liked_categories or ["Arts & Entertainment", "Restaurants"]
+        categories = [c for c in categories if foursquare_category_id(c)]
+
+        place_repository = PlaceRepository(self.session)
+        candidates: Dict[str, Dict[str, Any]] = {}
+
+        local_places = await place_repository.get_candidates(
+            latitude, longitude, radius, categories, LOCAL_CANDIDATES_LIMIT
+        )
+        for place, rating, distance in local_places:
+            self._add_candidate(candidates, preferences, place, rating, distance, radius)
+
+        if len(candidates) < settings.RECOMMENDATION_MIN_LOCAL_COVERAGE and self.foursquare_cache is not None:
+            logger.info(
+                f"В базе {len(candidates)} подходящих мест в радиусе {radius} м, "
+                f"дополняем рекомендации из Foursquare"
+            )
+            await self._fetch_upstream(
+                candidates, preferences, place_repository, categories, latitude, longitude, radius
+            )
+
+        recommendations = sorted(candidates.values(), key=lambda x: x["score"], reverse=True)
+        recommendations = recommendations[:RECOMMENDATIONS_LIMIT]
 
-        visited_place_ids = {h.place_id for h in history}
-        liked_categories = [h.category for h in history if h.rating and h.rating >= 7]
-        min_rating = min((h.rating for h in history if h.rating), default=0)
+        # Сохраняем показанные рекомендации как визиты одним запросом
+        new_visits = [
+            VisitCreate(
+                user_id=user_id,
+                external_id=r["external_id"],
+                name=r["name"],
+                latitude=r["latitude"],
+                longitude=r["longitude"],
+                address=r["address"],
+                category=r["category"]
+            )
+            for r in recommendations
+        ]
+        visit_service = VisitService(self.session, self.redis)
+        await visit_service.create_visits_bulk(new_visits)
+
+        return recommendations
 
-        categories = liked_categories or ["Arts & Entertainment", "Restaurants"]
+    async def _fetch_upstream(
+            self,
+            candidates: Dict[str, Dict[str, Any]],
+            preferences: UserPreferences,
+            place_repository: PlaceRepository,
+            categories: List[str],
+            latitude: float,
+            longitude: float,
+            radius: int
+    ) -> None:
+        """
+        Дополнить кандидатов местами из Foursquare и сохранить их в places/ratings.
+        """
+        # Кэшированные плитки всех категорий — одним запросом к Redis
+        await self.foursquare_cache.prefetch(
+            [foursquare_category_id(c) for c in categories], latitude, longitude, radius, sort="RELEVANCE"
+        )
 
-        recommendations = []
-        new_visits = []
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_CATEGORY_REQUESTS)
+        responses = await asyncio.gather(
+            *(self._search_category(semaphore, category, latitude, longitude, radius) for category in categories),
+            return_exceptions=True
+        )
 
-        for category in categories:
-            category_id = foursquare_category_id(category)
-            if not category_id:
+        failed = [r for r in responses if isinstance(r, BaseException)]
+        if failed and len(failed) == len(responses) and not candidates:
+            raise failed[0]
+
+        for category, results in zip(categories, responses):
+            if isinstance(results, BaseException):
+                logger.warning(f"Категория {category} пропущена в рекомендациях: {results!r}")
+                continue
+
+            parsed_places = [p for p in (parse_place_item(item, None) for item in results) if p]
+            if not parsed_places:
                 continue
 
-            params = {
-                "ll": f"{latitude},{longitude}",
-                "radius": radius,
-                "categories": category_id,
-                "sort": "RELEVANCE",
-                "limit": 20
-            }
-
-            response = await search_places(params)
-            results = response.get("results", [])
-
-            for item in results:
-                parsed = parse_place_item(item, min_rating)
-                if parsed and parsed["external_id"] not in visited_place_ids:
-                    parsed["category"] = category
-                    parsed["rating"] = item.get("rating", 0)
-                    recommendations.append(parsed)
-
-                    # Подготовим к сохранению в Visit
-                    visit = VisitCreate(
-                        user_id=user_id,
-                        external_id=parsed["external_id"],
-                        name=parsed["name"],
-                        latitude=parsed["latitude"],
-                        longitude=parsed["longitude"],
-                        address=parsed["address"],
-                        category=parsed.get("category")
+            ratings = {p["external_id"]: p["rating"] for p in parsed_places}
+            places = await place_repository.save_external_places(parsed_places, category)
+            distances = haversine_distances(
+                latitude, longitude,
+                [p.latitude for p in places],
+                [p.longitude for p in places]
+            )
+            for place, distance in zip(places, distances):
+                if distance <= radius:
+                    self._add_candidate(
+                        candidates, preferences, place, ratings.get(place.external_id), float(distance), radius
                     )
-                    new_visits.append(visit)
 
-        # Сохраняем новые визиты в visit_service
-        visit_service = VisitService(self.session)
-        for visit in new_visits:
-            await visit_service.create_visit(visit)
+        await self.session.commit()
+
+    async def _search_category(
+            self,
+            semaphore: asyncio.Semaphore,
+            category: str,
+            latitude: float,
+            longitude: float,
+            radius: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Поиск мест одной категории с ограничением параллелизма и таймаутом.
+        """
+        async with semaphore:
+            response = await asyncio.wait_for(
+                self.foursquare_cache.search(
+                    foursquare_category_id(category), latitude, longitude, radius, sort="RELEVANCE"
+                ),
+                timeout=CATEGORY_TIMEOUT_SECONDS
+            )
+        return response.get("results", [])
+
+    @staticmethod
+    def _add_candidate(
+            candidates: Dict[str, Dict[str, Any]],
+            preferences: UserPreferences,
+            place: Place,
+            rating: Optional[float],
+            distance: float,
+            radius: int
+    ) -> None:
+        """
+        Добавить место в кандидаты, если оно ещё не посещалось и проходит по рейтингу.
+        """
+        if place.external_id in candidates or place.external_id in preferences.visited:
+            return
+        # Порог по рейтингу применяется только к местам с известным рейтингом
+        if preferences.rating_min and rating is not None and rating < preferences.rating_min:
+            return
+
+        stats = place.review_stats
+        max_weight = max(preferences.category_weights.values(), default=0)
+        affinity = preferences.category_weights.get(place.category, 0) / max_weight if max_weight > 0 else 0.0
 
-        recommendations.sort(key=lambda x: x["rating"], reverse=True)
-        return recommendations[:10]
+        candidates[place.external_id] = {
+            "id": place.id,
+            "external_id": place.external_id,
+            "name": place.name,
+            "latitude": place.latitude,
+            "longitude": place.longitude,
+            "address": place.address,
+            "category": place.category,
+            "rating": rating,
+            "distance_m": distance,
+            "review_stats": PlaceReviewStatsSchema.model_validate(stats) if stats is not None else None,
+            "score": score_place(
+                rating, distance, radius, affinity, place.external_id in preferences.seen,
+                user_rating=stats.rating_mean if stats is not None else None,
+                review_count=stats.review_count if stats is not None else 0
+            ),
+        }
 
     async def mark_as_visited(self, user_id: int, recommendation: dict):
         """
@@ -80,7 +266,7 @@ class RecommendationEngine:
             )
 
             # Создание визита через VisitService
-            visit_service = VisitService(self.session)
+            visit_service = VisitService(self.session, self.redis)
             return await visit_service.create_visit(visit)
         except Exception as e:
             raise ValueError(f"Ошибка при сохранении места: {str(e)}")
@@ -0,0 +1,158 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from loguru import logger
+
+from domain.repositories import TripRepository
+from infrastructure.cache.geocode_cache import ReverseGeocodeCache
+from infrastructure.queue import TripEvent
+from utils.geohash import encode as geohash_encode
+
+
+class TripRecorder:
+    """
+    Фоновая запись поездок (write-behind).
+
+    Обработчик /search только кладёт событие в очередь и сразу отвечает
+    пользователю. Воркер, запущенный в lifespan, забирает события пачками,
+    определяет пункты назначения через кэш геокодирования и сохраняет
+    пачку одним многострочным INSERT. Если очередь заполнена, событие
+    отбрасывается и учитывается в счётчике dropped. Пачка с неудачной
+    записью возвращается в очередь (queue.retry) и записывается повторно;
+    события, исчерпавшие попытки, очередь учитывает в счётчике discarded.
+    При остановке воркер дописывает накопленное не дольше stop_timeout
+    секунд; то, что не успело записаться, остаётся в очереди Redis (в
+    очереди в памяти — теряется).
+    """
+
+    def __init__(
+            self,
+            queue,
+            session_maker,
+            geocoder: ReverseGeocodeCache,
+            batch_size: int = 200,
+            flush_interval: float = 1.0,
+            stop_timeout: float = 10.0,
+    ):
+        self.queue = queue
+        self.session_maker = session_maker
+        self.geocoder = geocoder
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stop_timeout = stop_timeout
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    async def record(self, user_id: int, latitude: float, longitude: float, category: Optional[str]) -> bool:
+        """
+        Поставить поездку в очередь на запись, не дожидаясь базы данных.
+        """
+        event = TripEvent(
+            user_id=user_id,
+            latitude=latitude,
+            longitude=longitude,
+            category=category,
+            created_at=datetime.now(timezone.utc).replace(tzinfo=None),
+        )
+        if await self.queue.put(event):
+            self.enqueued += 1
+            return True
+
+        if self.dropped % 1000 == 0:
+            logger.warning(f"Очередь записи поездок заполнена, отброшено событий: {self.dropped + 1}")
+        self.dropped += 1
+        return False
+
+    def start(self) -> None:
+        self._stopping = False
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Остановить воркер, дописав уже накопленные события.
+        """
+        self._stopping = True
+        if self._worker:
+            try:
+                # wait_for отменяет воркер, если за stop_timeout он не дописал очередь
+                await asyncio.wait_for(self._worker, self.stop_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Запись поездок не завершилась за {self.stop_timeout} с, воркер остановлен")
+            self._worker = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                batch = await self.queue.get_batch(self.batch_size, self.flush_interval)
+            except Exception as e:
+                logger.error(f"Ошибка чтения очереди поездок: {e}")
+                if self._stopping:
+                    # Очередь недоступна — дописывать нечего, не задерживаем остановку
+                    return
+                await asyncio.sleep(self.flush_interval)
+                continue
+
+            if batch:
+                if not await self._flush(batch):
+                    # База недоступна: не повторяем запись без паузы
+                    await asyncio.sleep(self.flush_interval)
+            elif self._stopping:
+                return
+
+    async def _resolve_destination(self, event: TripEvent) -> str:
+        try:
+            return await self.geocoder.reverse_geocode(event.latitude, event.longitude)
+        except Exception as e:
+            logger.warning(f"Не удалось определить пункт назначения: {e}")
+            return f"{event.latitude}, {event.longitude}"
+
+    async def _flush(self, batch) -> bool:
+        ids = [message_id for message_id, _ in batch if message_id is not None]
+        events = [event for _, event in batch]
+
+        # Кэш геокодирования объединяет одинаковые ячейки, поэтому запросы можно выполнять параллельно
+        destinations = await asyncio.gather(*(self._resolve_destination(event) for event in events))
+        trips = [
+            {
+                "user_id": event.user_id,
+                "destination": destination,
+                "category": event.category,
+                "latitude": event.latitude,
+                "longitude": event.longitude,
+                "geohash": geohash_encode(event.latitude, event.longitude),
+                "created_at": event.created_at,
+                "updated_at": event.created_at,
+            }
+            for event, destination in zip(events, destinations)
+        ]
+
+        try:
+            async with self.session_maker() as session:
+                await TripRepository(session).save_trips_bulk(trips)
+        except Exception as e:
+            self.failed += len(trips)
+            logger.error(f"Ошибка записи пачки поездок ({len(trips)} шт.): {e}")
+            await self.queue.retry(batch)
+            return False
+
+        self.written += len(trips)
+        try:
+            await self.queue.ack(ids)
+        except Exception as e:
+            logger.error(f"Ошибка подтверждения записанных поездок ({len(ids)} шт.): {e}")
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "discarded": self.queue.discarded,
+        }
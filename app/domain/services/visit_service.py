@@ -1,15 +1,74 @@
+from typing import List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from domain.repositories import UserPreferenceRepository
+from infrastructure.cache.redis_service import RedisService
 from infrastructure.database.models import UserVisit
 from api.schemas import VisitCreate
 
 
 class VisitService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, redis: Optional[RedisService] = None):
         self.session = session
+        self.preferences = UserPreferenceRepository(session, redis)
 
     async def create_visit(self, visit_data: VisitCreate) -> UserVisit:
-        visit = UserVisit(**visit_data.model_dump())
-        self.session.add(visit)
+        """
+        Создать посещение или обновить уже существующее для того же места.
+        """
+        values = visit_data.model_dump()
+        await self.preferences.record_visits(visit_data.user_id, [visit_data.external_id])
+        stmt = (
+            insert(UserVisit)
+            .values(**values)
+            .on_conflict_do_update(
+                constraint="uq_uservisits_user_external",
+                set_={
+                    "name": values["name"],
+                    "latitude": values["latitude"],
+                    "longitude": values["longitude"],
+                    "address": values["address"],
+                    "category": values["category"],
+                    "updated_at": func.now(),
+                },
+            )
+            .returning(UserVisit)
+        )
+        result = await self.session.execute(
+            select(UserVisit).from_statement(stmt).execution_options(populate_existing=True)
+        )
+        visit = result.scalar_one()
         await self.session.commit()
-        await self.session.refresh(visit)
+        await self.preferences.invalidate(visit_data.user_id)
         return visit
+
+    async def create_visits_bulk(self, visits: List[VisitCreate]) -> List[UserVisit]:
+        """
+        Сохранить пачку посещений одним многострочным INSERT.
+
+        Уже существующие пары (user_id, external_id) пропускаются,
+        возвращаются только вставленные записи.
+        """
+        if not visits:
+            return []
+
+        user_ids = {visit.user_id for visit in visits}
+        for user_id in user_ids:
+            await self.preferences.record_visits(
+                user_id, [visit.external_id for visit in visits if visit.user_id == user_id]
+            )
+
+        stmt = (
+            insert(UserVisit)
+            .values([visit.model_dump() for visit in visits])
+            .on_conflict_do_nothing(constraint="uq_uservisits_user_external")
+            .returning(UserVisit)
+        )
+        result = await self.session.execute(select(UserVisit).from_statement(stmt))
+        inserted = list(result.scalars())
+        await self.session.commit()
+        for user_id in user_ids:
+            await self.preferences.invalidate(user_id)
+        return inserted
@@ -0,0 +1,50 @@
+import time
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для внешней зависимости.
+
+    После failure_threshold ошибок подряд размыкается на reset_timeout секунд:
+    вызовы сразу отклоняются, не тратя время на таймауты соединения. Затем
+    пропускает одну пробную попытку — успех замыкает цепь, ошибка снова
+    размыкает её.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.state = self.CLOSED
+        self.rejected_total = 0
+
+    def allow(self) -> bool:
+        """
+        Можно ли выполнить вызов сейчас.
+        """
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at >= self.reset_timeout:
+            # Пробная попытка; остальные вызовы отклоняются до её результата
+            # или до следующего окна, если результат так и не был записан
+            self.state = self.HALF_OPEN
+            self.opened_at = now
+            return True
+        self.rejected_total += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
@@ -0,0 +1,112 @@
+import importlib.util
+import json
+import zlib
+from typing import Any, Callable, Dict, Tuple
+
+from loguru import logger
+
+# Версия формата — первый байт каждого значения. Текстовый JSON прежнего
+# формата никогда не начинается с этого байта, поэтому читается как раньше.
+CODEC_VERSION = 1
+
+SERIALIZER_JSON = 0
+SERIALIZER_ORJSON = 1
+SERIALIZER_MSGPACK = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+COMPRESSION_LZ4 = 3
+
+_SERIALIZER_IDS = {"json": SERIALIZER_JSON, "orjson": SERIALIZER_ORJSON, "msgpack": SERIALIZER_MSGPACK}
+_COMPRESSION_IDS = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "zstd": COMPRESSION_ZSTD, "lz4": COMPRESSION_LZ4}
+# Модуль, без которого формат недоступен
+_REQUIRED_MODULES = {"orjson": "orjson", "msgpack": "msgpack", "zstd": "zstandard", "lz4": "lz4"}
+
+
+def _available(name: str) -> bool:
+    module = _REQUIRED_MODULES.get(name)
+    return module is None or importlib.util.find_spec(module) is not None
+
+
+def _serializers() -> Dict[int, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    serializers = {
+        SERIALIZER_JSON: (lambda obj: json.dumps(obj, separators=(",", ":")).encode(), json.loads),
+    }
+    if _available("orjson"):
+        import orjson
+        serializers[SERIALIZER_ORJSON] = (orjson.dumps, orjson.loads)
+    if _available("msgpack"):
+        import msgpack
+        serializers[SERIALIZER_MSGPACK] = (
+            lambda obj: msgpack.packb(obj, use_bin_type=True),
+            lambda raw: msgpack.unpackb(raw, raw=False),
+        )
+    return serializers
+
+
+def _compressors() -> Dict[int, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    compressors = {
+        COMPRESSION_NONE: (lambda data: data, lambda data: data),
+        COMPRESSION_ZLIB: (zlib.compress, zlib.decompress),
+    }
+    if _available("zstd"):
+        import zstandard
+        compressors[COMPRESSION_ZSTD] = (
+            zstandard.ZstdCompressor(level=3).compress,
+            zstandard.ZstdDecompressor().decompress,
+        )
+    if _available("lz4"):
+        import lz4.frame
+        compressors[COMPRESSION_LZ4] = (lz4.frame.compress, lz4.frame.decompress)
+    return compressors
+
+
+class Codec:
+    """
+    Сериализация значений кэша в компактный бинарный формат.
+
+    Значение: байт версии, байт сериализатора, байт сжатия, затем данные.
+    Сжатие применяется только к данным длиннее compress_threshold. Чтение
+    опирается на заголовок, а не на текущие настройки, поэтому смена
+    сериализатора или сжатия не ломает уже записанные значения.
+    """
+
+    def __init__(self, serializer: str = "msgpack", compression: str = "zstd", compress_threshold: int = 1024):
+        self._serializers = _serializers()
+        self._compressors = _compressors()
+
+        if serializer not in _SERIALIZER_IDS or _SERIALIZER_IDS[serializer] not in self._serializers:
+            logger.warning(f"Сериализатор {serializer} недоступен, используется json")
+            serializer = "json"
+        if compression not in _COMPRESSION_IDS or _COMPRESSION_IDS[compression] not in self._compressors:
+            logger.warning(f"Сжатие {compression} недоступно, используется zlib")
+            compression = "zlib"
+
+        self.serializer = serializer
+        self.compression = compression
+        self.compress_threshold = compress_threshold
+        self._serializer_id = _SERIALIZER_IDS[serializer]
+        self._compression_id = _COMPRESSION_IDS[compression]
+
+    def encode(self, value: Any) -> bytes:
+        dump, _ = self._serializers[self._serializer_id]
+        data = dump(value)
+
+        compression_id = COMPRESSION_NONE
+        if self._compression_id != COMPRESSION_NONE and len(data) > self.compress_threshold:
+            compress, _ = self._compressors[self._compression_id]
+            data = compress(data)
+            compression_id = self._compression_id
+
+        return bytes((CODEC_VERSION, self._serializer_id, compression_id)) + data
+
+    def decode(self, raw: bytes) -> Any:
+        if not raw or raw[0] != CODEC_VERSION:
+            # Значение записано до появления кодека — текстовый JSON
+            return json.loads(raw)
+
+        serializer_id, compression_id = raw[1], raw[2]
+        _, decompress = self._compressors[compression_id]
+        _, load = self._serializers[serializer_id]
+        return load(decompress(raw[3:]))
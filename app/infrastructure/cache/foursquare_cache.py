@@ -0,0 +1,221 @@
+import asyncio
+import math
+import time
+from typing import Any, Dict, Optional, Sequence, Set, Tuple
+
+from loguru import logger
+
+from infrastructure.cache.redis_service import RedisService
+from infrastructure.external.foursquare_client import FoursquareClient, FOURSQUARE_MAX_LIMIT
+from infrastructure.external.rate_limiter import AsyncRateLimiter
+from utils.geohash import METERS_PER_DEGREE, cell_center, cell_size, encode as geohash_encode
+
+# Радиусы запросов к Foursquare: радиус поиска округляется вверх до ближайшего бакета,
+# покрывающего круг из любой точки ячейки
+RADIUS_BUCKETS = (500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+
+class FoursquareSearchCache:
+    """
+    Кэш ответов поиска Foursquare по гео-плиткам.
+
+    Запрос приводится к центру ячейки geohash, а радиус — к ближайшему
+    бакету, покрывающему исходный круг из любой точки ячейки. Поэтому все
+    запросы одной категории в пределах плитки получают одну страницу мест,
+    а точная фильтрация по радиусу выполняется на стороне вызывающего.
+
+    Свежий ответ отдаётся сразу. Устаревший (stale-while-revalidate) тоже
+    отдаётся сразу, а обновляется в фоне. Пустые ответы кэшируются на
+    отдельный, более короткий срок.
+    """
+
+    def __init__(
+            self,
+            client: FoursquareClient,
+            redis: RedisService,
+            precision: int = 6,
+            ttl: int = 3600,
+            stale_ttl: int = 24 * 3600,
+            negative_ttl: int = 600,
+    ):
+        self.client = client
+        self.redis = redis
+        self.precision = precision
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def _radius_bucket(self, latitude: float, radius: int) -> int:
+        """
+        Наименьший бакет, круг которого из центра ячейки покрывает исходный круг.
+        """
+        lat_step, lon_step = cell_size(self.precision)
+        half_diagonal = math.hypot(
+            lat_step * METERS_PER_DEGREE,
+            lon_step * METERS_PER_DEGREE * math.cos(math.radians(latitude))
+        ) / 2
+        required = radius + half_diagonal
+        for bucket in RADIUS_BUCKETS:
+            if bucket >= required:
+                return bucket
+        return RADIUS_BUCKETS[-1]
+
+    def _request(
+            self,
+            category_id: str,
+            latitude: float,
+            longitude: float,
+            radius: int,
+            sort: Optional[str]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Ключ кэша и параметры запроса к Foursquare для плитки, в которую попадает точка.
+        """
+        tile = geohash_encode(latitude, longitude, self.precision)
+        bucket = self._radius_bucket(latitude, radius)
+        key = f"fsq:{category_id}:{tile}:{bucket}:{sort or ''}"
+
+        center_lat, center_lon = cell_center(latitude, longitude, self.precision)
+        params = {
+            "ll": f"{center_lat:.6f},{center_lon:.6f}",
+            "radius": bucket,
+            "categories": category_id,
+            "limit": FOURSQUARE_MAX_LIMIT,
+        }
+        if sort:
+            params["sort"] = sort
+        return key, params
+
+    async def prefetch(
+            self,
+            category_ids: Sequence[str],
+            latitude: float,
+            longitude: float,
+            radius: int,
+            sort: Optional[str] = None
+    ) -> None:
+        """
+        Загрузить плитки нескольких категорий в кэш процесса одним запросом к Redis.
+
+        Последующие вызовы search для этих категорий не ходят в Redis по одной плитке.
+        """
+        keys = [self._request(c, latitude, longitude, radius, sort)[0] for c in category_ids]
+        await self.redis.get_many_objects(keys)
+
+    async def search(
+            self,
+            category_id: str,
+            latitude: float,
+            longitude: float,
+            radius: int,
+            sort: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Страница мест категории вокруг плитки, в которую попадает точка.
+
+        :return: Ответ Foursquare ({"results": [...]}), места могут лежать дальше radius.
+        """
+        key, params = self._request(category_id, latitude, longitude, radius, sort)
+        entry = await self.redis.get_object(key)
+        if entry is not None:
+            if entry["fresh_until"] > time.time():
+                if entry["results"]:
+                    self.hits += 1
+                else:
+                    self.negative_hits += 1
+                return {"results": entry["results"]}
+
+            self.stale_hits += 1
+            self._schedule_refresh(key, params)
+            return {"results": entry["results"]}
+
+        self.misses += 1
+        return {"results": await self._fetch(key, params)}
+
+    async def warm(
+            self,
+            category_id: str,
+            latitude: float,
+            longitude: float,
+            radius: int,
+            ahead: int,
+            sort: Optional[str] = None,
+            rate_limiter: Optional[AsyncRateLimiter] = None
+    ) -> bool:
+        """
+        Обновить плитку заранее, если её ответ перестанет быть свежим быстрее чем через ahead секунд.
+
+        :param rate_limiter: Ограничение частоты запросов к Foursquare.
+        :return: True, если был запрос к Foursquare.
+        """
+        key, params = self._request(category_id, latitude, longitude, radius, sort)
+        entry = await self.redis.get_object(key)
+        if entry is not None and entry["fresh_until"] - time.time() > ahead:
+            return False
+
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        await self._fetch(key, params)
+        return True
+
+    async def _fetch(self, key: str, params: Dict[str, Any]) -> list:
+        data = await self.client.search_places(params)
+        results = data.get("results", [])
+
+        if results:
+            entry = {"results": results, "fresh_until": time.time() + self.ttl}
+            await self.redis.set_object(key, entry, ttl=self.ttl + self.stale_ttl)
+        else:
+            entry = {"results": [], "fresh_until": time.time() + self.negative_ttl}
+            await self.redis.set_object(key, entry, ttl=self.negative_ttl)
+        return results
+
+    def _schedule_refresh(self, key: str, params: Dict[str, Any]) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, params))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, key: str, params: Dict[str, Any]) -> None:
+        try:
+            await self._fetch(key, params)
+            self.refreshes += 1
+        except Exception as e:
+            # Устаревший ответ остаётся в кэше до конца stale-периода
+            self.refresh_errors += 1
+            logger.warning(f"Фоновое обновление кэша Foursquare {key} не удалось: {e!r}")
+        finally:
+            self._refreshing.discard(key)
+
+    async def close(self) -> None:
+        """
+        Дождаться завершения фоновых обновлений перед остановкой приложения.
+        """
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Счётчики попаданий для подбора TTL под квоту Foursquare.
+        """
+        lookups = self.hits + self.negative_hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": (lookups - self.misses) / lookups if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+        }
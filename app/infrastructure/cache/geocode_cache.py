@@ -0,0 +1,59 @@
+from typing import Optional
+
+from loguru import logger
+
+from infrastructure.cache.local_cache import LocalTTLCache
+from infrastructure.cache.redis_service import RedisService
+from infrastructure.cache.single_flight import SingleFlight
+from infrastructure.external.nominatim_client import NominatimClient
+from utils.geohash import encode as geohash_encode
+
+
+class ReverseGeocodeCache:
+    """
+    Кэш обратного геокодирования поверх NominatimClient.
+
+    Координаты квантуются до ячейки geohash: на уровне города (zoom=10) ответ
+    одинаков для любой точки в пределах нескольких километров. Порядок поиска:
+    кэш процесса -> Redis -> Nominatim. Одновременные запросы одной ячейки,
+    в том числе из разных воркеров, объединяются через SingleFlight.
+    """
+
+    def __init__(
+            self,
+            client: NominatimClient,
+            redis: RedisService,
+            precision: int = 5,
+            ttl: int = 30 * 24 * 3600,
+            local_maxsize: int = 10000,
+            local_ttl: int = 3600,
+            single_flight: Optional[SingleFlight] = None,
+    ):
+        self.client = client
+        self.redis = redis
+        self.precision = precision
+        self.ttl = ttl
+        self.local = LocalTTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self.single_flight = single_flight or SingleFlight("geocode")
+
+    def _build_cache_key(self, lat: float, lon: float) -> str:
+        return f"geocode:{geohash_encode(lat, lon, self.precision)}"
+
+    async def reverse_geocode(self, lat: float, lon: float) -> str:
+        key = self._build_cache_key(lat, lon)
+
+        destination = self.local.get(key)
+        if destination is not None:
+            return destination
+
+        return await self.single_flight.do(key, lambda: self._resolve(key, lat, lon))
+
+    async def _resolve(self, key: str, lat: float, lon: float) -> str:
+        destination = await self.redis.get(key)
+        if destination is None:
+            logger.debug("Кэш геокодирования не найден: {}", key)
+            destination = await self.client.reverse_geocode(lat, lon)
+            await self.redis.set(key, destination, ttl=self.ttl)
+
+        self.local.set(key, destination)
+        return destination
@@ -0,0 +1,98 @@
+import asyncio
+from collections import Counter
+from typing import Optional
+
+from loguru import logger
+
+from infrastructure.cache.redis_service import RedisService
+
+
+class PopularityCounter:
+    """
+    Счётчик популярности в отсортированном множестве Redis с накоплением в процессе.
+
+    record() только увеличивает счёт в словаре процесса, поэтому запрос
+    пользователя не ждёт Redis. Фоновая задача раз в flush_interval секунд
+    отправляет накопленные счета одним конвейером, сразу оставляет в
+    множестве keep элементов с наибольшим счётом и продлевает его TTL.
+    Пока Redis недоступен, счета копятся, но не более max_pending разных
+    элементов — новые сверх этого не учитываются.
+    """
+
+    def __init__(
+            self,
+            redis: RedisService,
+            key: str,
+            keep: int = 1000,
+            ttl: int = 7 * 24 * 3600,
+            flush_interval: float = 10.0,
+            max_pending: int = 10000,
+    ):
+        self.redis = redis
+        self.key = key
+        self.keep = keep
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Counter = Counter()
+        self._worker: Optional[asyncio.Task] = None
+
+        self.recorded = 0
+        self.skipped = 0
+        self.flushed = 0
+
+    def record(self, member: str) -> None:
+        """
+        Учесть одно обращение к элементу.
+        """
+        if member not in self._pending and len(self._pending) >= self.max_pending:
+            self.skipped += 1
+            return
+        self._pending[member] += 1
+        self.recorded += 1
+
+    async def flush(self) -> None:
+        """
+        Отправить накопленные счета в Redis; при ошибке они остаются до следующей попытки.
+        """
+        if not self._pending:
+            return
+        scores, self._pending = self._pending, Counter()
+        if await self.redis.increment_scores(self.key, scores, keep=self.keep, ttl=self.ttl):
+            self.flushed += len(scores)
+        else:
+            # Redis недоступен: возвращаем счета вместе с накопленными за время запроса
+            scores.update(self._pending)
+            self._pending = scores
+
+    def start(self) -> None:
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Остановить фоновую задачу, отправив то, что успело накопиться.
+        """
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка отправки счётчика {self.key}: {e!r}")
+
+    def stats(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "skipped": self.skipped,
+            "flushed": self.flushed,
+            "pending": len(self._pending),
+        }
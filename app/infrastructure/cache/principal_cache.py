@@ -0,0 +1,111 @@
+import asyncio
+from typing import Optional, Set
+
+from loguru import logger
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from domain.dto.principal_dto import Principal
+from infrastructure.cache.redis_service import RedisService
+from infrastructure.database.models import User
+
+# Имена пользователей, изменённых в транзакции; сбрасываются из кэша после коммита
+_SESSION_INFO_KEY = "principal_invalidations"
+
+
+class PrincipalCache:
+    """
+    Кэш авторизованных пользователей по subject JWT (имени пользователя).
+
+    Хранит Principal в кэше процесса и в Redis с коротким TTL, поэтому
+    авторизация не обращается к БД на каждый запрос. При изменении или
+    удалении пользователя через ORM запись сбрасывается после коммита —
+    сообщение об инвалидации RedisService очищает кэши остальных воркеров.
+    Массовые UPDATE/DELETE в обход ORM событий не вызывают: для них
+    устаревшая запись живёт не дольше TTL.
+    """
+
+    def __init__(self, redis: RedisService, ttl: int = 60):
+        self.redis = redis
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._pending: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return f"auth:user:{username}"
+
+    async def get(self, username: str) -> Optional[Principal]:
+        principal = await self.redis.get_object(self._key(username), build=lambda row: Principal(*row))
+        if principal is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return principal
+
+    async def set(self, principal: Principal) -> None:
+        try:
+            await self.redis.set_object(
+                self._key(principal.username),
+                principal,
+                dump=lambda p: [p.id, p.username, p.email],
+                ttl=self.ttl
+            )
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить пользователя {principal.username} в кэш: {e}")
+
+    async def invalidate(self, *usernames: str) -> None:
+        for username in usernames:
+            await self.redis.delete_object(self._key(username))
+
+    def register(self) -> None:
+        """
+        Подписаться на изменения пользователей в ORM.
+        """
+        # before_update: прежнее имя при переименовании ещё можно прочитать из строки
+        event.listen(User, "before_update", self._on_user_changed)
+        event.listen(User, "after_delete", self._on_user_changed)
+        event.listen(Session, "after_commit", self._on_commit)
+        event.listen(Session, "after_rollback", self._on_rollback)
+
+    def unregister(self) -> None:
+        event.remove(User, "before_update", self._on_user_changed)
+        event.remove(User, "after_delete", self._on_user_changed)
+        event.remove(Session, "after_commit", self._on_commit)
+        event.remove(Session, "after_rollback", self._on_rollback)
+
+    @staticmethod
+    def _on_user_changed(mapper, connection, target: User) -> None:
+        session = object_session(target)
+        if session is None:
+            return
+        usernames: Set[str] = session.info.setdefault(_SESSION_INFO_KEY, set())
+        usernames.add(target.username)
+        # При смене имени сбрасываем и запись под прежним именем
+        history = inspect(target).attrs.username.history
+        if history.deleted:
+            usernames.update(history.deleted)
+        elif history.added:
+            # Прежнее значение не было загружено (например, истекло после коммита)
+            usernames.add(connection.scalar(select(User.username).where(User.id == target.id)))
+
+    def _on_commit(self, session: Session) -> None:
+        usernames = session.info.pop(_SESSION_INFO_KEY, None)
+        if usernames:
+            # Коммит AsyncSession выполняется внутри event loop, поэтому задача планируется в нём
+            task = asyncio.get_running_loop().create_task(self.invalidate(*usernames))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    @staticmethod
+    def _on_rollback(session: Session) -> None:
+        session.info.pop(_SESSION_INFO_KEY, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,13 +1,82 @@
-from typing import Optional, Union
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 from aioredis import Redis, from_url
+from aioredis.client import Pipeline
+from aioredis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
 from loguru import logger
 import json
 
+from infrastructure.cache.circuit_breaker import CircuitBreaker
+from infrastructure.cache.codec import Codec
+from infrastructure.cache.local_cache import LocalTTLCache, MISSING
+
+# Пауза перед переподпиской на канал инвалидации после ошибки
+INVALIDATION_RETRY_SECONDS = 5.0
+
+# Изменение счётчика, только если он уже есть: иначе счётчик пересчитывается из источника
+_INCREMENT_IF_EXISTS_SCRIPT = """
+if redis.call("exists", KEYS[1]) == 1 then
+    return redis.call("incrby", KEYS[1], ARGV[1])
+end
+return nil
+"""
+
+# Ошибки, означающие недоступность Redis (учитываются предохранителем)
+_CONNECTION_ERRORS = (RedisConnectionError, RedisTimeoutError, OSError, asyncio.TimeoutError)
+
+
+class RedisUnavailableError(ConnectionError):
+    """Redis недоступен, и предохранитель не пропускает попытки переподключения."""
+
 
 class RedisService:
-    def __init__(self, redis_url: str):
+    """
+    Клиент Redis с кэшем первого уровня в памяти процесса.
+
+    get_object/set_object хранят в локальном кэше уже разобранные объекты,
+    поэтому повторные чтения популярных ключей не ходят в сеть и не
+    декодируют ответ заново. Запись и удаление таких ключей (set_object,
+    delete_object) рассылаются через pub/sub, и остальные воркеры выбрасывают
+    ключ из своего локального кэша; set/set_many/delete работают только с
+    Redis и ничего не рассылают. Локальный TTL ограничивает устаревание,
+    если сообщение потерялось.
+
+    Пока Redis недоступен, предохранитель сразу отклоняет операции, и они
+    не ждут таймаута переподключения на каждом запросе.
+
+    Объекты (get_object/set_object) хранятся в бинарном формате Codec и
+    читаются отдельным клиентом без декодирования ответов в строки.
+    """
+
+    def __init__(
+            self,
+            redis_url: str,
+            local_maxsize: int = 10000,
+            local_ttl: float = 60.0,
+            invalidation_channel: str = "cache:invalidate",
+            breaker_failure_threshold: int = 3,
+            breaker_reset_timeout: float = 10.0,
+            codec: Optional[Codec] = None,
+    ):
         self.redis_url = redis_url
         self.redis: Optional[Redis] = None
+        # Клиент для бинарных значений: ответы не декодируются в строки
+        self.raw_redis: Optional[Redis] = None
+        self.codec = codec or Codec()
+        self.local = LocalTTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self.invalidation_channel = invalidation_channel
+        # Идентификатор процесса, чтобы не обрабатывать собственные сообщения об инвалидации
+        self.instance_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self.breaker = CircuitBreaker(breaker_failure_threshold, breaker_reset_timeout)
+
+        self.local_hits = 0
+        self.local_misses = 0
+        # обращения к Redis после промаха кэша процесса
+        self.redis_hits = 0
+        self.redis_misses = 0
 
     async def connect(self) -> None:
         """
@@ -16,51 +85,392 @@ class RedisService:
         try:
             self.redis = await from_url(self.redis_url, decode_responses=True)
             await self.redis.ping()
+            self.raw_redis = await from_url(self.redis_url, decode_responses=False)
             logger.info("Соединение с Redis установлено.")
         except Exception as e:
             logger.error(f"Ошибка подключения к Redis: {e}")
             self.redis = None
+            self.raw_redis = None
 
-    async def get(self, key: str) -> Optional[str]:
+    async def _get_client(self, raw: bool = False) -> Redis:
         """
-        Получить значение из Redis по ключу.
+        Получить клиент Redis, при необходимости переподключившись.
+
+        :param raw: Клиент, возвращающий bytes вместо строк.
+
+        :raises RedisUnavailableError: Предохранитель разомкнут или подключиться не удалось.
+        """
+        if not self.breaker.allow():
+            raise RedisUnavailableError("Redis недоступен, повторная попытка позже.")
+
+        if self.redis is None:
+            logger.warning("Redis не подключён. Попытка автоподключения...")
+            await self.connect()
+
+        if self.redis is None:
+            self.breaker.record_failure()
+            raise RedisUnavailableError("Не удалось подключиться к Redis.")
+
+        return self.raw_redis if raw else self.redis
+
+    @asynccontextmanager
+    async def client(self, raw: bool = False) -> AsyncIterator[Redis]:
         """
+        Клиент Redis с учётом результата операции в предохранителе.
+
+        Все команды идут через этот контекст: предохранитель пропускает пробный
+        запрос в полуоткрытом состоянии, и его исход должен быть записан.
+
+        Пример: async with redis.client() as client: await client.xack(stream, group, message_id)
+        """
+        client = await self._get_client(raw)
         try:
-            if self.redis is None:
-                logger.warning("Redis не подключён. Попытка автоподключения...")
-                await self.connect()
+            yield client
+        except _CONNECTION_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_success()
+            raise
+        else:
+            self.breaker.record_success()
 
-            if self.redis is None:
-                raise ConnectionError("Не удалось подключиться к Redis.")
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncIterator[Pipeline]:
+        """
+        Конвейер команд: всё, что добавлено в pipe, уходит в Redis за один запрос.
 
-            return await self.redis.get(key)
+        Пример: async with redis.pipeline() as pipe: pipe.get(a); pipe.ttl(a); value, ttl = await pipe.execute()
+        Запись через конвейер не инвалидирует локальный кэш — для этого есть set/set_many.
+        """
+        async with self.client() as client:
+            async with client.pipeline(transaction=transaction) as pipe:
+                yield pipe
+
+    async def get(self, key: str, raw: bool = False) -> Optional[Union[str, bytes]]:
+        """
+        Получить значение из Redis по ключу.
+
+        :param raw: Вернуть bytes без декодирования.
+        """
+        try:
+            async with self.client(raw) as client:
+                return await client.get(key)
+        except RedisUnavailableError:
+            return None
         except Exception as e:
             logger.error(f"Ошибка при получении ключа {key} из Redis: {e}")
             return None
 
-    async def set(self, key: str, value: Union[str, dict], ttl: int = 3600) -> None:
+    async def get_many(self, keys: Sequence[str], raw: bool = False) -> List[Optional[Union[str, bytes]]]:
+        """
+        Получить значения нескольких ключей одним запросом (MGET).
+
+        :param raw: Вернуть bytes без декодирования.
+        :return: Значения в порядке ключей, None для отсутствующих.
+        """
+        if not keys:
+            return []
+        try:
+            async with self.client(raw) as client:
+                return await client.mget(keys)
+        except RedisUnavailableError:
+            return [None] * len(keys)
+        except Exception as e:
+            logger.error(f"Ошибка при получении {len(keys)} ключей из Redis: {e}")
+            return [None] * len(keys)
+
+    async def set(self, key: str, value: Union[str, bytes, dict], ttl: int = 3600) -> None:
         """
         Сохранить значение в Redis с TTL.
         """
+        await self.set_many({key: value}, ttl=ttl)
+
+    async def set_many(
+            self,
+            items: Dict[str, Union[str, bytes, dict]],
+            ttl: Union[int, Dict[str, int]] = 3600
+    ) -> None:
+        """
+        Сохранить несколько значений одним конвейером.
+
+        :param items: Ключ -> значение.
+        :param ttl: Общий TTL или TTL для каждого ключа.
+        """
+        await self._write(items, ttl, invalidate=False)
+
+    async def _write(
+            self,
+            items: Dict[str, Union[str, bytes, dict]],
+            ttl: Union[int, Dict[str, int]],
+            invalidate: bool
+    ) -> None:
+        if not items:
+            return
+        try:
+            async with self.client() as client:
+                async with client.pipeline(transaction=False) as pipe:
+                    for key, value in items.items():
+                        if isinstance(value, dict):
+                            value = json.dumps(value)
+                        pipe.set(name=key, value=value, ex=ttl[key] if isinstance(ttl, dict) else ttl)
+                        if invalidate:
+                            pipe.publish(self.invalidation_channel, self._invalidation_message(key))
+                    await pipe.execute()
+        except RedisUnavailableError:
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении ключей {', '.join(items)} в Redis: {e}")
+
+    async def delete(self, key: str) -> None:
+        """
+        Удалить ключ из Redis.
+        """
+        await self._delete(key, invalidate=False)
+
+    async def delete_object(self, key: str) -> None:
+        """
+        Удалить объект из Redis и из локальных кэшей всех воркеров.
+        """
+        self.local.delete(key)
+        await self._delete(key, invalidate=True)
+
+    async def _delete(self, key: str, invalidate: bool) -> None:
+        try:
+            async with self.client() as client:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.delete(key)
+                    if invalidate:
+                        pipe.publish(self.invalidation_channel, self._invalidation_message(key))
+                    await pipe.execute()
+        except RedisUnavailableError:
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка при удалении ключа {key} из Redis: {e}")
+
+    async def set_if_absent(self, key: str, value: str, ttl: int) -> bool:
+        """
+        Записать значение, только если ключа ещё нет (SET NX EX).
+
+        :return: True, если значение записано.
+        """
+        try:
+            async with self.client() as client:
+                return bool(await client.set(key, value, nx=True, ex=ttl))
+        except RedisUnavailableError:
+            return False
+        except Exception as e:
+            logger.error(f"Ошибка при записи ключа {key} в Redis: {e}")
+            return False
+
+    async def ttl(self, key: str) -> Optional[int]:
+        """
+        Оставшееся время жизни ключа в секундах: -2 — ключа нет, -1 — без срока.
+
+        :return: None, если Redis недоступен.
+        """
         try:
-            if self.redis is None:
-                logger.warning("Redis не подключён. Попытка автоподключения...")
-                await self.connect()
+            async with self.client() as client:
+                return await client.ttl(key)
+        except RedisUnavailableError:
+            return None
+        except Exception as e:
+            logger.error(f"Ошибка при получении TTL ключа {key} из Redis: {e}")
+            return None
+
+    async def increment_if_exists(self, key: str, amount: int = 1) -> Optional[int]:
+        """
+        Изменить целочисленный счётчик на amount, если ключ существует.
+
+        :return: Новое значение или None, если ключа нет или Redis недоступен.
+        """
+        try:
+            async with self.client() as client:
+                return await client.eval(_INCREMENT_IF_EXISTS_SCRIPT, 1, key, amount)
+        except RedisUnavailableError:
+            return None
+        except Exception as e:
+            logger.error(f"Ошибка при изменении счётчика {key}: {e}")
+            return None
 
-            if self.redis is None:
-                raise ConnectionError("Не удалось подключиться к Redis.")
+    async def increment_scores(self, key: str, scores: Mapping[str, float], keep: int, ttl: int) -> bool:
+        """
+        Увеличить счета элементов отсортированного множества (ZINCRBY) одним конвейером,
+        оставить keep элементов с наибольшим счётом и продлить TTL ключа.
 
-            if isinstance(value, dict):
-                value = json.dumps(value)
+        :return: False, если Redis недоступен или команда не выполнилась.
+        """
+        try:
+            async with self.pipeline(transaction=False) as pipe:
+                for member, amount in scores.items():
+                    pipe.zincrby(key, amount, member)
+                pipe.zremrangebyrank(key, 0, -keep - 1)
+                pipe.expire(key, ttl)
+                await pipe.execute()
+            return True
+        except RedisUnavailableError:
+            return False
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении счетов в {key}: {e}")
+            return False
 
-            await self.redis.set(name=key, value=value, ex=ttl)
+    async def top_scores(self, key: str, count: int) -> List[Tuple[str, float]]:
+        """
+        Элементы с наибольшим счётом, по убыванию.
+        """
+        try:
+            async with self.client() as client:
+                return await client.zrevrange(key, 0, count - 1, withscores=True)
+        except RedisUnavailableError:
+            return []
         except Exception as e:
-            logger.error(f"Ошибка при сохранении ключа {key} в Redis: {e}")
+            logger.error(f"Ошибка при чтении {key} из Redis: {e}")
+            return []
+
+    def _decode(self, key: str, raw: bytes, build: Optional[Callable[[Any], Any]]) -> Any:
+        try:
+            value = self.codec.decode(raw)
+            return build(value) if build else value
+        except Exception as e:
+            # Нечитаемое значение считается промахом и будет перезаписано
+            logger.warning(f"Не удалось декодировать ключ {key} из Redis: {e}")
+            return None
+
+    async def get_object(self, key: str, build: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        Получить объект: сначала из кэша процесса, затем из Redis.
+
+        :param key: Ключ Redis.
+        :param build: Построение объекта из декодированных данных (вызывается только при промахе).
+        :return: Объект или None, если ключа нет.
+        """
+        value = self.local.get(key, MISSING)
+        if value is not MISSING:
+            self.local_hits += 1
+            return value
+
+        self.local_misses += 1
+        raw = await self.get(key, raw=True)
+        if raw is None:
+            self.redis_misses += 1
+            return None
+        self.redis_hits += 1
+
+        value = self._decode(key, raw, build)
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    async def get_many_objects(self, keys: Sequence[str], build: Optional[Callable[[Any], Any]] = None) -> List[Any]:
+        """
+        Получить несколько объектов: промахи кэша процесса — одним MGET.
+
+        :return: Объекты в порядке ключей, None для отсутствующих.
+        """
+        values = [self.local.get(key, MISSING) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is MISSING]
+        self.local_hits += len(keys) - len(missing)
+        self.local_misses += len(missing)
+
+        raw_values = await self.get_many([keys[i] for i in missing], raw=True)
+        found = sum(raw is not None for raw in raw_values)
+        self.redis_hits += found
+        self.redis_misses += len(missing) - found
+        for i, raw in zip(missing, raw_values):
+            values[i] = self._decode(keys[i], raw, build) if raw is not None else None
+            if values[i] is not None:
+                self.local.set(keys[i], values[i])
+        return values
+
+    async def set_object(
+            self,
+            key: str,
+            value: Any,
+            dump: Optional[Callable[[Any], Any]] = None,
+            ttl: int = 3600
+    ) -> None:
+        """
+        Сохранить объект в Redis (в формате Codec) и в кэш процесса.
+
+        :param dump: Проекция объекта в данные для сериализации (списки, словари, числа, строки).
+        """
+        self.local.delete(key)
+        await self._write({key: self.codec.encode(dump(value) if dump else value)}, ttl, invalidate=True)
+        # Локальный TTL не должен пережить сам ключ в Redis
+        self.local.set(key, value, ttl=min(self.local.ttl, ttl))
+
+    def _invalidation_message(self, key: str) -> str:
+        return f"{self.instance_id}:{key}"
+
+    def _on_invalidation(self, message: str) -> None:
+        instance_id, _, key = message.partition(":")
+        if instance_id != self.instance_id:
+            self.local.delete(key)
+
+    def start_invalidation_listener(self) -> None:
+        """
+        Запустить фоновую подписку на сообщения об инвалидации локального кэша.
+        """
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen_invalidations())
+
+    async def _listen_invalidations(self) -> None:
+        while True:
+            try:
+                async with self.client() as client:
+                    pubsub = client.pubsub(ignore_subscribe_messages=True)
+                    await pubsub.subscribe(self.invalidation_channel)
+                # Пока подписки не было, сообщения могли быть пропущены
+                self.local.clear()
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._on_invalidation(message["data"])
+                finally:
+                    await pubsub.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Подписка на инвалидацию кэша прервана: {e}")
+                self.local.clear()
+                await asyncio.sleep(INVALIDATION_RETRY_SECONDS)
+
+    def stats(self) -> dict:
+        """
+        Попадания в кэш процесса и в Redis, состояние предохранителя.
+        """
+        lookups = self.local_hits + self.local_misses
+        redis_lookups = self.redis_hits + self.redis_misses
+        return {
+            "breaker_state": self.breaker.state,
+            "breaker_rejected": self.breaker.rejected_total,
+            "local_size": len(self.local),
+            "local_hits": self.local_hits,
+            "local_misses": self.local_misses,
+            "local_hit_ratio": self.local_hits / lookups if lookups else 0.0,
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "redis_hit_ratio": self.redis_hits / redis_lookups if redis_lookups else 0.0,
+        }
 
     async def close(self) -> None:
         """
         Закрыть соединение с Redis.
         """
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+        if self.raw_redis:
+            try:
+                await self.raw_redis.close()
+            except Exception as e:
+                logger.warning(f"Ошибка при закрытии Redis: {e}")
+
         if self.redis:
             try:
                 await self.redis.close()
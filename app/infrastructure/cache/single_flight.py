@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+from infrastructure.cache.redis_service import RedisService
+
+# Снятие блокировки только её владельцем (по токену)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def make_key(params: Dict[str, Any], exclude: Iterable[str] = ("apikey",)) -> str:
+    """
+    Нормализованный ключ запроса: хэш параметров без учёта порядка и секретов.
+    """
+    excluded = set(exclude)
+    raw = json.dumps({k: v for k, v in params.items() if k not in excluded}, sort_keys=True, default=str)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных запросов к внешнему API.
+
+    Внутри процесса первый вызов с ключом становится ведущим, остальные ждут
+    его результат. Между воркерами ведущий определяется короткой блокировкой
+    в Redis (SET NX PX): он публикует результат под отдельным ключом на
+    несколько секунд, а ведомые воркеры ждут этот результат вместо повторного
+    запроса. Если Redis недоступен или ведущий упал — запрос выполняется сам.
+    Результат должен сериализоваться в JSON.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            redis: Optional[RedisService] = None,
+            lock_ttl: float = 10.0,
+            result_ttl: int = 5,
+            poll_interval: float = 0.05,
+    ):
+        self.name = name
+        self.redis = redis
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+        self.calls_total = 0
+        self.executed_total = 0
+        self.coalesced_local = 0
+        self.coalesced_remote = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполнить fn один раз на все одновременные вызовы с тем же ключом.
+        """
+        self.calls_total += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._lead(key, fn))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced_local += 1
+            logger.debug("SingleFlight {}: запрос {} присоединён к выполняющемуся", self.name, key)
+
+        # shield: отмена одного вызывающего не должна отменять общий запрос
+        return await asyncio.shield(task)
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self.redis is None:
+            return await self._execute(fn)
+
+        lock_key = f"sf:lock:{self.name}:{key}"
+        result_key = f"sf:result:{self.name}:{key}"
+        token = uuid.uuid4().hex
+
+        try:
+            async with self.redis.client() as client:
+                acquired = await client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+        except Exception as e:
+            logger.warning(f"SingleFlight {self.name}: блокировка в Redis недоступна: {e}")
+            return await self._execute(fn)
+
+        if not acquired:
+            found, result = await self._wait_remote(lock_key, result_key)
+            if found:
+                self.coalesced_remote += 1
+                return result
+            return await self._execute(fn)
+
+        try:
+            result = await self._execute(fn)
+            await self.redis.set(result_key, json.dumps(result), ttl=self.result_ttl)
+            return result
+        finally:
+            try:
+                async with self.redis.client() as client:
+                    await client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            except Exception as e:
+                logger.warning(f"SingleFlight {self.name}: не удалось снять блокировку {lock_key}: {e}")
+
+    async def _execute(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.executed_total += 1
+        return await fn()
+
+    async def _wait_remote(self, lock_key: str, result_key: str):
+        """
+        Дождаться результата ведущего воркера, пока его блокировка жива.
+
+        :return: (найден ли результат, результат).
+        """
+        deadline = time.monotonic() + self.lock_ttl
+        try:
+            while time.monotonic() < deadline:
+                # Результат и блокировка проверяются атомарно за один запрос
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.get(result_key)
+                    pipe.exists(lock_key)
+                    raw, locked = await pipe.execute()
+                if raw is not None:
+                    return True, json.loads(raw)
+                if not locked:
+                    return False, None
+                await asyncio.sleep(self.poll_interval)
+        except Exception as e:
+            logger.warning(f"SingleFlight {self.name}: ошибка ожидания результата в Redis: {e}")
+        return False, None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Сколько вызовов было объединено внутри процесса и между воркерами.
+        """
+        return {
+            "name": self.name,
+            "calls_total": self.calls_total,
+            "executed_total": self.executed_total,
+            "coalesced_local": self.coalesced_local,
+            "coalesced_remote": self.coalesced_remote,
+            "in_flight": len(self._in_flight),
+        }
@@ -2,15 +2,64 @@ from datetime import datetime
 from typing import Annotated
 
 from sqlalchemy import func
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs
-from sqlalchemy.orm import DeclarativeBase, declared_attr, Mapped, mapped_column
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs, AsyncEngine
+from sqlalchemy.orm import DeclarativeBase, declared_attr, Mapped, mapped_column, Session
 
-from core.config import get_place_db_url
+from core.config import settings, get_place_db_url, get_place_db_replica_url
+from core.metrics import instrument_engine
+from infrastructure.database.usage import DatabaseUsage
 
 DATABASE_URL = get_place_db_url()
+REPLICA_DATABASE_URL = get_place_db_replica_url()
 
-engine = create_async_engine(DATABASE_URL)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+# Пометка сессии: чтения направляются в реплику (см. session.read_replica)
+USE_REPLICA = "use_replica"
+
+
+def create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # кэш asyncpg на соединении и кэш подготовленных выражений диалекта SQLAlchemy
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+
+engine = create_engine(DATABASE_URL)
+# Без настроенной реплики её роль играет основная БД — маршрутизация работает так же
+replica_engine = create_engine(REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL else engine
+
+
+class RoutingSession(Session):
+    """
+    Сессия, выбирающая БД для каждого запроса.
+
+    Чтения в сессии, помеченной read_replica, идут в реплику; запись (flush
+    и INSERT/UPDATE/DELETE) и всё остальное — в основную БД.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get(USE_REPLICA) and not self._flushing and not getattr(clause, "is_dml", False):
+            return replica_engine.sync_engine
+        return engine.sync_engine
+
+
+async_session_maker = async_sessionmaker(sync_session_class=RoutingSession, expire_on_commit=False)
+
+# учёт соединений из пула по маршрутам
+db_usage = DatabaseUsage()
+db_usage.register(engine.sync_engine)
+instrument_engine(engine.sync_engine)
+if replica_engine is not engine:
+    db_usage.register(replica_engine.sync_engine)
+    instrument_engine(replica_engine.sync_engine)
 
 # кастомные шаблоны для описания колонок в SQLAlchemy
 int_pk = Annotated[int, mapped_column(primary_key=True, index=True)]
@@ -4,3 +4,5 @@ from .user_trip import UserTrip
 from .user_place_history import UserPlaceHistory
 from .user_visit_history import UserVisit
 from .user_place_review import UserPlaceReview
+from .user_preference_profile import UserPreferenceProfile
+from .place_review_stat import PlaceReviewStat
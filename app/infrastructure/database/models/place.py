@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List
+from typing import List, Optional
 
 from sqlalchemy import ForeignKey, Text, String, Numeric, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
@@ -28,9 +28,12 @@ class Place(Base):
         address (str): Адрес места.
         category (str): Категория места (еда, достопримечательность, магазин и т.д.).
         external_id (Optional[str]): Идентификатор из внешнего API (например, 2GIS).
+        geohash (Optional[str]): Geohash координат места для поиска по гео-индексу.
         ratings (List[Rating]): Список рейтингов, связанных с этим местом.
         reviews (List[Review]): Отзывы, полученные из внешнего API.
         user_reviews (List[UserPlaceReview]): Отзывы, оставленные пользователями.
+        review_stats (Optional[PlaceReviewStat]): Агрегаты отзывов пользователей; загружается
+            только явно (joinedload), иначе None.
     """
     id: Mapped[int_pk]
     name: Mapped[str]
@@ -39,13 +42,17 @@ class Place(Base):
     address: Mapped[str] = mapped_column(Text, nullable=False)
     category: Mapped[str] = mapped_column(String, nullable=False)
     external_id: Mapped[str_null_true]  # ID из внешнего API
+    # collation "C" — побайтовое сравнение, чтобы префикс ячейки искался диапазоном по индексу
+    geohash: Mapped[Optional[str]] = mapped_column(String(12, collation="C"), nullable=True)
     ratings: Mapped[List["Rating"]] = relationship("Rating", back_populates="place")
     reviews: Mapped[List["Review"]] = relationship("Review", back_populates="place")
     user_reviews: Mapped[List["UserPlaceReview"]] = relationship("UserPlaceReview", back_populates="place")
+    review_stats: Mapped[Optional["PlaceReviewStat"]] = relationship("PlaceReviewStat", uselist=False, lazy="noload")
 
     __table_args__ = (
-        Index("idx_latitude", "latitude"),
-        Index("idx_longitude", "longitude"),
+        Index("idx_places_category_geohash", "category", "geohash"),
+        # ключ upsert мест из внешних API; места без external_id (NULL) не ограничиваются
+        Index("uq_places_external_id", "external_id", unique=True),
     )
 
     def __repr__(self):
@@ -74,6 +81,11 @@ class Rating(Base):
     place_id: Mapped[int] = mapped_column(ForeignKey("places.id"), nullable=False)
     place: Mapped["Place"] = relationship("Place", back_populates="ratings")
 
+    __table_args__ = (
+        # один рейтинг места от каждого источника — ключ upsert рейтингов
+        Index("uq_ratings_place_id_source", "place_id", "source", unique=True),
+    )
+
     def __repr__(self):
         return (f"{self.__class__.__name__}("
                 f"id={self.id!r}, "
@@ -0,0 +1,39 @@
+from typing import List
+
+from sqlalchemy import Column, Integer, Float, ForeignKey
+
+from ..base import Base
+
+# Оценки пользовательских отзывов — от 1 до 5
+REVIEW_RATINGS = range(1, 6)
+
+
+class PlaceReviewStat(Base):
+    """
+    Агрегаты пользовательских отзывов о месте.
+
+    Обновляются в той же транзакции, что и сами отзывы, поэтому списки мест
+    и рекомендации получают среднюю оценку и число отзывов без агрегирующих
+    запросов по userplacereviews.
+
+    Атрибуты:
+        place_id (int): Идентификатор места.
+        review_count (int): Количество отзывов.
+        rating_sum (int): Сумма оценок.
+        rating_mean (Optional[float]): Средняя оценка (None, если отзывов нет).
+        rating_1 … rating_5 (int): Количество отзывов с каждой оценкой.
+    """
+    place_id = Column(Integer, ForeignKey("places.id", ondelete="CASCADE"), primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_mean = Column(Float, nullable=True)
+    rating_1 = Column(Integer, nullable=False, default=0)
+    rating_2 = Column(Integer, nullable=False, default=0)
+    rating_3 = Column(Integer, nullable=False, default=0)
+    rating_4 = Column(Integer, nullable=False, default=0)
+    rating_5 = Column(Integer, nullable=False, default=0)
+
+    @property
+    def histogram(self) -> List[int]:
+        """Количество отзывов с оценками 1, 2, 3, 4, 5."""
+        return [getattr(self, f"rating_{rating}") for rating in REVIEW_RATINGS]
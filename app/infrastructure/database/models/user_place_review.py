@@ -1,4 +1,4 @@
-from sqlalchemy import String, Column, Integer, ForeignKey
+from sqlalchemy import String, Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from ..base import Base
@@ -16,6 +16,11 @@ class UserPlaceReview(Base):
         user (User): Ссылка на пользователя.
         place (Place): Ссылка на место.
     """
+    __table_args__ = (
+        # постраничный вывод по курсору (created_at, id)
+        Index("ix_userplacereviews_created_at_id", "created_at", "id"),
+    )
+
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'))
     place_id = Column(Integer, ForeignKey('places.id'))
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
+
+from ..base import Base
+
+
+class UserPreferenceProfile(Base):
+    """
+    Предрассчитанный профиль предпочтений пользователя для рекомендаций.
+
+    Обновляется инкрементально при записи посещений и отзывов, история мест
+    учитывается при построении профиля, поэтому рекомендации не загружают
+    всю историю пользователя.
+
+    Атрибуты:
+        user_id (int): Идентификатор пользователя.
+        category_weights (dict): Вес категорий — сколько раз места категории понравились пользователю.
+        rating_count (int): Количество оценок в истории.
+        rating_sum (float): Сумма оценок в истории.
+        rating_min (Optional[float]): Минимальная оценка в истории.
+        visited_filter (bytes): Фильтр Блума внешних ID мест из истории.
+        seen_filter (bytes): Фильтр Блума внешних ID мест из посещений.
+    """
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    category_weights = Column(JSONB, nullable=False, default=dict)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0.0)
+    rating_min = Column(Float, nullable=True)
+    visited_filter = Column(LargeBinary, nullable=False)
+    seen_filter = Column(LargeBinary, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Float
 from sqlalchemy.orm import relationship
 from ..base import Base
 
@@ -12,11 +12,17 @@ class UserTrip(Base):
         user_id (int): Идентификатор пользователя.
         destination (str): Пункт назначения.
         category (Optional[str]): Категория предпочтений (еда, шопинг, достопримечательности).
+        latitude (Optional[float]): Широта точки поиска.
+        longitude (Optional[float]): Долгота точки поиска.
+        geohash (Optional[str]): Geohash точки поиска, по его префиксам считаются популярные районы.
         user (User): Ссылка на пользователя.
     """
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     destination = Column(String, nullable=False)
     category = Column(String, nullable=True)  # еда / шопинг / достопримечательности
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String(12, collation="C"), nullable=True)
 
     user = relationship("User", backref="trips")
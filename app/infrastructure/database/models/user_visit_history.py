@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from ..base import Base
@@ -29,3 +29,8 @@ class UserVisit(Base):
     category = Column(String, nullable=True)
 
     user = relationship("User", backref="visits")
+
+    __table_args__ = (
+        # Повторные рекомендации того же места не создают новых записей
+        UniqueConstraint("user_id", "external_id", name="uq_uservisits_user_external"),
+    )
@@ -0,0 +1,23 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure.database.base import USE_REPLICA
+
+
+@contextmanager
+def read_replica(session: AsyncSession) -> Iterator[AsyncSession]:
+    """
+    Направить чтения сессии внутри блока в реплику.
+
+    Подходит только для запросов, которым допустимо небольшое отставание
+    реплики: запись внутри блока всё равно уходит в основную БД.
+    """
+    previous = session.info.get(USE_REPLICA, False)
+    session.info[USE_REPLICA] = True
+    try:
+        yield session
+    finally:
+        session.info[USE_REPLICA] = previous
+
@@ -0,0 +1,89 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Счётчики текущего HTTP-запроса; None — работа вне запроса (фоновые задачи)
+_request_usage: ContextVar[Optional[Dict[str, float]]] = ContextVar("db_request_usage", default=None)
+
+BACKGROUND_ROUTE = "background"
+
+
+def _new_usage() -> Dict[str, float]:
+    return {"checkouts": 0, "held_ms": 0.0}
+
+
+class DatabaseUsage:
+    """
+    Учёт соединений Postgres по маршрутам.
+
+    События пула checkout/checkin привязываются к текущему HTTP-запросу через
+    contextvar, а после ответа счётчики запроса складываются в статистику его
+    маршрута: сколько запросов было, сколько из них брали соединение, сколько
+    раз и как долго соединения были заняты. Соединения фоновых задач
+    учитываются под маршрутом "background".
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, Dict[str, float]] = {}
+        self._background = _new_usage()
+        self._pools = []
+
+    def register(self, engine: Engine) -> None:
+        """
+        Подписаться на события пула синхронного движка (engine.sync_engine для async).
+        """
+        self._pools.append(engine.pool)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def start_request(self):
+        """
+        Начать учёт запроса; возвращает токен для finish_request.
+        """
+        return _request_usage.set(_new_usage())
+
+    def finish_request(self, token, route: str) -> Dict[str, float]:
+        """
+        Завершить учёт запроса и добавить его счётчики к маршруту.
+
+        :return: Счётчики этого запроса.
+        """
+        usage = _request_usage.get()
+        _request_usage.reset(token)
+
+        totals = self.routes.setdefault(
+            route, {"requests": 0, "db_requests": 0, "checkouts": 0, "held_ms": 0.0}
+        )
+        totals["requests"] += 1
+        if usage["checkouts"]:
+            totals["db_requests"] += 1
+        totals["checkouts"] += usage["checkouts"]
+        totals["held_ms"] += usage["held_ms"]
+        return usage
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        usage = _request_usage.get()
+        if usage is None:
+            usage = self._background
+        usage["checkouts"] += 1
+        # Соединение вернётся в пул, возможно, уже из другого контекста —
+        # поэтому счётчики запроса запоминаются в самой записи пула
+        connection_record.info["usage"] = (usage, time.perf_counter())
+
+    @staticmethod
+    def _on_checkin(dbapi_connection, connection_record) -> None:
+        checked_out = connection_record.info.pop("usage", None)
+        if checked_out is not None:
+            usage, started_at = checked_out
+            usage["held_ms"] += (time.perf_counter() - started_at) * 1000
+
+    def stats(self) -> Dict[str, Any]:
+        routes = dict(self.routes)
+        routes[BACKGROUND_ROUTE] = dict(self._background)
+        return {
+            "checked_out": sum(pool.checkedout() for pool in self._pools),
+            "routes": routes,
+        }
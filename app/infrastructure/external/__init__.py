@@ -1,2 +1,4 @@
+from .http_pool import UpstreamHttpClient
 from .opentripmap_client import OpenTripMapClient
-from .nominatim_client import NominatimClient
\ No newline at end of file
+from .nominatim_client import NominatimClient
+from .foursquare_client import FoursquareClient
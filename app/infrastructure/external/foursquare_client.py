@@ -1,24 +1,16 @@
 import logging
-import os
 from typing import Dict, Any, Optional
 
 import httpx
-from dotenv import load_dotenv
 from fastapi import HTTPException
 from httpx import Timeout
 
+from infrastructure.cache.single_flight import SingleFlight, make_key
+from .http_pool import UpstreamHttpClient
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-FOURSQUARE_API_KEY = os.getenv("FOURSQUARE_API_KEY")
-FOURSQUARE_INTEGRATION_URL = os.getenv("FOURSQUARE_URL")
-
-HEADERS = {
-    "Authorization": FOURSQUARE_API_KEY,
-    "Accept": "application/json"
-}
-
 # список предустановленных категорий
 _CODE_MAPPING = {
     "Restaurants": "13065",
@@ -27,6 +19,8 @@ _CODE_MAPPING = {
     "Arts & Entertainment": "16000",
 }
 
+FOURSQUARE_MAX_LIMIT = 50  # максимальный размер страницы Foursquare Places API
+
 PRODUCTION_TIMEOUTS = {
     "connect": 3.0,  # Таймаут на установку соединения
     "read": 10.0,  # Таймаут на чтение ответа
@@ -34,37 +28,51 @@ PRODUCTION_TIMEOUTS = {
     "pool": 2.0  # Таймаут ожидания свободного соединения из пула
 }
 
-CONNECTION_LIMITS = httpx.Limits(
-    max_connections=100,  # Общий лимит соединений
-    max_keepalive_connections=20  # Долгоживущие соединения
-)
-
-async def search_places(params: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Поиск мест через Foursquare API с обработкой ошибок и таймаутом
-    """
-    if not all([FOURSQUARE_API_KEY, FOURSQUARE_INTEGRATION_URL]):
-        logger.error("Не настроены обязательные переменные окружения для Foursquare API")
-        raise HTTPException(
-            status_code=500,
-            detail="Service configuration error"
-        )
-
-    timeout = Timeout(**PRODUCTION_TIMEOUTS)
-
-    async with httpx.AsyncClient(
-            timeout=timeout,
-            limits=CONNECTION_LIMITS,
-            transport=httpx.AsyncHTTPTransport(retries=2)  # 2 попытки ретрая
-    ) as client:
+
+class FoursquareClient:
+    def __init__(
+            self,
+            http: UpstreamHttpClient,
+            api_key: Optional[str],
+            base_url: Optional[str],
+            single_flight: Optional[SingleFlight] = None
+    ):
+        self.http = http
+        self.api_key = api_key
+        self.base_url = base_url
+        self.single_flight = single_flight
+        self.headers = {
+            "Authorization": api_key or "",
+            "Accept": "application/json"
+        }
+
+    async def search_places(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Поиск мест через Foursquare API, одинаковые одновременные запросы объединяются
+        """
+        if self.single_flight is None:
+            return await self._search_places(params)
+        return await self.single_flight.do(make_key(params), lambda: self._search_places(params))
+
+    async def _search_places(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Поиск мест через Foursquare API с обработкой ошибок и таймаутом
+        """
+        if not all([self.api_key, self.base_url]):
+            logger.error("Не настроены обязательные переменные окружения для Foursquare API")
+            raise HTTPException(
+                status_code=500,
+                detail="Service configuration error"
+            )
+
         try:
             # Запрос с отдельным таймаутом для поиска (меньше чем read timeout)
-            response = await client.get(
-                FOURSQUARE_INTEGRATION_URL,
-                headers=HEADERS,
+            response = await self.http.get(
+                self.base_url,
+                headers=self.headers,
                 params=params,
                 timeout=Timeout(8.0)
-            )# Специфичный таймаут для этого API
+            )  # Специфичный таймаут для этого API
 
             response.raise_for_status()
             return response.json()
@@ -83,6 +91,13 @@ async def search_places(params: Dict[str, Any]) -> Dict[str, Any]:
                 detail="Foursquare API response timeout"
             )
 
+        except httpx.PoolTimeout:
+            logger.error("Нет свободных соединений в пуле Foursquare API")
+            raise HTTPException(
+                status_code=503,
+                detail="Service temporarily unavailable"
+            )
+
         except httpx.HTTPStatusError as e:
             logger.error(f"Ошибка Foursquare API: {e.response.status_code}")
             raise HTTPException(
@@ -106,7 +121,7 @@ async def search_places(params: Dict[str, Any]) -> Dict[str, Any]:
 
 def foursquare_category_id(category: str) -> Optional[str]:
     """Возвращает ID категории Foursquare API для данного значения"""
-    return _CODE_MAPPING[category]
+    return _CODE_MAPPING.get(category)
 
 def parse_place_item(item: Dict[str, Any], min_rating: Optional[float]) -> Optional[Dict[str, Any]]:
     """Извлечь данные о месте, если оно соответствует требованиям"""
@@ -127,16 +142,6 @@ def parse_place_item(item: Dict[str, Any], min_rating: Optional[float]) -> Optio
         "name": name,
         "latitude": geocode.get("latitude"),
         "longitude": geocode.get("longitude"),
-        "address": address
+        "address": address,
+        "rating": rating
     }
-
-def prepare_new_ratings(ratings_buffer, inserted_places) -> list[Dict[str, Any]]:
-    """Подготовить список новых рейтингов, соответствующих вставленным местам"""
-    return [
-        {
-            "source": r["source"],
-            "rating": r["rating"],
-            "place_id": inserted_places[r["external_id"]],
-        }
-        for r in ratings_buffer if r["external_id"] in inserted_places
-    ]
\ No newline at end of file
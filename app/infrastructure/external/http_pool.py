@@ -0,0 +1,106 @@
+import importlib.util
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from loguru import logger
+
+from core.metrics import upstream_latency
+
+# HTTP/2 в httpx работает только при установленном пакете h2 (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class UpstreamHttpClient:
+    """
+    Долгоживущий пул соединений к одному внешнему API.
+
+    Создаётся один раз в lifespan приложения, поэтому keep-alive соединения
+    переиспользуются между запросами и не требуют нового TCP+TLS рукопожатия.
+    Дополнительно считает параллелизм: сколько запросов выполняется сейчас,
+    пиковое значение и сколько запросов начато сверх max_connections, — и
+    пишет время запросов в гистограмму upstream_request_duration_seconds.
+
+    Запрос сверх лимита при HTTP/1.1 ждёт свободного соединения, а при HTTP/2
+    может выполняться без ожидания в уже открытом соединении, поэтому
+    over_limit_total — сигнал о нагрузке выше лимита, а не число ожиданий пула.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            max_connections: int,
+            max_keepalive_connections: int,
+            timeout: httpx.Timeout,
+            keepalive_expiry: float = 30.0,
+            retries: int = 2,
+            http2: bool = True,
+            headers: Optional[Dict[str, str]] = None,
+    ):
+        self.name = name
+        self.max_connections = max_connections
+        self.http2 = http2 and HTTP2_AVAILABLE
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # При явном transport лимиты клиента игнорируются, поэтому передаём их в transport
+        transport = httpx.AsyncHTTPTransport(limits=limits, http2=self.http2, retries=retries)
+        self.client = httpx.AsyncClient(timeout=timeout, headers=headers, transport=transport)
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests_total = 0
+        self.over_limit_total = 0
+        self.errors_total = 0
+        self._latency_ok, self._latency_error = upstream_latency(name)
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Выполнить запрос через общий пул с учётом его загрузки.
+        """
+        self.in_flight += 1
+        self.requests_total += 1
+        if self.in_flight > self.peak_in_flight:
+            self.peak_in_flight = self.in_flight
+        if self.in_flight > self.max_connections:
+            # Параллельных запросов больше лимита соединений (ожидание пула — только при HTTP/1.1)
+            if self.over_limit_total == 0:
+                logger.warning(f"Запросов к {self.name} больше лимита соединений ({self.max_connections})")
+            self.over_limit_total += 1
+        started = time.perf_counter()
+        latency = self._latency_error
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            latency = self._latency_ok
+            return response
+        except httpx.HTTPError:
+            self.errors_total += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            latency.observe(time.perf_counter() - started)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Текущие метрики загрузки пула.
+        """
+        return {
+            "name": self.name,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "load": self.in_flight / self.max_connections if self.max_connections else 0.0,
+            "requests_total": self.requests_total,
+            "over_limit_total": self.over_limit_total,
+            "errors_total": self.errors_total,
+        }
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
@@ -1,8 +1,13 @@
-import httpx
+from .http_pool import UpstreamHttpClient
+from .rate_limiter import AsyncRateLimiter
+
 
 class NominatimClient:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, http: UpstreamHttpClient, requests_per_second: float = 1.0):
         self.base_url = base_url
+        self.http = http
+        # Политика использования Nominatim: не более 1 запроса в секунду
+        self.rate_limiter = AsyncRateLimiter(requests_per_second)
 
     async def reverse_geocode(self, lat: float, lon: float) -> str:
         url = f"{self.base_url}/reverse"
@@ -16,8 +21,8 @@ class NominatimClient:
         headers = {
             "User-Agent": "TravelCompanion/1.0"
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("display_name", f"{lat}, {lon}")
+        async with self.rate_limiter:
+            response = await self.http.get(url, params=params, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("display_name", f"{lat}, {lon}")
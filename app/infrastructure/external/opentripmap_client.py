@@ -1,23 +1,37 @@
 import httpx
-from typing import List
+from typing import List, Optional
 from loguru import logger
 from domain.dto.hotel_dto import Hotel
+from infrastructure.cache.single_flight import SingleFlight, make_key
+from .http_pool import UpstreamHttpClient
 
 class OpenTripMapClient:
-    def __init__(self, api_key: str, base_url: str):
+    def __init__(
+            self,
+            api_key: str,
+            base_url: str,
+            http: UpstreamHttpClient,
+            single_flight: Optional[SingleFlight] = None
+    ):
         self.api_key = api_key
         self.base_url = base_url
+        self.http = http
+        self.single_flight = single_flight
 
     async def search_hotels(self, params: dict) -> List[Hotel]:
         """
-        Запрос к OpenTripMap API для поиска отелей
+        Запрос к OpenTripMap API для поиска отелей, одинаковые одновременные запросы объединяются
         """
+        if self.single_flight is None:
+            return await self._search_hotels(params)
+        return await self.single_flight.do(make_key(params), lambda: self._search_hotels(params))
+
+    async def _search_hotels(self, params: dict) -> List[Hotel]:
         url = f"{self.base_url}/ru/places/autosuggest"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                return response.json()
+            response = await self.http.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPStatusError as e:
             logger.error(f"Ошибка при запросе к OpenTripMap API: {e}")
             raise e
@@ -0,0 +1,31 @@
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Ограничение частоты запросов к внешнему API в пределах процесса.
+
+    Запросы выстраиваются в очередь и выпускаются не чаще, чем раз в 1 / rate секунд.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._lock = asyncio.Lock()
+        self._next_allowed = 0.0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_allowed - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+                now = time.monotonic()
+            self._next_allowed = now + self.interval
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
@@ -0,0 +1 @@
+from .trip_queue import TripEvent, MemoryTripQueue, RedisStreamTripQueue
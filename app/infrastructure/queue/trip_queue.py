@@ -0,0 +1,242 @@
+import asyncio
+import os
+import socket
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Deque, List, Optional, Tuple
+
+from loguru import logger
+
+from infrastructure.cache.redis_service import RedisService
+
+
+@dataclass
+class TripEvent:
+    """
+    Событие поиска, из которого фоново создаётся запись UserTrip.
+
+    Attributes:
+        user_id: ID пользователя.
+        latitude: Широта точки поиска.
+        longitude: Долгота точки поиска.
+        category: Категория поиска.
+        created_at: Время поиска (UTC, без часового пояса).
+        attempts: Неудачных попыток записи (ведёт очередь в памяти).
+    """
+    user_id: int
+    latitude: float
+    longitude: float
+    category: Optional[str]
+    created_at: datetime
+    attempts: int = 0
+
+
+class MemoryTripQueue:
+    """
+    Очередь событий поездок в памяти процесса.
+
+    Пачка, которую не удалось записать, возвращается через retry() и выдаётся
+    раньше новых событий; после max_attempts неудачных попыток события
+    отбрасываются и учитываются в счётчике discarded.
+    """
+
+    def __init__(self, maxsize: int, max_attempts: int = 5):
+        self._queue: "asyncio.Queue[TripEvent]" = asyncio.Queue(maxsize=maxsize)
+        self._retry: Deque[TripEvent] = deque()
+        self.max_attempts = max_attempts
+        self.discarded = 0
+
+    async def put(self, event: TripEvent) -> bool:
+        """
+        Добавить событие без ожидания. Возвращает False, если очередь заполнена.
+        """
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def get_batch(self, max_items: int, timeout: float) -> List[Tuple[Optional[str], TripEvent]]:
+        """
+        Дождаться хотя бы одного события и забрать до max_items накопленных за timeout секунд.
+        """
+        batch = []
+        while self._retry and len(batch) < max_items:
+            batch.append((None, self._retry.popleft()))
+
+        if not batch:
+            try:
+                batch.append((None, await asyncio.wait_for(self._queue.get(), timeout=timeout)))
+            except asyncio.TimeoutError:
+                return []
+
+        while len(batch) < max_items:
+            try:
+                batch.append((None, self._queue.get_nowait()))
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def ack(self, ids: List[str]) -> None:
+        return None
+
+    async def retry(self, batch: List[Tuple[Optional[str], TripEvent]]) -> None:
+        """
+        Вернуть незаписанную пачку в очередь или отбросить события, исчерпавшие попытки.
+        """
+        discarded = 0
+        for _, event in batch:
+            event.attempts += 1
+            if event.attempts >= self.max_attempts:
+                discarded += 1
+            else:
+                self._retry.append(event)
+        if discarded:
+            self.discarded += discarded
+            logger.error(f"Отброшено событий поездок после {self.max_attempts} неудачных попыток записи: {discarded}")
+
+
+class RedisStreamTripQueue:
+    """
+    Надёжная очередь событий поездок на Redis Streams.
+
+    События подтверждаются (XACK) только после записи в базу. Неподтверждённые
+    дольше claim_idle секунд — пачки с неудачной записью и события упавших
+    воркеров — любой воркер группы раз в claim_idle секунд забирает себе
+    (XCLAIM) и записывает заново. События, доставленные max_attempts раз,
+    подтверждаются без записи и учитываются в счётчике discarded.
+    Длина стрима ограничена maxlen — при переполнении Redis вытесняет старые события.
+    """
+
+    def __init__(
+            self,
+            redis: RedisService,
+            maxlen: int,
+            max_attempts: int = 5,
+            claim_idle: float = 60.0,
+            stream: str = "trips:events",
+            group: str = "trip-recorder",
+    ):
+        self.redis = redis
+        self.maxlen = maxlen
+        self.max_attempts = max_attempts
+        self.claim_idle = claim_idle
+        self.stream = stream
+        self.group = group
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._group_ready = False
+        self._next_claim = 0.0
+        self.discarded = 0
+
+    async def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            async with self.redis.client() as client:
+                await client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            # BUSYGROUP — группа уже создана другим воркером
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def put(self, event: TripEvent) -> bool:
+        try:
+            async with self.redis.client() as client:
+                await client.xadd(
+                    self.stream,
+                    {
+                        "user_id": event.user_id,
+                        "latitude": event.latitude,
+                        "longitude": event.longitude,
+                        "category": event.category or "",
+                        "created_at": event.created_at.isoformat(),
+                    },
+                    maxlen=self.maxlen,
+                    approximate=True,
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при добавлении события поездки в Redis: {e}")
+            return False
+
+    async def get_batch(self, max_items: int, timeout: float) -> List[Tuple[Optional[str], TripEvent]]:
+        await self._ensure_group()
+
+        if time.monotonic() >= self._next_claim:
+            messages = await self._claim_idle(max_items)
+            # Полная пачка — возможно, зависших событий больше: проверим снова на следующем вызове
+            self._next_claim = 0.0 if len(messages) >= max_items else time.monotonic() + self.claim_idle
+            if messages:
+                return await self._events(messages)
+
+        async with self.redis.client() as client:
+            response = await client.xreadgroup(
+                self.group,
+                self.consumer,
+                streams={self.stream: ">"},
+                count=max_items,
+                block=int(timeout * 1000),
+            )
+        return await self._events(response[0][1] if response else [])
+
+    async def _claim_idle(self, max_items: int) -> list:
+        """
+        Забрать события группы, не подтверждённые дольше claim_idle секунд.
+        """
+        idle_ms = int(self.claim_idle * 1000)
+        # XPENDING ... IDLE: только зависшие события любых потребителей, включая упавших
+        async with self.redis.client() as client:
+            pending = await client.execute_command(
+                "XPENDING", self.stream, self.group, "IDLE", idle_ms, "-", "+", max_items
+            )
+        exhausted = [message_id for message_id, _, _, delivered in pending if int(delivered) >= self.max_attempts]
+        stale = [message_id for message_id, _, _, delivered in pending if int(delivered) < self.max_attempts]
+
+        if exhausted:
+            await self.ack(exhausted)
+            self.discarded += len(exhausted)
+            logger.error(
+                f"Отброшено событий поездок после {self.max_attempts} попыток записи: {len(exhausted)}"
+            )
+        if not stale:
+            return []
+
+        # XCLAIM повторно проверяет простой, поэтому одно событие не заберут два воркера сразу
+        async with self.redis.client() as client:
+            claimed = await client.xclaim(self.stream, self.group, self.consumer, idle_ms, stale)
+        logger.warning(f"Повторная доставка неподтверждённых событий поездок: {len(claimed)}")
+        return [(message_id, fields) for message_id, fields in claimed if message_id is not None]
+
+    async def _events(self, messages: list) -> List[Tuple[Optional[str], TripEvent]]:
+        # Неподтверждённые события, вытесненные по maxlen, приходят без полей
+        trimmed = [message_id for message_id, fields in messages if not fields]
+        await self.ack(trimmed)
+
+        return [
+            (
+                message_id,
+                TripEvent(
+                    user_id=int(fields["user_id"]),
+                    latitude=float(fields["latitude"]),
+                    longitude=float(fields["longitude"]),
+                    category=fields["category"] or None,
+                    created_at=datetime.fromisoformat(fields["created_at"]),
+                ),
+            )
+            for message_id, fields in messages if fields
+        ]
+
+    async def ack(self, ids: List[str]) -> None:
+        if ids:
+            async with self.redis.client() as client:
+                await client.xack(self.stream, self.group, *ids)
+
+    async def retry(self, batch: List[Tuple[Optional[str], TripEvent]]) -> None:
+        """
+        Незаписанная пачка остаётся неподтверждённой: через claim_idle секунд её
+        снова заберёт _claim_idle этого или другого воркера.
+        """
+        return None
@@ -4,60 +4,197 @@ import uvicorn
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from core.dependencies import get_current_user
-from infrastructure.cache.redis_service import RedisService
-from core.logger import logger
+from core.metrics import StatsCollector, UNMATCHED_ROUTE, observe_request
+from core.services import (create_redis, create_http_clients, create_single_flights, create_upstream_services,
+                           create_trip_queue, create_hotel_popularity, create_cache_warmer)
+from infrastructure.cache.principal_cache import PrincipalCache
+from infrastructure.database.base import async_session_maker, db_usage, engine, replica_engine
+from domain.dto.principal_dto import Principal
+from domain.services.trip_recorder import TripRecorder
+from core.logger import logger, should_log_request
 from core.config import settings, SERVICE_PORT
 from api.routers import *
-from infrastructure.database.models import User
 
 logger.info("Приложение запущено")
 logger.debug("Это отладочное сообщение")
 
 
-# Логирование всех HTTP-запросов — метод, путь, статус-код, время выполнения и IP клиента
+# Логирование HTTP-запросов — метод, путь, статус-код, время выполнения и IP клиента.
+# Поля записи передаются в extra (JSON-лог), успешные запросы логируются с долей из настроек
 class LoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         start_time = time.perf_counter()
         response = await call_next(request)
         process_time = (time.perf_counter() - start_time) * 1000  # в миллисекундах
 
-        client_ip = request.client.host if request.client else "unknown"
-        logger.info(
-            f"{request.method} {request.url.path} - {response.status_code} "
-            f"({process_time:.2f}ms) от {client_ip}"
-        )
+        route = request.scope.get("route")
+        route_path = route.path if route else UNMATCHED_ROUTE
+        if should_log_request(route_path, response.status_code, process_time):
+            logger.info(
+                "{method} {path} - {status} ({duration_ms:.2f}ms) от {client_ip}",
+                method=request.method,
+                path=request.scope["path"],
+                route=route_path,
+                status=response.status_code,
+                duration_ms=process_time,
+                client_ip=request.client.host if request.client else "unknown",
+            )
         return response
 
 
+# Учёт соединений Postgres по маршрутам — какие эндпоинты действительно обращаются к БД.
+# ASGI-middleware без BaseHTTPMiddleware: учёт завершается после отправки всего тела,
+# поэтому соединения потоковых ответов (NDJSON) тоже относятся к своему маршруту
+class DatabaseUsageMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = db_usage.start_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            usage = db_usage.finish_request(token, route.path if route else UNMATCHED_ROUTE)
+            if usage["checkouts"]:
+                logger.debug(
+                    "{method} {path}: соединений БД {db_checkouts}, занято {db_held_ms:.2f}ms",
+                    method=scope["method"],
+                    path=scope["path"],
+                    db_checkouts=usage["checkouts"],
+                    db_held_ms=usage["held_ms"],
+                )
+
+
+# Гистограмма времени запросов по шаблону маршрута для /metrics
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # маршрут в scope появляется после роутинга; шаблон пути, а не сам путь, — чтобы не плодить метки
+            route = scope.get("route")
+            observe_request(
+                scope["method"], route.path if route else UNMATCHED_ROUTE, status_code,
+                time.perf_counter() - start_time
+            )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    redis = RedisService(settings.REDIS_URL)
+    redis = create_redis()
+    http_clients = create_http_clients()
+    single_flights = create_single_flights(redis)
+    engines = [("primary", engine.sync_engine)]
+    if replica_engine is not engine:
+        engines.append(("replica", replica_engine.sync_engine))
+    stats_collector = StatsCollector(app.state, engines, db_usage)
+    stats_collector.register()
     try:
         await redis.connect()
         # сохраняем в state
         app.state.redis = redis
+        redis.start_invalidation_listener()
         logger.info("Redis подключён")
+
+        app.state.principal_cache = PrincipalCache(redis, ttl=settings.AUTH_USER_CACHE_TTL)
+        app.state.principal_cache.register()
+
+        app.state.http_clients = http_clients
+        app.state.single_flights = single_flights
+        services = create_upstream_services(redis, http_clients, single_flights)
+        for name, service in services.items():
+            setattr(app.state, name, service)
+
+        app.state.hotel_popularity = create_hotel_popularity(redis)
+        app.state.hotel_popularity.start()
+
+        trip_recorder = TripRecorder(
+            queue=create_trip_queue(redis),
+            session_maker=async_session_maker,
+            geocoder=app.state.reverse_geocoder,
+            batch_size=settings.TRIP_QUEUE_BATCH_SIZE,
+            flush_interval=settings.TRIP_QUEUE_FLUSH_INTERVAL,
+            stop_timeout=settings.TRIP_QUEUE_STOP_TIMEOUT
+        )
+        trip_recorder.start()
+        app.state.trip_recorder = trip_recorder
+
+        if settings.CACHE_WARMER_ENABLED:
+            app.state.cache_warmer = create_cache_warmer(redis, services)
+            app.state.cache_warmer.start()
         yield
     finally:
+        stats_collector.unregister()
+        if getattr(app.state, "principal_cache", None):
+            app.state.principal_cache.unregister()
+            logger.info(f"Статистика кэша пользователей: {app.state.principal_cache.stats()}")
+        if getattr(app.state, "cache_warmer", None):
+            await app.state.cache_warmer.stop()
+        if getattr(app.state, "hotel_popularity", None):
+            await app.state.hotel_popularity.stop()
+            logger.info(f"Статистика популярности отелей: {app.state.hotel_popularity.stats()}")
+        if getattr(app.state, "trip_recorder", None):
+            await app.state.trip_recorder.stop()
+            logger.info(f"Статистика записи поездок: {app.state.trip_recorder.stats()}")
+        if getattr(app.state, "foursquare_cache", None):
+            await app.state.foursquare_cache.close()
+            logger.info(f"Статистика кэша Foursquare: {app.state.foursquare_cache.stats()}")
+        for single_flight in single_flights.values():
+            logger.info(f"Объединение запросов {single_flight.name}: {single_flight.stats()}")
+        for client in http_clients.values():
+            logger.info(f"Статистика пула {client.name}: {client.stats()}")
+            await client.aclose()
+        logger.info(f"Статистика соединений БД: {db_usage.stats()}")
+        logger.info(f"Статистика локального кэша Redis: {redis.stats()}")
         await redis.close()
         logger.info("Redis соединение закрыто")
+        if replica_engine is not engine:
+            await replica_engine.dispose()
+        await engine.dispose()
+        # дописать записи, оставшиеся в очереди логгера
+        await logger.complete()
 
 
 app = FastAPI(
     title="TravelCompanion API",
     description="API для поиска мест, отелей и персональных рекомендаций",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan)
 
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(DatabaseUsageMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Мокаем авторизацию
 if settings.USE_FAKE_AUTH:
-    async def fake_get_current_user() -> User:
-        return User(id=1, username="devuser", email="dev@example.com")
+    async def fake_get_current_user() -> Principal:
+        return Principal(id=1, username="devuser", email="dev@example.com")
 
 
     app.dependency_overrides[get_current_user] = fake_get_current_user
@@ -72,6 +209,7 @@ app.include_router(trip_router)
 app.include_router(user_router)
 app.include_router(visit_router)
 app.include_router(review_router)
+app.include_router(metrics_router)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=SERVICE_PORT, reload=True)
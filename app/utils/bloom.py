@@ -0,0 +1,40 @@
+import hashlib
+from typing import Optional
+
+DEFAULT_SIZE_BITS = 1 << 15  # 4 КБ: ~1% ложных срабатываний на 3000 элементов
+DEFAULT_HASH_COUNT = 5
+
+
+class BloomFilter:
+    """
+    Фильтр Блума фиксированного размера для проверки принадлежности за O(1).
+
+    Может ошибаться только в сторону "элемент есть", удаление не поддерживается.
+    """
+
+    def __init__(
+            self,
+            data: Optional[bytes] = None,
+            size_bits: int = DEFAULT_SIZE_BITS,
+            hash_count: int = DEFAULT_HASH_COUNT
+    ):
+        self.size_bits = size_bits
+        self.hash_count = hash_count
+        self.bits = bytearray(data) if data else bytearray(size_bits // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.bits)
@@ -0,0 +1,49 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_METERS = 6371008.8  # средний радиус Земли
+
+
+def haversine_distances(
+        lat: float,
+        lon: float,
+        lats: Sequence[float],
+        lons: Sequence[float]
+) -> np.ndarray:
+    """
+    Векторизованное расстояние по формуле гаверсинусов (в метрах) от точки до набора точек
+    """
+    lat_rad = np.radians(lat)
+    lats_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    d_lat = lats_rad - lat_rad
+    d_lon = np.radians(np.asarray(lons, dtype=np.float64) - lon)
+
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat_rad) * np.cos(lats_rad) * np.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def nearest_within_radius(
+        lat: float,
+        lon: float,
+        lats: Sequence[float],
+        lons: Sequence[float],
+        radius_meters: float,
+        limit: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Индексы точек внутри радиуса, отсортированные от ближней к дальней, и расстояния до них.
+
+    При заданном limit возвращаются только limit ближайших (top-k через argpartition).
+    """
+    if len(lats) == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+
+    distances = haversine_distances(lat, lon, lats, lons)
+    inside = np.flatnonzero(distances <= radius_meters)
+
+    if limit is not None and limit < inside.size:
+        inside = inside[np.argpartition(distances[inside], limit - 1)[:limit]]
+
+    order = inside[np.argsort(distances[inside], kind="stable")]
+    return order, distances[order]
@@ -0,0 +1,104 @@
+import math
+from typing import List, Optional, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Точность хранимого geohash у мест: 9 символов — ячейка около 5 x 5 метров
+GEOHASH_PRECISION = 9
+
+METERS_PER_DEGREE = 111320.0
+
+
+def encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Закодировать координаты в geohash заданной длины.
+    """
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                bits = bits * 2 + 1
+                lon_lo = mid
+            else:
+                bits = bits * 2
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = bits * 2 + 1
+                lat_lo = mid
+            else:
+                bits = bits * 2
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """
+    Размер ячейки geohash в градусах: (по широте, по долготе).
+    """
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def cell_center(lat: float, lon: float, precision: int) -> Tuple[float, float]:
+    """
+    Центр ячейки geohash заданной точности, в которую попадает точка.
+    """
+    lat_step, lon_step = cell_size(precision)
+    cell_lat = min(math.floor((lat + 90.0) / lat_step), (1 << (precision * 5 // 2)) - 1)
+    cell_lon = math.floor((lon + 180.0) / lon_step) % (1 << ((precision * 5 + 1) // 2))
+    return cell_lat * lat_step - 90.0 + lat_step / 2, cell_lon * lon_step - 180.0 + lon_step / 2
+
+
+def prefix_range(prefix: str) -> Tuple[str, str]:
+    """
+    Границы диапазона строк, начинающихся с префикса (для побайтового сравнения).
+    """
+    # "~" больше любого символа алфавита geohash
+    return prefix, prefix + "~"
+
+
+def cover(lat: float, lon: float, radius_meters: float) -> Optional[List[str]]:
+    """
+    Префиксы geohash, ячейки которых полностью покрывают круг заданного радиуса.
+
+    Выбирается самая длинная точность, при которой ячейка не меньше радиуса,
+    поэтому круг целиком лежит в центральной ячейке и восьми соседних.
+    Возвращает None, если радиус больше любой ячейки и фильтр не нужен.
+    """
+    delta_lat = radius_meters / METERS_PER_DEGREE
+    # Ширина ячейки сужается к полюсу — берём худшую широту внутри круга
+    worst_lat = min(abs(lat) + delta_lat, 89.9)
+    meters_per_lon_degree = METERS_PER_DEGREE * math.cos(math.radians(worst_lat))
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_step, lon_step = cell_size(precision)
+        if lat_step * METERS_PER_DEGREE >= radius_meters and lon_step * meters_per_lon_degree >= radius_meters:
+            break
+    else:
+        return None
+
+    prefixes = set()
+    for d_lat in (-lat_step, 0.0, lat_step):
+        for d_lon in (-lon_step, 0.0, lon_step):
+            cell_lat = max(-90.0, min(90.0, lat + d_lat))
+            cell_lon = (lon + d_lon + 180.0) % 360.0 - 180.0
+            prefixes.add(encode(cell_lat, cell_lon, precision))
+    return sorted(prefixes)
@@ -1,60 +1,125 @@
-import math
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import Row, Select, select, and_, or_, func, Float
+from sqlalchemy.sql.elements import ColumnElement
 from infrastructure.database.models.place import Place, Rating
+from infrastructure.database.models.place_review_stat import PlaceReviewStat, REVIEW_RATINGS
+from infrastructure.database.session import read_replica
+from utils.distance import EARTH_RADIUS_METERS
+from utils.geohash import cover, prefix_range
 
 
-def get_bounding_box(lat: float, lon: float, radius_meters: int):
+def haversine_distance_sql(lat_column, lon_column, lat: float, lon: float) -> ColumnElement:
     """
-    Грубая фильтрация по диапазону
+    SQL-выражение расстояния по формуле гаверсинусов (в метрах) до заданной точки
     """
-    earth_radius = 6378137  # радиус Земли в метрах
-    delta_lat = radius_meters / earth_radius * (180 / math.pi)
-    delta_lon = radius_meters / (earth_radius * math.cos(math.radians(lat))) * (180 / math.pi)
-    return (
-        lat - delta_lat, lat + delta_lat,
-        lon - delta_lon, lon + delta_lon
+    d_lat = func.radians(lat_column - lat) / 2.0
+    d_lon = func.radians(lon_column - lon) / 2.0
+    a = (
+            func.power(func.sin(d_lat), 2)
+            + func.cos(func.radians(lat)) * func.cos(func.radians(lat_column)) * func.power(func.sin(d_lon), 2)
     )
+    return (2 * EARTH_RADIUS_METERS * func.asin(func.least(1.0, func.sqrt(a)))).cast(Float)
 
 
-async def get_local_places(
-        db: AsyncSession,
+def nearby_places_filter(latitude: float, longitude: float, radius: int) -> Tuple[ColumnElement, List[ColumnElement]]:
+    """
+    Выражение расстояния до точки и условия отбора мест в радиусе.
+
+    Префиксы ячеек geohash, покрывающих круг, позволяют отобрать кандидатов
+    по индексу (category, geohash), точный радиус проверяется по расстоянию.
+    """
+    distance = haversine_distance_sql(Place.latitude, Place.longitude, latitude, longitude)
+
+    conditions = [
+        Place.external_id.isnot(None),
+        distance <= radius,
+    ]
+    prefixes = cover(latitude, longitude, radius)
+    if prefixes:
+        conditions.append(or_(*[
+            Place.geohash.between(*prefix_range(prefix)) for prefix in prefixes
+        ]))
+    return distance, conditions
+
+
+# Колонки ответа /search: строки вместо ORM-объектов, без загрузки отношений
+PLACE_ROW_COLUMNS = (
+    Place.id, Place.name, Place.latitude, Place.longitude, Place.address, Place.external_id, Place.category,
+    PlaceReviewStat.review_count, PlaceReviewStat.rating_mean,
+    *(getattr(PlaceReviewStat, f"rating_{rating}") for rating in REVIEW_RATINGS),
+)
+
+
+def local_places_query(
         latitude: float,
         longitude: float,
         radius: int,
         category: str,
-        min_rating: Optional[float] = None
-) -> List[Place]:
-    lat_min, lat_max, lon_min, lon_max = get_bounding_box(latitude, longitude, radius)
-
-    stmt = select(Place).where(
-        and_(
-            Place.latitude.between(lat_min, lat_max),
-            Place.longitude.between(lon_min, lon_max),
-            Place.category == category,
-            Place.external_id.isnot(None)
-        )
+        min_rating: Optional[float] = None,
+        limit: Optional[int] = None
+) -> Select:
+    """
+    Запрос мест категории в радиусе от точки, от ближних к дальним.
+
+    Кандидаты отбираются по индексу (category, geohash) через префиксы ячеек,
+    покрывающих круг, точный радиус, рейтинг и сортировка — в том же запросе.
+    Выбираются только колонки PLACE_ROW_COLUMNS, агрегаты отзывов и
+    расстояние до точки (distance_m).
+    """
+    distance, conditions = nearby_places_filter(latitude, longitude, radius)
+    conditions.append(Place.category == category)
+
+    stmt = (
+        select(*PLACE_ROW_COLUMNS, distance.label("distance_m"))
+        .outerjoin(PlaceReviewStat, PlaceReviewStat.place_id == Place.id)
     )
-    result = await db.execute(stmt)
-    candidates = result.scalars().all()
+    if min_rating is not None:
+        stmt = stmt.join(
+            Rating,
+            and_(Rating.place_id == Place.id, Rating.source == "Foursquare")
+        ).where(Rating.rating >= min_rating)
 
-    if not candidates:
-        return []
+    stmt = stmt.where(and_(*conditions)).order_by(distance)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
 
-    place_ids = [place.id for place in candidates]
 
-    ratings_stmt = select(Rating.place_id, Rating.rating).where(
-        Rating.place_id.in_(place_ids),
-        Rating.source == "Foursquare"
-    )
-    ratings_result = await db.execute(ratings_stmt)
-    rating_map = {row.place_id: row.rating for row in ratings_result}
+async def get_local_places(
+        db: AsyncSession,
+        latitude: float,
+        longitude: float,
+        radius: int,
+        category: str,
+        min_rating: Optional[float] = None,
+        limit: Optional[int] = None
+) -> Sequence[Row]:
+    """
+    Места категории в радиусе от точки, от ближних к дальним (см. local_places_query).
+    """
+    stmt = local_places_query(latitude, longitude, radius, category, min_rating, limit)
+    with read_replica(db):
+        result = await db.execute(stmt)
+    return result.all()
 
-    filtered_places = []
-    for place in candidates:
-        rating = rating_map.get(place.id)
-        if min_rating is None or (rating is not None and rating >= min_rating):
-            filtered_places.append(place)
 
-    return filtered_places
+async def stream_local_places(
+        db: AsyncSession,
+        latitude: float,
+        longitude: float,
+        radius: int,
+        category: str,
+        min_rating: Optional[float] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 100
+) -> AsyncIterator[Row]:
+    """
+    То же, что get_local_places, но через серверный курсор: места читаются
+    пачками по batch_size и отдаются по одному, не загружая весь результат.
+    """
+    stmt = local_places_query(latitude, longitude, radius, category, min_rating, limit)
+    with read_replica(db):
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        async for row in result:
+            yield row
@@ -0,0 +1,34 @@
+import asyncio
+
+from core.config import settings
+from core.logger import logger
+from core.services import (create_redis, create_http_clients, create_single_flights, create_upstream_services,
+                           create_cache_warmer)
+from domain.services.cache_warmer import WARMER_LOCK_KEY
+
+
+async def warm_cache() -> None:
+    """
+    Один прогон прогрева кэшей — для запуска по расписанию (cron) вне API.
+    """
+    redis = create_redis()
+    http_clients = create_http_clients()
+    services = create_upstream_services(redis, http_clients, create_single_flights(redis))
+    try:
+        await redis.connect()
+        # Та же блокировка, что у прогрева в API: за интервал выполняется один прогон
+        if not await redis.set_if_absent(WARMER_LOCK_KEY, "1", settings.CACHE_WARMER_INTERVAL):
+            logger.info("Прогрев кэша уже выполнен или выполняется другим процессом")
+            return
+        stats = await create_cache_warmer(redis, services).run_once()
+        logger.info(f"Прогрев кэша завершён: {stats}")
+    finally:
+        await services["foursquare_cache"].close()
+        for client in http_clients.values():
+            await client.aclose()
+        await redis.close()
+        await logger.complete()
+
+
+if __name__ == "__main__":
+    asyncio.run(warm_cache())
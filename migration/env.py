@@ -28,7 +28,7 @@ if config.config_file_name is not None:
     logger.info("Alembic logging configured")
 
 from app.infrastructure.database.base import Base
-from app.infrastructure.database.models import User, Place,Rating, Review, UserTrip, UserPlaceHistory, UserVisit
+from app.infrastructure.database.models import User, Place,Rating, Review, UserTrip, UserPlaceHistory, UserVisit, UserPreferenceProfile
 
 target_metadata = Base.metadata
 
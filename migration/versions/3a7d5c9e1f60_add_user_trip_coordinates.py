@@ -0,0 +1,33 @@
+"""add user trip coordinates
+
+Revision ID: 3a7d5c9e1f60
+Revises: e41d8b6c0f27
+Create Date: 2026-10-18 15:20:11.402871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7d5c9e1f60'
+down_revision: Union[str, None] = 'e41d8b6c0f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Старые поездки остаются без координат и не участвуют в прогреве кэша
+    op.add_column('usertrips', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('usertrips', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('usertrips', sa.Column('geohash', sa.String(length=12, collation='C'), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('usertrips', 'geohash')
+    op.drop_column('usertrips', 'longitude')
+    op.drop_column('usertrips', 'latitude')
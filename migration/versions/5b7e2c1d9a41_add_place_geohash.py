@@ -0,0 +1,80 @@
+"""add place geohash
+
+Revision ID: 5b7e2c1d9a41
+Revises: 0f019c466f9b
+Create Date: 2026-10-18 10:12:04.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c1d9a41'
+down_revision: Union[str, None] = '0f019c466f9b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_PRECISION = 9
+_BATCH_SIZE = 1000
+
+
+def _geohash(lat: float, lon: float) -> str:
+    # Копия utils.geohash.encode: миграция не должна зависеть от кода приложения
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < _PRECISION:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = bits * 2 + 1
+            rng[0] = mid
+        else:
+            bits = bits * 2
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('places', sa.Column('geohash', sa.String(length=12, collation='C'), nullable=True))
+
+    # Заполняем geohash у существующих мест пачками
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, latitude, longitude FROM places "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": _BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(
+            sa.text("UPDATE places SET geohash = :geohash WHERE id = :id"),
+            [{"id": row.id, "geohash": _geohash(row.latitude, row.longitude)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+    op.create_index('idx_places_category_geohash', 'places', ['category', 'geohash'], unique=False)
+    op.drop_index('idx_latitude', table_name='places')
+    op.drop_index('idx_longitude', table_name='places')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('idx_longitude', 'places', ['longitude'], unique=False)
+    op.create_index('idx_latitude', 'places', ['latitude'], unique=False)
+    op.drop_index('idx_places_category_geohash', table_name='places')
+    op.drop_column('places', 'geohash')
@@ -0,0 +1,29 @@
+"""add review keyset index
+
+Revision ID: 6e2b8f4a1c07
+Revises: 3a7d5c9e1f60
+Create Date: 2026-10-18 17:42:36.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2b8f4a1c07'
+down_revision: Union[str, None] = '3a7d5c9e1f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_userplacereviews_created_at_id', 'userplacereviews', ['created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_userplacereviews_created_at_id', table_name='userplacereviews')
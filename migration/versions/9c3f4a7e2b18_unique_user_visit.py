@@ -0,0 +1,33 @@
+"""unique user visit
+
+Revision ID: 9c3f4a7e2b18
+Revises: 5b7e2c1d9a41
+Create Date: 2026-10-18 11:40:27.502913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3f4a7e2b18'
+down_revision: Union[str, None] = '5b7e2c1d9a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Оставляем самое раннее посещение для каждой пары (user_id, external_id)
+    op.execute(
+        "DELETE FROM uservisits a USING uservisits b "
+        "WHERE a.user_id = b.user_id AND a.external_id = b.external_id AND a.id > b.id"
+    )
+    op.create_unique_constraint('uq_uservisits_user_external', 'uservisits', ['user_id', 'external_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_uservisits_user_external', 'uservisits', type_='unique')
@@ -0,0 +1,59 @@
+"""add place review stats
+
+Revision ID: b84e1f3d6a29
+Revises: 6e2b8f4a1c07
+Create Date: 2026-10-18 18:31:07.552940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b84e1f3d6a29'
+down_revision: Union[str, None] = '6e2b8f4a1c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('placereviewstats',
+    sa.Column('place_id', sa.Integer(), nullable=False),
+    sa.Column('review_count', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('rating_mean', sa.Float(), nullable=True),
+    sa.Column('rating_1', sa.Integer(), nullable=False),
+    sa.Column('rating_2', sa.Integer(), nullable=False),
+    sa.Column('rating_3', sa.Integer(), nullable=False),
+    sa.Column('rating_4', sa.Integer(), nullable=False),
+    sa.Column('rating_5', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['place_id'], ['places.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('place_id')
+    )
+    # Агрегаты уже существующих отзывов; дальше они обновляются при записи отзывов
+    op.execute("""
+        INSERT INTO placereviewstats (place_id, review_count, rating_sum, rating_mean,
+                                      rating_1, rating_2, rating_3, rating_4, rating_5)
+        SELECT place_id,
+               count(*),
+               sum(rating),
+               avg(rating),
+               count(*) FILTER (WHERE rating = 1),
+               count(*) FILTER (WHERE rating = 2),
+               count(*) FILTER (WHERE rating = 3),
+               count(*) FILTER (WHERE rating = 4),
+               count(*) FILTER (WHERE rating = 5)
+        FROM userplacereviews
+        WHERE place_id IS NOT NULL AND rating IS NOT NULL
+        GROUP BY place_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('placereviewstats')
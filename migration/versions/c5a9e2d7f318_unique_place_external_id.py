@@ -0,0 +1,74 @@
+"""unique place external id
+
+Revision ID: c5a9e2d7f318
+Revises: b84e1f3d6a29
+Create Date: 2026-10-18 19:12:44.208613
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a9e2d7f318'
+down_revision: Union[str, None] = 'b84e1f3d6a29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Дубли мест одного external_id сливаются в самое раннее место
+    op.execute("""
+        CREATE TEMPORARY TABLE place_duplicates ON COMMIT DROP AS
+        SELECT id, keep_id
+        FROM (SELECT id, min(id) OVER (PARTITION BY external_id) AS keep_id
+              FROM places
+              WHERE external_id IS NOT NULL) AS ranked
+        WHERE id <> keep_id
+    """)
+    for table in ('ratings', 'reviews', 'userplacereviews'):
+        op.execute(f"""
+            UPDATE {table} SET place_id = d.keep_id
+            FROM place_duplicates d
+            WHERE {table}.place_id = d.id
+        """)
+    # Агрегаты отзывов слитых мест пересчитываются заново
+    op.execute("""
+        DELETE FROM placereviewstats
+        WHERE place_id IN (SELECT id FROM place_duplicates UNION SELECT keep_id FROM place_duplicates)
+    """)
+    op.execute("""
+        INSERT INTO placereviewstats (place_id, review_count, rating_sum, rating_mean,
+                                      rating_1, rating_2, rating_3, rating_4, rating_5)
+        SELECT place_id,
+               count(*),
+               sum(rating),
+               avg(rating),
+               count(*) FILTER (WHERE rating = 1),
+               count(*) FILTER (WHERE rating = 2),
+               count(*) FILTER (WHERE rating = 3),
+               count(*) FILTER (WHERE rating = 4),
+               count(*) FILTER (WHERE rating = 5)
+        FROM userplacereviews
+        WHERE place_id IN (SELECT keep_id FROM place_duplicates) AND rating IS NOT NULL
+        GROUP BY place_id
+    """)
+    op.execute("DELETE FROM places WHERE id IN (SELECT id FROM place_duplicates)")
+
+    # Оставляем последний рейтинг для каждой пары (place_id, source)
+    op.execute(
+        "DELETE FROM ratings a USING ratings b "
+        "WHERE a.place_id = b.place_id AND a.source = b.source AND a.id < b.id"
+    )
+
+    op.create_index('uq_places_external_id', 'places', ['external_id'], unique=True)
+    op.create_index('uq_ratings_place_id_source', 'ratings', ['place_id', 'source'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_ratings_place_id_source', table_name='ratings')
+    op.drop_index('uq_places_external_id', table_name='places')
@@ -0,0 +1,41 @@
+"""add user preference profile
+
+Revision ID: e41d8b6c0f27
+Revises: 9c3f4a7e2b18
+Create Date: 2026-10-18 13:05:51.730164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41d8b6c0f27'
+down_revision: Union[str, None] = '9c3f4a7e2b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Профили заполняются при первом обращении к пользователю (UserPreferenceRepository)
+    op.create_table('userpreferenceprofiles',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_weights', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('rating_count', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Float(), nullable=False),
+    sa.Column('rating_min', sa.Float(), nullable=True),
+    sa.Column('visited_filter', sa.LargeBinary(), nullable=False),
+    sa.Column('seen_filter', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('userpreferenceprofiles')
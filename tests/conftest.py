@@ -0,0 +1,33 @@
+import os
+import sys
+from pathlib import Path
+
+# Код приложения импортируется так же, как в контейнере: PYTHONPATH=app (см. Dockerfile)
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+sys.path.insert(0, str(APP_DIR))
+
+# Обязательные настройки без значений по умолчанию; реальные берутся из окружения или .env
+_TEST_SETTINGS = {
+    "PLACE_DB_HOST": "localhost",
+    "PLACE_DB_PORT": "5432",
+    "PLACE_DB_NAME": "places_test",
+    "PLACE_DB_USER": "places",
+    "PLACE_DB_PASSWORD": "test-db-password",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "REDIS_PASSWORD": "test-redis-password",
+    "REDIS_USER": "test",
+    "REDIS_USER_PASSWORD": "test-redis-user-password",
+    "OPENTRIPMAP_API_KEY": "test-opentripmap-key",
+    "OPENTRIPMAP_URL": "http://opentripmap.test",
+    "FOURSQUARE_API_KEY": "test-foursquare-key",
+    "FOURSQUARE_URL": "http://foursquare.test",
+    "NOMINATIM_URL": "http://nominatim.test",
+    "SECRET_KEY": "test-secret-key",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    # тесты не пишут app.log в рабочий каталог
+    "LOG_FILE": "",
+}
+for name, value in _TEST_SETTINGS.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,31 @@
+from utils.bloom import DEFAULT_SIZE_BITS, BloomFilter
+
+
+def test_added_items_are_found():
+    bloom = BloomFilter()
+    items = [f"fsq-{i}" for i in range(500)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+
+
+def test_empty_filter_contains_nothing():
+    bloom = BloomFilter()
+    assert "fsq-1" not in bloom
+    assert bloom.to_bytes() == bytes(DEFAULT_SIZE_BITS // 8)
+
+
+def test_round_trip_through_bytes():
+    bloom = BloomFilter()
+    bloom.add("place-1")
+    restored = BloomFilter(bloom.to_bytes())
+    assert "place-1" in restored
+    assert restored.to_bytes() == bloom.to_bytes()
+
+
+def test_false_positive_rate_at_design_capacity():
+    bloom = BloomFilter()
+    for i in range(3000):
+        bloom.add(f"member-{i}")
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives / 10000 < 0.03
@@ -0,0 +1,86 @@
+import pytest
+
+from infrastructure.cache import circuit_breaker
+from infrastructure.cache.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.rejected_total == 1
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_admits_single_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0)
+    open_breaker(breaker)
+
+    clock[0] += 9.9
+    assert not breaker.allow()
+
+    clock[0] += 0.1
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Пока пробный вызов не завершён, остальные отклоняются
+    assert not breaker.allow()
+
+
+def test_trial_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0)
+    open_breaker(breaker)
+    clock[0] += 10.0
+    assert breaker.allow()
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_trial_failure_reopens_immediately(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=10.0)
+    open_breaker(breaker)
+    clock[0] += 10.0
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_unrecorded_trial_is_retried_next_window(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0)
+    open_breaker(breaker)
+    clock[0] += 10.0
+    assert breaker.allow()
+
+    clock[0] += 10.0
+    assert breaker.allow()
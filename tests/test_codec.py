@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from infrastructure.cache.codec import (CODEC_VERSION, COMPRESSION_NONE, Codec, _COMPRESSION_IDS,
+                                        _SERIALIZER_IDS, _available)
+
+VALUE = {"places": [{"name": f"Место {i}", "rating": i / 10, "tags": ["a", "b"], "open": i % 2 == 0}
+                    for i in range(50)]}
+
+
+def available(names):
+    return [name for name in names if _available(name)]
+
+
+@pytest.mark.parametrize("serializer", available(_SERIALIZER_IDS))
+@pytest.mark.parametrize("compression", available(_COMPRESSION_IDS))
+def test_round_trip_writes_header(serializer, compression):
+    codec = Codec(serializer=serializer, compression=compression, compress_threshold=0)
+
+    raw = codec.encode(VALUE)
+
+    assert raw[0] == CODEC_VERSION
+    assert raw[1] == _SERIALIZER_IDS[serializer]
+    assert raw[2] == _COMPRESSION_IDS[compression]
+    assert codec.decode(raw) == VALUE
+
+
+def test_short_values_are_not_compressed():
+    codec = Codec(serializer="json", compression="zlib", compress_threshold=1024)
+    raw = codec.encode([1, 2, 3])
+    assert raw[2] == COMPRESSION_NONE
+    assert codec.decode(raw) == [1, 2, 3]
+
+
+@pytest.mark.parametrize("writer", available(_SERIALIZER_IDS))
+def test_decode_follows_header_not_settings(writer):
+    raw = Codec(serializer=writer, compression="zlib", compress_threshold=0).encode(VALUE)
+    assert Codec(serializer="json", compression="none").decode(raw) == VALUE
+
+
+def test_decode_legacy_json_without_header():
+    legacy = json.dumps(VALUE).encode()
+    assert legacy[0] != CODEC_VERSION
+    assert Codec().decode(legacy) == VALUE
+
+
+def test_unknown_formats_fall_back():
+    codec = Codec(serializer="pickle", compression="brotli")
+    assert (codec.serializer, codec.compression) == ("json", "zlib")
+    assert codec.decode(codec.encode(VALUE)) == VALUE
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from utils.distance import haversine_distances, nearest_within_radius
+
+LAT, LON = 55.7558, 37.6173
+
+
+def test_haversine_one_degree_of_latitude():
+    distance = haversine_distances(0.0, 0.0, [1.0], [0.0])[0]
+    assert distance == pytest.approx(111_195, rel=1e-3)
+
+
+def test_nearest_within_radius_filters_and_sorts():
+    # ~1.1 км, ~0.1 км, ~5.6 км, ~0.56 км к северу от точки
+    lats = [LAT + 0.01, LAT + 0.001, LAT + 0.05, LAT + 0.005]
+    lons = [LON] * 4
+
+    indices, distances = nearest_within_radius(LAT, LON, lats, lons, radius_meters=2000)
+
+    assert indices.tolist() == [1, 3, 0]
+    assert np.all(np.diff(distances) >= 0)
+    assert np.all(distances <= 2000)
+
+
+def test_nearest_within_radius_limit_keeps_closest():
+    lats = [LAT + i * 0.001 for i in range(10, 0, -1)]
+    lons = [LON] * 10
+
+    indices, distances = nearest_within_radius(LAT, LON, lats, lons, radius_meters=5000, limit=3)
+
+    assert indices.tolist() == [9, 8, 7]
+    assert len(distances) == 3
+
+
+def test_nearest_within_radius_limit_larger_than_matches():
+    indices, _ = nearest_within_radius(LAT, LON, [LAT, LAT + 1.0], [LON, LON], radius_meters=1000, limit=10)
+    assert indices.tolist() == [0]
+
+
+def test_nearest_within_radius_empty_input():
+    indices, distances = nearest_within_radius(LAT, LON, [], [], radius_meters=1000)
+    assert indices.size == 0
+    assert distances.size == 0
+
+
+def test_nearest_within_radius_across_antimeridian():
+    indices, distances = nearest_within_radius(0.0, 179.999, [0.0], [-179.999], radius_meters=1000)
+    assert indices.tolist() == [0]
+    assert distances[0] == pytest.approx(222, rel=1e-2)
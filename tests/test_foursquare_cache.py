@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+from infrastructure.cache.foursquare_cache import FoursquareSearchCache
+
+LATITUDE, LONGITUDE = 55.7558, 37.6173
+
+
+class FakeRedis:
+    """Объектный кэш RedisService в памяти."""
+
+    def __init__(self):
+        self.objects = {}
+
+    async def get_object(self, key, build=None):
+        return self.objects.get(key)
+
+    async def set_object(self, key, value, dump=None, ttl=3600):
+        self.objects[key] = value
+
+
+class FakeFoursquare:
+    def __init__(self, results, error=None):
+        self.results = results
+        self.error = error
+        self.calls = 0
+
+    async def search_places(self, params):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.error:
+            raise self.error
+        return {"results": self.results}
+
+
+def make_cache(client):
+    cache = FoursquareSearchCache(client, FakeRedis())
+    key, _ = cache._request("13065", LATITUDE, LONGITUDE, 1000, None)
+    return cache, key
+
+
+def test_stale_entry_is_served_and_refreshed_once_in_background():
+    async def scenario():
+        client = FakeFoursquare([{"fsq_id": "new"}])
+        cache, key = make_cache(client)
+        cache.redis.objects[key] = {"results": [{"fsq_id": "old"}], "fresh_until": time.time() - 1}
+
+        responses = [await cache.search("13065", LATITUDE, LONGITUDE, 1000) for _ in range(3)]
+        calls_before_refresh = client.calls
+        await cache.close()
+        return responses, calls_before_refresh, client.calls, cache.redis.objects[key], cache.stats()
+
+    responses, calls_before_refresh, calls, entry, stats = asyncio.run(scenario())
+    # Устаревший ответ отдаётся сразу, не дожидаясь Foursquare
+    assert responses == [{"results": [{"fsq_id": "old"}]}] * 3
+    assert calls_before_refresh == 0
+    # Одновременные устаревшие попадания запускают одно обновление
+    assert calls == 1
+    assert entry["results"] == [{"fsq_id": "new"}]
+    assert entry["fresh_until"] > time.time()
+    assert (stats["stale_hits"], stats["refreshes"], stats["misses"]) == (3, 1, 0)
+
+
+def test_failed_refresh_keeps_stale_entry():
+    async def scenario():
+        client = FakeFoursquare([], error=RuntimeError("quota exceeded"))
+        cache, key = make_cache(client)
+        stale = {"results": [{"fsq_id": "old"}], "fresh_until": time.time() - 1}
+        cache.redis.objects[key] = stale
+
+        response = await cache.search("13065", LATITUDE, LONGITUDE, 1000)
+        await cache.close()
+        return response, cache.redis.objects[key] is stale, cache.stats(), cache._refreshing
+
+    response, kept, stats, refreshing = asyncio.run(scenario())
+    assert response == {"results": [{"fsq_id": "old"}]}
+    assert kept
+    assert (stats["refreshes"], stats["refresh_errors"]) == (0, 1)
+    # После ошибки плитку можно обновлять снова
+    assert refreshing == set()
+
+
+def test_fresh_entry_does_not_refresh():
+    async def scenario():
+        client = FakeFoursquare([{"fsq_id": "new"}])
+        cache, key = make_cache(client)
+        cache.redis.objects[key] = {"results": [{"fsq_id": "old"}], "fresh_until": time.time() + 60}
+
+        response = await cache.search("13065", LATITUDE, LONGITUDE, 1000)
+        await cache.close()
+        return response, client.calls, cache.stats()
+
+    response, calls, stats = asyncio.run(scenario())
+    assert response == {"results": [{"fsq_id": "old"}]}
+    assert calls == 0
+    assert (stats["hits"], stats["stale_hits"]) == (1, 0)
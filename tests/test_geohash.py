@@ -0,0 +1,80 @@
+import math
+
+import pytest
+
+from utils.geohash import METERS_PER_DEGREE, cell_size, cover, encode, prefix_range
+
+
+def circle_points(lat, lon, radius_meters, steps=72):
+    """Центр и точки чуть внутри окружности заданного радиуса."""
+    points = [(lat, lon)]
+    inner = radius_meters * 0.999
+    for i in range(steps):
+        angle = 2 * math.pi * i / steps
+        d_lat = inner * math.cos(angle) / METERS_PER_DEGREE
+        d_lon = inner * math.sin(angle) / (METERS_PER_DEGREE * math.cos(math.radians(lat + d_lat)))
+        points.append((lat + d_lat, (lon + d_lon + 180.0) % 360.0 - 180.0))
+    return points
+
+
+def assert_covers(lat, lon, radius_meters):
+    prefixes = cover(lat, lon, radius_meters)
+    assert prefixes is not None
+    precision = len(prefixes[0])
+    assert all(len(prefix) == precision for prefix in prefixes)
+    for point_lat, point_lon in circle_points(lat, lon, radius_meters):
+        assert encode(point_lat, point_lon, precision) in prefixes, (point_lat, point_lon)
+    return prefixes
+
+
+def test_encode_known_values():
+    assert encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert encode(42.6, -5.6, 5) == "ezs42"
+
+
+def test_encode_default_precision_is_prefix_of_longer_hash():
+    full = encode(55.7558, 37.6173, 12)
+    assert encode(55.7558, 37.6173) == full[:9]
+    assert encode(55.7558, 37.6173, 6) == full[:6]
+
+
+def test_prefix_range_bounds_only_hashes_with_prefix():
+    low, high = prefix_range("ucfv0")
+    inside = encode(55.7558, 37.6173)
+    assert inside.startswith("ucfv0")
+    assert low <= inside < high
+    for other in ("ucfv", "ucfuzzzzz", "ucfv10000", "ucfw00000", "v"):
+        assert not (low <= other < high)
+
+
+def test_cover_small_circle():
+    prefixes = assert_covers(55.7558, 37.6173, 500)
+    assert len(prefixes) <= 9
+
+
+def test_cover_circle_centered_on_cell_edge():
+    lat_step, lon_step = cell_size(6)
+    # Центр ровно на углу четырёх ячеек точности 6
+    lat = math.floor(55.7558 / lat_step) * lat_step
+    lon = math.floor(37.6173 / lon_step) * lon_step
+    assert_covers(lat, lon, 300)
+    assert_covers(lat, lon, 1000)
+
+
+def test_cover_circle_at_origin_corner():
+    assert_covers(0.0, 0.0, 1000)
+
+
+@pytest.mark.parametrize("lon", [179.9995, -179.9995, 180.0 - 1e-9])
+def test_cover_circle_crossing_antimeridian(lon):
+    prefixes = assert_covers(10.0, lon, 2000)
+    # Соседние ячейки по другую сторону меридиана 180° тоже в покрытии
+    assert {prefix[0] for prefix in prefixes} >= {encode(10.0, 179.99, 1), encode(10.0, -179.99, 1)}
+
+
+def test_cover_near_pole_uses_wider_cells():
+    assert_covers(80.0, 20.0, 1000)
+
+
+def test_cover_returns_none_for_huge_radius():
+    assert cover(55.7558, 37.6173, 10_000_000) is None
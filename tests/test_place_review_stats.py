@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateTable
+
+from domain.repositories.place_review_stats_repository import PlaceReviewStatsRepository
+from infrastructure.database.models import PlaceReviewStat
+
+PLACE_ID = 7
+
+
+async def apply(changes):
+    """Применить (old_rating, new_rating) по порядку и вернуть строку агрегатов."""
+    # INSERT … ON CONFLICT DO UPDATE есть и в SQLite, поэтому выражения Postgres выполняются как есть
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(PlaceReviewStat.__table__.create)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            repository = PlaceReviewStatsRepository(session)
+            for old_rating, new_rating in changes:
+                await repository.record_review(PLACE_ID, old_rating, new_rating)
+            await session.commit()
+            return await session.scalar(select(PlaceReviewStat).where(PlaceReviewStat.place_id == PLACE_ID))
+    finally:
+        await engine.dispose()
+
+
+def run(changes):
+    return asyncio.run(apply(changes))
+
+
+def test_first_review_creates_row():
+    stats = run([(None, 4)])
+    assert (stats.review_count, stats.rating_sum, stats.rating_mean) == (1, 4, 4.0)
+    assert stats.histogram == [0, 0, 0, 1, 0]
+
+
+def test_new_reviews_accumulate():
+    stats = run([(None, 4), (None, 5), (None, 3)])
+    assert (stats.review_count, stats.rating_sum) == (3, 12)
+    assert stats.rating_mean == pytest.approx(4.0)
+    assert stats.histogram == [0, 0, 1, 1, 1]
+
+
+def test_changed_rating_moves_between_buckets():
+    stats = run([(None, 4), (None, 2), (4, 1)])
+    assert (stats.review_count, stats.rating_sum) == (2, 3)
+    assert stats.rating_mean == pytest.approx(1.5)
+    assert stats.histogram == [1, 1, 0, 0, 0]
+
+
+def test_deleted_review_is_subtracted():
+    stats = run([(None, 5), (None, 1), (5, None)])
+    assert (stats.review_count, stats.rating_sum, stats.rating_mean) == (1, 1, 1.0)
+    assert stats.histogram == [1, 0, 0, 0, 0]
+
+
+def test_last_review_deleted_clears_mean():
+    stats = run([(None, 3), (3, None)])
+    assert (stats.review_count, stats.rating_sum, stats.rating_mean) == (0, 0, None)
+    assert stats.histogram == [0, 0, 0, 0, 0]
+
+
+def test_unchanged_rating_is_noop():
+    assert run([(3, 3)]) is None
+
+
+async def delete_twice():
+    """Удалить один отзыв из двух сессий; вторая уже держит его в identity map."""
+    from domain.repositories.review_repository import ReviewRepository
+    from infrastructure.database.models import Place
+    # тот же класс, что использует ReviewRepository (модуль импортируется через пакет app)
+    from app.infrastructure.database.models.user_place_review import UserPlaceReview
+
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        # колонка geohash объявлена с COLLATE "C", которой в SQLite нет
+        places = CreateTable(Place.__table__).compile(dialect=engine.dialect)
+        await connection.exec_driver_sql(str(places).replace(' COLLATE "C"', ""))
+        for model in (UserPlaceReview, PlaceReviewStat):
+            await connection.run_sync(model.__table__.create)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as setup:
+            place = Place(name="Парк", address="-", category="park", latitude=0.0, longitude=0.0)
+            setup.add(place)
+            await setup.flush()
+            review = UserPlaceReview(user_id=1, place_id=place.id, content="-", rating=3)
+            setup.add(review)
+            await PlaceReviewStatsRepository(setup).record_review(place.id, None, 3)
+            await setup.commit()
+            place_id, review_id = place.id, review.id
+
+        async with AsyncSession(engine, expire_on_commit=False) as stale:
+            loaded = await stale.get(UserPlaceReview, review_id)
+            assert loaded.rating == 3
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                await ReviewRepository(session).delete_review(review_id)
+            await ReviewRepository(stale).delete_review(review_id)
+
+        async with AsyncSession(engine) as session:
+            return await session.scalar(select(PlaceReviewStat).where(PlaceReviewStat.place_id == place_id))
+    finally:
+        await engine.dispose()
+
+
+def test_double_delete_subtracts_once():
+    stats = asyncio.run(delete_twice())
+    assert (stats.review_count, stats.rating_sum) == (0, 0)
+    assert stats.histogram == [0, 0, 0, 0, 0]
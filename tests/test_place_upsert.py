@@ -0,0 +1,81 @@
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from domain.repositories.place_repository import PlaceRepository
+
+
+class RecordingSession:
+    """Сессия, которая запоминает выполненные запросы вместо обращения к Postgres."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return RecordingResult()
+
+
+class RecordingResult:
+    def scalars(self):
+        return iter(())
+
+
+def place(external_id, name="Кафе", rating=None):
+    return {
+        "external_id": external_id,
+        "name": name,
+        "latitude": 55.7558,
+        "longitude": 37.6173,
+        "address": "Тверская, 1",
+        "rating": rating,
+    }
+
+
+def save(places):
+    """Сохранить места и вернуть SQL (диалект Postgres) и параметры выполненных запросов."""
+    session = RecordingSession()
+    asyncio.run(PlaceRepository(session).save_external_places(places, category="cafe"))
+    compiled = [statement.compile(dialect=postgresql.dialect()) for statement in session.statements]
+    return [" ".join(str(c).split()) for c in compiled], [list(c.params.values()) for c in compiled]
+
+
+def test_places_and_ratings_are_saved_in_one_statement():
+    sql, params = save([place("fsq-1", rating=8.5), place("fsq-2")])
+
+    assert len(sql) == 1
+    statement = sql[0]
+    assert statement.startswith("WITH saved_places AS (INSERT INTO places")
+    assert "ON CONFLICT (external_id) DO UPDATE SET" in statement
+    assert "saved_ratings AS (INSERT INTO ratings (place_id, source, rating)" in statement
+    assert "ON CONFLICT (place_id, source) DO UPDATE SET" in statement
+    # Рейтинг привязывается к id, возвращённому upsert мест, а не к отдельному SELECT
+    assert "FROM saved_places JOIN (VALUES" in statement
+    assert statement.endswith("FROM saved_places")
+    # Рейтинг передаётся только для места, у которого он есть
+    assert params[0].count("fsq-1") == 2
+    assert params[0].count("fsq-2") == 1
+    assert 8.5 in params[0]
+
+
+def test_duplicate_places_are_sent_once():
+    _, params = save([place("fsq-1", name="Первое"), place("fsq-1", name="Повтор")])
+
+    # ON CONFLICT не может обновить одну строку дважды за запрос
+    assert params[0].count("fsq-1") == 1
+    assert "Первое" in params[0]
+    assert "Повтор" not in params[0]
+
+
+def test_places_without_ratings_skip_rating_upsert():
+    sql, _ = save([place("fsq-1")])
+
+    assert len(sql) == 1
+    assert "saved_ratings" not in sql[0]
+    assert "INSERT INTO ratings" not in sql[0]
+
+
+def test_no_places_no_query():
+    sql, _ = save([])
+
+    assert sql == []
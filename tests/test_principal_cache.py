@@ -0,0 +1,81 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.schema import CreateTable
+
+from infrastructure.cache.principal_cache import PrincipalCache
+from infrastructure.database.base import Base
+from infrastructure.database.models import User
+
+
+class FakeRedis:
+    """Запоминает ключи, сброшенные через delete_object."""
+
+    def __init__(self):
+        self.deleted = []
+
+    async def delete_object(self, key):
+        self.deleted.append(key)
+
+
+async def change_user(change, commit=True):
+    """Изменить пользователя alice и вернуть ключи, сброшенные из кэша."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        # при удалении пользователя ORM загружает связанные с ним строки
+        for name in ("users", "userplacereviews", "usertrips", "userplacehistorys", "uservisits"):
+            # COLLATE "C" у колонок geohash в SQLite нет
+            ddl = CreateTable(Base.metadata.tables[name]).compile(dialect=engine.dialect)
+            await connection.exec_driver_sql(str(ddl).replace(' COLLATE "C"', ""))
+    cache = PrincipalCache(FakeRedis())
+    cache.register()
+    try:
+        async with AsyncSession(engine) as session:
+            user = User(username="alice", email="alice@example.com", hashed_password="-")
+            session.add(user)
+            await session.commit()
+            cache.redis.deleted.clear()
+
+            await change(session, user)
+            if commit:
+                await session.commit()
+            else:
+                await session.rollback()
+        # Сброс планируется задачей после коммита
+        await asyncio.sleep(0)
+        return cache.redis.deleted
+    finally:
+        cache.unregister()
+        await engine.dispose()
+
+
+def test_updated_user_is_invalidated_after_commit():
+    async def change(session, user):
+        user.email = "alice@example.org"
+        await session.flush()
+
+    assert asyncio.run(change_user(change)) == ["auth:user:alice"]
+
+
+def test_renamed_user_is_invalidated_under_both_names():
+    async def change(session, user):
+        user.username = "alicia"
+        await session.flush()
+
+    assert sorted(asyncio.run(change_user(change))) == ["auth:user:alice", "auth:user:alicia"]
+
+
+def test_deleted_user_is_invalidated_after_commit():
+    async def change(session, user):
+        await session.delete(user)
+        await session.flush()
+
+    assert asyncio.run(change_user(change)) == ["auth:user:alice"]
+
+
+def test_rolled_back_change_is_not_invalidated():
+    async def change(session, user):
+        user.email = "alice@example.org"
+        await session.flush()
+
+    assert asyncio.run(change_user(change, commit=False)) == []
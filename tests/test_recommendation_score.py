@@ -0,0 +1,47 @@
+import pytest
+
+from domain.services.recommendation_service import UNKNOWN_RATING_SCORE, RATING_WEIGHT, score_place
+
+
+def score(**overrides):
+    params = dict(rating=8.0, distance=500.0, radius=2000, affinity=0.5, seen=False)
+    params.update(overrides)
+    return score_place(**params)
+
+
+def test_score_is_between_zero_and_one():
+    assert score(rating=10.0, distance=0.0, affinity=1.0) == pytest.approx(1.0)
+    assert score(rating=0.0, distance=2000.0, affinity=0.0, seen=True) == pytest.approx(0.0)
+
+
+def test_closer_higher_rated_and_new_places_rank_higher():
+    assert score(distance=100.0) > score(distance=1500.0)
+    assert score(rating=9.0) > score(rating=5.0)
+    assert score(seen=False) > score(seen=True)
+    assert score(affinity=1.0) > score(affinity=0.0)
+
+
+def test_missing_rating_counts_as_average():
+    assert score(rating=None) == pytest.approx(score(rating=UNKNOWN_RATING_SCORE * 10))
+
+
+def test_rating_above_scale_is_capped():
+    assert score(rating=15.0) == pytest.approx(score(rating=10.0))
+
+
+def test_distance_outside_radius_and_zero_radius_score_zero_distance():
+    assert score(distance=5000.0) == pytest.approx(score(distance=2000.0))
+    assert score(radius=0) == pytest.approx(score(distance=2000.0))
+
+
+def test_user_reviews_outweigh_foursquare_rating_as_they_accumulate():
+    base = score(rating=10.0)
+    few = score(rating=10.0, user_rating=1.0, review_count=1)
+    many = score(rating=10.0, user_rating=1.0, review_count=100)
+    assert base > few > many
+    # Сотни отзывов почти полностью заменяют рейтинг Foursquare
+    assert many - score(rating=0.0) < RATING_WEIGHT * 0.1
+
+
+def test_user_rating_ignored_without_reviews():
+    assert score(user_rating=1.0, review_count=0) == pytest.approx(score())
@@ -0,0 +1,39 @@
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from domain.repositories.review_repository import decode_review_cursor, encode_review_cursor
+from infrastructure.database.models import UserPlaceReview
+
+
+def b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    review = UserPlaceReview(id=42, created_at=created_at)
+
+    assert decode_review_cursor(encode_review_cursor(review)) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", [
+    "не base64",
+    "abc",
+    b64(b"not json"),
+    b64(b"\xff\xfe"),
+    b64(b"null"),
+    b64(b"{}"),
+    b64(b'["2024-05-01T12:30:15"]'),
+    b64(b'["2024-05-01T12:30:15", 1, 2]'),
+    b64(b'["yesterday", 1]'),
+    b64(b'[1, 1]'),
+    b64(b'["2024-05-01T12:30:15", "x"]'),
+    b64(b'["2024-05-01T12:30:15", null]'),
+])
+def test_malformed_cursor_is_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_review_cursor(cursor)
+    assert error.value.status_code == 400
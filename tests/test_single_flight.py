@@ -0,0 +1,127 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from infrastructure.cache.single_flight import SingleFlight
+
+
+class FakeClient:
+    """Команды Redis, которые SingleFlight выполняет через RedisService.client()."""
+
+    def __init__(self, data):
+        self.data = data
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+class FakePipeline:
+    def __init__(self, data):
+        self.data = data
+        self.commands = []
+
+    def get(self, key):
+        self.commands.append(lambda: self.data.get(key))
+
+    def exists(self, key):
+        self.commands.append(lambda: int(key in self.data))
+
+    async def execute(self):
+        return [command() for command in self.commands]
+
+
+class FakeRedis:
+    """Общий для нескольких «воркеров» Redis в памяти (без TTL)."""
+
+    def __init__(self):
+        self.data = {}
+
+    @asynccontextmanager
+    async def client(self, raw=False):
+        yield FakeClient(self.data)
+
+    @asynccontextmanager
+    async def pipeline(self, transaction=False):
+        yield FakePipeline(self.data)
+
+    async def set(self, key, value, ttl=3600):
+        self.data[key] = value
+
+
+class Upstream:
+    """Внешний API, который отвечает, только когда тест его отпустит."""
+
+    def __init__(self):
+        self.calls = 0
+        self.released = asyncio.Event()
+
+    async def fetch(self):
+        self.calls += 1
+        await self.released.wait()
+        return {"results": [self.calls]}
+
+
+def test_concurrent_calls_in_process_share_one_request():
+    async def scenario():
+        upstream = Upstream()
+        flight = SingleFlight("test")
+        calls = [asyncio.ensure_future(flight.do("key", upstream.fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        upstream.released.set()
+        return await asyncio.gather(*calls), upstream.calls, flight.stats()
+
+    results, calls, stats = asyncio.run(scenario())
+    assert results == [{"results": [1]}] * 5
+    assert calls == 1
+    assert (stats["executed_total"], stats["coalesced_local"], stats["in_flight"]) == (1, 4, 0)
+
+
+def test_follower_worker_waits_for_leader_result():
+    async def scenario():
+        redis, upstream = FakeRedis(), Upstream()
+        leader = SingleFlight("test", redis, poll_interval=0.01)
+        follower = SingleFlight("test", redis, poll_interval=0.01)
+
+        leading = asyncio.ensure_future(leader.do("key", upstream.fetch))
+        await asyncio.sleep(0.01)
+        following = asyncio.ensure_future(follower.do("key", upstream.fetch))
+        await asyncio.sleep(0.02)
+        upstream.released.set()
+
+        return await leading, await following, upstream.calls, follower.stats(), redis.data
+
+    leader_result, follower_result, calls, stats, data = asyncio.run(scenario())
+    assert leader_result == follower_result == {"results": [1]}
+    assert calls == 1
+    assert (stats["executed_total"], stats["coalesced_remote"]) == (0, 1)
+    # Блокировка снята, результат остаётся для опоздавших ведомых
+    assert "sf:lock:test:key" not in data
+    assert "sf:result:test:key" in data
+
+
+def test_follower_executes_itself_when_leader_lock_is_gone():
+    async def scenario():
+        redis = FakeRedis()
+        # Блокировка ведущего, который упал, не опубликовав результат
+        redis.data["sf:lock:test:key"] = "dead-leader"
+        follower = SingleFlight("test", redis, poll_interval=0.01)
+
+        async def fetch():
+            return {"results": ["own"]}
+
+        following = asyncio.ensure_future(follower.do("key", fetch))
+        await asyncio.sleep(0.02)
+        del redis.data["sf:lock:test:key"]
+        return await following, follower.stats()
+
+    result, stats = asyncio.run(scenario())
+    assert result == {"results": ["own"]}
+    assert (stats["executed_total"], stats["coalesced_remote"]) == (1, 0)
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+
+from domain.services.trip_recorder import TripRecorder
+from infrastructure.queue import MemoryTripQueue, TripEvent
+
+
+def event(user_id: int) -> TripEvent:
+    return TripEvent(user_id=user_id, latitude=55.75, longitude=37.61, category=None, created_at=datetime(2024, 1, 1))
+
+
+def test_failed_batch_is_delivered_again_before_new_events():
+    async def scenario():
+        queue = MemoryTripQueue(maxsize=10, max_attempts=3)
+        await queue.put(event(1))
+        await queue.put(event(2))
+        batch = await queue.get_batch(max_items=1, timeout=0.01)
+        await queue.put(event(3))
+
+        await queue.retry(batch)
+        return [e.user_id for _, e in await queue.get_batch(max_items=10, timeout=0.01)], queue.discarded
+
+    assert asyncio.run(scenario()) == ([1, 2, 3], 0)
+
+
+def test_events_discarded_after_max_attempts():
+    async def scenario():
+        queue = MemoryTripQueue(maxsize=10, max_attempts=2)
+        await queue.put(event(1))
+        for _ in range(2):
+            await queue.retry(await queue.get_batch(max_items=10, timeout=0.01))
+        return await queue.get_batch(max_items=10, timeout=0.01), queue.discarded
+
+    assert asyncio.run(scenario()) == ([], 1)
+
+
+class UnavailableQueue:
+    """Очередь, чтение из которой всегда падает, как при недоступном Redis."""
+    discarded = 0
+
+    async def get_batch(self, max_items, timeout):
+        raise ConnectionError("redis is down")
+
+
+class EndlessQueue:
+    """Очередь, в которой всегда есть события."""
+    discarded = 0
+
+    async def get_batch(self, max_items, timeout):
+        return [(None, event(1))]
+
+    async def retry(self, batch):
+        pass
+
+
+class FailingGeocoder:
+    async def reverse_geocode(self, latitude, longitude):
+        raise RuntimeError("geocoder is down")
+
+
+def failing_session_maker():
+    raise ConnectionError("database is down")
+
+
+def test_stop_does_not_wait_for_unavailable_queue():
+    async def scenario():
+        recorder = TripRecorder(UnavailableQueue(), failing_session_maker, FailingGeocoder(),
+                                flush_interval=0.05, stop_timeout=60)
+        recorder.start()
+        worker = recorder._worker
+        await asyncio.sleep(0)
+        await asyncio.wait_for(recorder.stop(), timeout=1)
+        return worker.cancelled()
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_stop_cancels_worker_after_timeout():
+    async def scenario():
+        recorder = TripRecorder(EndlessQueue(), failing_session_maker, FailingGeocoder(),
+                                flush_interval=0.01, stop_timeout=0.05)
+        recorder.start()
+        worker = recorder._worker
+        await asyncio.wait_for(recorder.stop(), timeout=1)
+        return worker.cancelled(), recorder.failed > 0
+
+    assert asyncio.run(scenario()) == (True, True)
@@ -0,0 +1,62 @@
+import asyncio
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from domain.repositories.user_preference_repository import UserPreferenceRepository
+from infrastructure.database.models import UserPreferenceProfile
+from utils.bloom import BloomFilter
+
+USER_ID = 3
+
+
+def bloom(*items: str) -> bytes:
+    bloom_filter = BloomFilter()
+    for item in items:
+        bloom_filter.add(item)
+    return bloom_filter.to_bytes()
+
+
+async def concurrent_visits(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as connection:
+        # JSONB в SQLite недоступен — таблица создаётся с JSON-колонкой вручную
+        await connection.exec_driver_sql(
+            "CREATE TABLE userpreferenceprofiles (user_id INTEGER PRIMARY KEY, category_weights JSON NOT NULL,"
+            " rating_count INTEGER NOT NULL, rating_sum FLOAT NOT NULL, rating_min FLOAT,"
+            " visited_filter BLOB NOT NULL, seen_filter BLOB NOT NULL,"
+            " created_at DATETIME, updated_at DATETIME)"
+        )
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as setup:
+            setup.add(UserPreferenceProfile(user_id=USER_ID, category_weights={}, rating_count=0, rating_sum=0.0,
+                                            visited_filter=bloom(), seen_filter=bloom()))
+            await setup.commit()
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            # Профиль уже в identity map этой сессии, как после промаха кэша в get_preferences
+            stale = await session.get(UserPreferenceProfile, USER_ID)
+            assert stale.seen_filter == bloom()
+
+            async with AsyncSession(engine) as other:
+                await other.execute(
+                    update(UserPreferenceProfile)
+                    .where(UserPreferenceProfile.user_id == USER_ID)
+                    .values(seen_filter=bloom("fsq-other"))
+                )
+                await other.commit()
+
+            await UserPreferenceRepository(session).record_visits(USER_ID, ["fsq-own"])
+            await session.commit()
+
+        async with AsyncSession(engine) as check:
+            profile = await check.get(UserPreferenceProfile, USER_ID)
+            return BloomFilter(profile.seen_filter)
+    finally:
+        await engine.dispose()
+
+
+def test_locked_profile_keeps_concurrent_update(tmp_path):
+    seen = asyncio.run(concurrent_visits(tmp_path / "profiles.db"))
+    assert "fsq-own" in seen
+    assert "fsq-other" in seen